@@ -276,6 +276,7 @@ def create_what_if_scenario():
 
     config = {
         "mode": "what_if",
+        "source_scenario": source_scenario,
         "now": now,
         "freeze_horizon_hours": data.get("freeze_horizon_hours", 0),
         "freeze_pg2": data.get("freeze_pg2", False),
@@ -1,3 +1,5 @@
+import os
+import re
 import traceback
 import shutil
 from flask import Blueprint, jsonify, request
@@ -6,15 +8,18 @@ from threading import Thread
 import pandas as pd
 import json
 
-from scheduler_core.run import run_scheduler_with_paths
+from scheduler_core.run import run_scheduler_with_paths, latest_best_so_far, read_best_so_far
 from scheduler_core.io import load_cleaned_inputs
 from scheduler_core.precedence import build_dependency_graph
 from scheduler_core.scenario_config import load_scenario_config, scenario_now
+from scheduler_core.sa_checkpoint import load_checkpoint, latest_resumable_run
 
 from scheduler_state import (
     active_jobs,
     progress,
     cancel_flag,
+    best_so_far,
+    run_cache,
     get_lock,
 )
 from scheduler_core.config import (
@@ -25,10 +30,21 @@ from scheduler_core.config import (
     SA_COOLING,
     SA_STEP_SCALE,
     SA_SEED,
+    SA_WORKERS,
+    SA_CHAINS,
+    SA_TEMP_RATIO,
+    SA_SWAP_EVERY,
+    SA_BUDGET_MAX_ITERS,
+    SA_STALL_WINDOW,
+    SA_MIN_IMPROVEMENT,
+    SA_WARM_START,
+    SA_WARM_SIBLINGS,
+    SA_EARLY_ABORT,
 )
 
 schedule_bp = Blueprint("schedule", __name__, url_prefix="/api/schedule")
 CANDIDATE_SUFFIX = "_candidate"
+RUN_ID_RE = re.compile(r"\d{8}_\d{6}")  # run dirs are named %Y%m%d_%H%M%S
 
 
 # ---------------------------
@@ -71,7 +87,8 @@ def _successor_closure(seed_ids: set, succ_multi: dict) -> set:
 # ----------------------------------------
 # INTERNAL WORKER FUNCTION (runs in thread)
 # ----------------------------------------
-def run_scheduler_background(scenario, required_files, output_dir, weights=None, sa_config=None):
+def run_scheduler_background(scenario, required_files, output_dir, weights=None, sa_config=None, resume_run=None,
+                             now_ts=None):
     """
     Worker function that runs in background thread.
 
@@ -81,6 +98,8 @@ def run_scheduler_background(scenario, required_files, output_dir, weights=None,
         output_dir: Output directory path
         weights: Optional dict of weight parameters (uses DEFAULT_WEIGHTS if None)
         sa_config: Optional dict of SA parameters (uses config.py defaults if None)
+        resume_run: Optional run id to continue from its SA checkpoint
+        now_ts: Optional "now" of the run (a resumed run keeps its original one)
     """
 
     def update_progress(p: int):
@@ -111,6 +130,8 @@ def run_scheduler_background(scenario, required_files, output_dir, weights=None,
             weights=weights,  # NEW: Pass weights
             sa_config=sa_config,  # NEW: Pass SA config
             progress_callback=update_progress,
+            resume_run=resume_run,
+            now_ts=now_ts,
         )
 
         if isinstance(results, dict) and results.get("cancelled"):
@@ -205,15 +226,35 @@ def start_scheduler(scenario_name):
     sa_config = data.get("sa_config")
     if sa_config is not None:
         # Validate and set defaults
+        raw = sa_config
         sa_config = {
-            "enabled": sa_config.get("enabled", SA_ENABLED),
-            "iterations": max(1, min(100, sa_config.get("iterations", SA_ITERS))),  # Clamp 1-100
-            "initial_temp": max(0.1, min(10.0, sa_config.get("initial_temp", SA_INIT_TEMP))),
-            "cooling": max(0.8, min(0.99, sa_config.get("cooling", SA_COOLING))),
-            "step_scale": max(0.1, min(1.0, sa_config.get("step_scale", SA_STEP_SCALE))),
-            "seed": sa_config.get("seed", SA_SEED),
+            "enabled": raw.get("enabled", SA_ENABLED),
+            "iterations": max(1, min(100, raw.get("iterations", SA_ITERS))),  # Clamp 1-100
+            "initial_temp": max(0.1, min(10.0, raw.get("initial_temp", SA_INIT_TEMP))),
+            "cooling": max(0.8, min(0.99, raw.get("cooling", SA_COOLING))),
+            "step_scale": max(0.1, min(1.0, raw.get("step_scale", SA_STEP_SCALE))),
+            "seed": raw.get("seed", SA_SEED),
+            "stall_window": max(0, int(raw.get("stall_window", SA_STALL_WINDOW) or 0)),
+            "min_improvement": max(0.0, float(raw.get("min_improvement", SA_MIN_IMPROVEMENT))),
+            "warm_start": bool(raw.get("warm_start", SA_WARM_START)),
+            "warm_siblings": bool(raw.get("warm_siblings", SA_WARM_SIBLINGS)),
+            # stop candidates that can no longer beat the best score
+            "early_abort": bool(raw.get("early_abort", SA_EARLY_ABORT)),
+            # parallel SA: no more workers than cores
+            "workers": max(1, min(os.cpu_count() or 1, int(raw.get("workers", SA_WORKERS)))),
+            # parallel tempering: chain ladder and swap cadence
+            "chains": max(1, min(32, int(raw.get("chains", SA_CHAINS)))),
+            "temp_ratio": max(1.01, min(10.0, float(raw.get("temp_ratio", SA_TEMP_RATIO)))),
+            "swap_every": max(1, int(raw.get("swap_every", SA_SWAP_EVERY))),
         }
-        print(f"[API] Using custom SA config: {sa_config['iterations']} iterations, temp={sa_config['initial_temp']}")
+        sa_config["batch"] = max(1, min(64, int(raw.get("batch", sa_config["workers"]))))
+        if raw.get("time_budget_s") is not None:
+            # anytime mode: the budget decides, iterations only caps it
+            sa_config["time_budget_s"] = max(1.0, float(raw["time_budget_s"]))
+            sa_config["iterations"] = max(1, min(SA_BUDGET_MAX_ITERS, raw.get("iterations", SA_BUDGET_MAX_ITERS)))
+        print(f"[API] Using custom SA config: {sa_config['iterations']} iterations, temp={sa_config['initial_temp']}, "
+              f"budget={sa_config.get('time_budget_s')}s, stall window={sa_config['stall_window']}, "
+              f"workers={sa_config['workers']}, batch={sa_config['batch']}, chains={sa_config['chains']}")
 
     base = Path("scenarios") / scenario
     if not base.exists():
@@ -241,6 +282,8 @@ def start_scheduler(scenario_name):
         active_jobs[scenario] = True
         cancel_flag[scenario] = False
         progress[scenario] = 0
+        best_so_far.pop(scenario, None)
+        run_cache.pop(scenario, None)
 
     # Start background thread with configuration
     t = Thread(
@@ -254,15 +297,102 @@ def start_scheduler(scenario_name):
     return jsonify({"ok": True, "message": "Scheduler started"})
 
 
+# ----------------------------------------
+# RESUME (continue an interrupted SA run)
+# ----------------------------------------
+@schedule_bp.post("/resume/<scenario_name>")
+def resume_scheduler(scenario_name):
+    """
+    Continue a run from its SA checkpoint (body: {"run_id": ...}, default:
+    the newest run with a checkpoint that was not cancelled; finished runs
+    have none), with the weights, SA config and now it was started with.
+    Completed iterations are not redone.
+    """
+    scenario = scenario_name
+    base = Path("scenarios") / scenario
+    if not base.exists():
+        return jsonify({"ok": False, "error": "Scenario does not exist"}), 404
+
+    data = request.get_json(silent=True) or {}
+    run_id = data.get("run_id")
+    if run_id is not None and not (isinstance(run_id, str) and RUN_ID_RE.fullmatch(run_id)):
+        return jsonify({"ok": False, "error": "Invalid run_id"}), 400
+    run_dir = base / "runs" / run_id if run_id else latest_resumable_run(base / "runs")
+    ckpt = load_checkpoint(run_dir) if run_dir is not None else None
+    if ckpt is None:
+        return jsonify({"ok": False, "error": "No SA checkpoint to resume"}), 404
+
+    cleaned = base / "cleaned"
+    required_files = {
+        "jobs_clean.csv": cleaned / "jobs_clean.csv",
+        "shifts_clean.csv": cleaned / "shifts_clean.csv",
+        "unlimited_machines.csv": cleaned / "unlimited_machines.csv",
+        "outsourcing_machines.csv": cleaned / "outsourcing_machines.csv",
+    }
+    missing = [n for n, p in required_files.items() if not p.exists()]
+    if missing:
+        return jsonify({"ok": False, "error": "Missing cleaned files", "missing": missing}), 400
+
+    lock = get_lock(scenario)
+    with lock:
+        if active_jobs.get(scenario, False):
+            return jsonify({"ok": False, "error": "Scheduler already running"}), 409
+
+        active_jobs[scenario] = True
+        cancel_flag[scenario] = False
+        progress[scenario] = 0
+        run_cache.pop(scenario, None)
+
+    t = Thread(
+        target=run_scheduler_background,
+        args=(scenario, required_files, base / "output"),
+        kwargs={
+            "weights": ckpt.get("weights"), "sa_config": ckpt.get("sa_config"), "resume_run": run_dir.name,
+            "now_ts": ckpt.get("now_ts"),  # real_time scenarios: the clock has moved on since
+        },
+        daemon=True
+    )
+    t.start()
+
+    return jsonify({
+        "ok": True, "message": "Scheduler resumed", "run_id": run_dir.name,
+        "evaluations_done": ckpt["budget"]["done"], "best_score": ckpt["best_score"],
+    })
+
+
 @schedule_bp.get("/status/<scenario_name>")
 def get_status(scenario_name):
+    best = best_so_far.get(scenario_name)
     return jsonify({
         "running": active_jobs.get(scenario_name, False),
         "progress": progress.get(scenario_name, 0),
-        "cancelled": cancel_flag.get(scenario_name, False)
+        "cancelled": cancel_flag.get(scenario_name, False),
+        "best_score": best["plan_score"] if best else None,
+        "cache": run_cache.get(scenario_name),
     })
 
 
+@schedule_bp.get("/best-so-far/<scenario_name>")
+def get_best_so_far(scenario_name):
+    """
+    Best plan found so far by the current (or last) run, published each time
+    SA improves on it; after a restart, that of the newest run dir. ?rows=0
+    returns only score/KPIs/counts, for polling.
+    """
+    best = best_so_far.get(scenario_name)
+    path = Path(best["path"]) if best else latest_best_so_far(Path("scenarios") / scenario_name / "runs")
+    if path is None:
+        return jsonify({"ok": False, "error": "No intermediate plan for this scenario"}), 404
+
+    try:
+        data = read_best_so_far(path, rows=request.args.get("rows", "1") != "0")
+    except (OSError, ValueError) as e:
+        return jsonify({"ok": False, "error": f"Could not read intermediate plan: {e}"}), 500
+
+    data["running"] = active_jobs.get(scenario_name, False)
+    return jsonify({"ok": True, **data})
+
+
 @schedule_bp.post("/cancel/<scenario_name>")
 def cancel_schedule(scenario_name):
     if not active_jobs.get(scenario_name, False):
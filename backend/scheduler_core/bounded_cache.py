@@ -0,0 +1,63 @@
+from collections import OrderedDict
+
+
+class BoundedCache:
+    """
+    LRU memo with a fixed number of entries and hit/miss/eviction counters.
+
+    Used for the per-run memo dicts of schedule() so they cannot grow with
+    the number of picks. Keys should be plain ints/tuples of ints (calendar
+    versions, epoch minutes) - cheap to hash and never stale by accident.
+    """
+
+    __slots__ = ("maxsize", "data", "hits", "misses", "evictions", "peak")
+
+    def __init__(self, maxsize):
+        self.maxsize = int(maxsize)
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.peak = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key):
+        v = self.data.get(key)
+        if v is None:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return v
+
+    def put(self, key, value):
+        data = self.data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+        elif len(data) > self.peak:
+            self.peak = len(data)
+
+    def clear(self):
+        self.data.clear()
+
+    def stats(self):
+        return {
+            "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+            "evictions": self.evictions, "peak": self.peak,
+        }
+
+
+def merge_stats(into, name, stats):
+    """Add one cache's stats to an accumulating {name: stats} dict (SA runs)."""
+    cur = into.get(name)
+    if cur is None:
+        into[name] = dict(stats)
+        return
+    for k in ("hits", "misses", "evictions"):
+        cur[k] += stats[k]
+    cur["peak"] = max(cur["peak"], stats["peak"])
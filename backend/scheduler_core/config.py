@@ -29,5 +29,22 @@ SA_INIT_TEMP = 1.0
 SA_COOLING   = 0.95
 SA_STEP_SCALE= 0.25
 SA_SEED      = 42
+SA_WORKERS   = 1     # >1: score SA candidates in a process pool
+SA_CHAINS    = 1     # >1: parallel tempering with this many chains
+SA_TEMP_RATIO = 2.0  # temperature ratio between neighbouring chains
+SA_SWAP_EVERY = 1    # steps between neighbour swap attempts
+SA_TIME_BUDGET_S = None  # wall-clock limit of a run in seconds (None: iterations only)
+SA_BUDGET_MAX_ITERS = 1000  # iteration cap when a time budget is given without one
+SA_STALL_WINDOW = 0  # stop after this many candidates without improvement (0: off)
+SA_MIN_IMPROVEMENT = 1e-3  # smaller best-score gains do not reset the stall window
+SA_WARM_START = False  # try the best weights of earlier runs before SA starts
+SA_WARM_SIBLINGS = True  # ...including those of what-if siblings
+SA_WARM_MAX_SIBLINGS = 3
+# stop an SA candidate's pass once its score provably stays below the best
+# so far; such a candidate counts as rejected, which changes the SA walk
+SA_EARLY_ABORT = False
+
+# entries kept by the per-run rough-end memo of schedule()
+ROUGH_END_CACHE_SIZE = 50_000
 
 INCLUDE_NON_EFFECTIVE_IN_ONTIME = True
@@ -0,0 +1,232 @@
+import time
+
+
+def _strongly_connected(nodes, succs, keep):
+    """
+    Tarjan's strongly connected components of the subgraph keep[j] is true
+    on, iteratively. Yields each component once every component it has an
+    edge into has been yielded (sinks first).
+    """
+    index = {}
+    low = {}
+    on_stack = set()
+    comp_stack = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        comp_stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(succs[root]))]
+        while work:
+            v, it = work[-1]
+            for w in it:
+                if not keep[w]:
+                    continue
+                if w not in index:
+                    index[w] = low[w] = len(index)
+                    comp_stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(succs[w])))
+                    break
+                if w in on_stack and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+                if low[v] == index[v]:
+                    scc = []
+                    while True:
+                        w = comp_stack.pop()
+                        on_stack.discard(w)
+                        scc.append(w)
+                        if w == v:
+                            break
+                    yield scc
+
+
+class JobGraph:
+    """
+    Precedence graph of a JobTable plus the OS5 reachability derived from it.
+
+    Built once per input set (run.py) and shared read-only by every
+    schedule() call. preds/succs are the interned tuples from
+    JobTable.intern_graph (row n is the "unknown predecessor").
+
+    upstream[t] is the transitive predecessor closure of OS5 job t, the set
+    the scheduler used to rebuild by DFS for every OS5 job and every SA
+    iteration. It comes from one reverse-topological pass that ORs
+    per-job bitsets over the OS5 jobs (bit k = os5_jobs[k]).
+
+    os5_remaining[(j, t)] is the longest buffer+duration path from the end
+    of j to the start of OS5 job t (missing if j does not lead to t), from a
+    reverse-topological sweep over the strongly connected components (a
+    cycle from bad material links gets one DFS per member). build_times holds the seconds each
+    of the two passes took.
+    """
+
+    __slots__ = (
+        "pred_sets", "succ_multi", "preds", "succs", "os5_jobs", "upstream", "os5_remaining",
+        "build_times", "_os5_pred_maps",
+    )
+
+    def __init__(self, jt, pred_sets, succ_multi):
+        self.pred_sets = pred_sets
+        self.succ_multi = succ_multi
+        self.preds, self.succs = jt.intern_graph(pred_sets, succ_multi)
+        self.os5_jobs = [j for j in range(len(jt)) if jt.os[j] == 5]
+        self._os5_pred_maps = {}
+
+        t0 = time.perf_counter()
+        reach = self._os5_reach()
+        upstream = {t: [] for t in self.os5_jobs}
+        for j, r in enumerate(reach):
+            while r:
+                low = r & -r
+                upstream[self.os5_jobs[low.bit_length() - 1]].append(j)
+                r ^= low
+        self.upstream = {t: frozenset(ups) for t, ups in upstream.items()}
+        t1 = time.perf_counter()
+        self.os5_remaining = self._os5_remaining(jt.buf.tolist(), jt.dur.tolist())
+        self.build_times = {
+            "os5_closure_s": round(t1 - t0, 4),
+            "os5_remaining_s": round(time.perf_counter() - t1, 4),
+        }
+
+    def _os5_reach(self):
+        """reach[j]: bitset of OS5 jobs that j is a (transitive) predecessor of."""
+        preds = self.preds
+        n1 = len(preds)
+        bit = {t: 1 << k for k, t in enumerate(self.os5_jobs)}
+
+        # Kahn's order over the reversed edges: a job is final once every job
+        # that lists it as a predecessor is
+        waiting = [0] * n1
+        for ps in preds:
+            for p in ps:
+                waiting[p] += 1
+        reach = [0] * n1
+        stack = [j for j in range(n1) if waiting[j] == 0]
+        done = 0
+        while stack:
+            j = stack.pop()
+            done += 1
+            r = reach[j] | bit.get(j, 0)
+            for p in preds[j]:
+                reach[p] |= r
+                waiting[p] -= 1
+                if waiting[p] == 0:
+                    stack.append(p)
+
+        # cycles (bad material links) never reach zero: propagate to a fixpoint
+        if done < n1:
+            work = [j for j in range(n1) if waiting[j] > 0]
+            while work:
+                j = work.pop()
+                r = reach[j] | bit.get(j, 0)
+                for p in preds[j]:
+                    if r & ~reach[p]:
+                        reach[p] |= r
+                        work.append(p)
+        return reach
+
+    def _os5_remaining(self, buf, dur):
+        """
+        Longest path to every OS5 job it leads to, per job.
+
+        Going j -> s costs buf[j] when s is the target itself, otherwise
+        buf[j] + dur[s] plus the rest of the path from s. Jobs on a cycle
+        (bad material links) get their own DFS through the cycle, which
+        drops only the edge back to a job already on that path.
+        """
+        preds, succs = self.preds, self.succs
+        n = len(preds) - 1  # row n: unknown predecessor, leads nowhere
+        is_os5 = set(self.os5_jobs)
+        rem = [None] * n
+
+        def paths_from(j):
+            d = {}
+            b = buf[j]
+            for s in succs[j]:
+                if s in is_os5 and d.get(s, -1) < b:
+                    d[s] = b
+                rs = rem[s]  # None: s is on the current path through a cycle
+                if rs:
+                    step = b + dur[s]
+                    for t, r in rs.items():
+                        v = step + r
+                        if d.get(t, -1) < v:
+                            d[t] = v
+            d.pop(j, None)  # around a cycle back to j
+            return d
+
+        # reverse topological order: a job once all its successors are done
+        waiting = [len(succs[j]) for j in range(n)]
+        order = [j for j in range(n) if waiting[j] == 0]
+        for j in order:
+            rem[j] = paths_from(j)
+            for p in preds[j]:
+                if p < n:
+                    waiting[p] -= 1
+                    if waiting[p] == 0:
+                        order.append(p)
+
+        # the rest is on or upstream of a cycle: its strongly connected
+        # components come sinks first, so everything below one is done
+        if len(order) < n:
+            left = [waiting[j] > 0 for j in range(n)]
+            for scc in _strongly_connected([j for j in range(n) if left[j]], succs, left):
+                if len(scc) == 1 and scc[0] not in succs[scc[0]]:
+                    rem[scc[0]] = paths_from(scc[0])
+                    continue
+                inside = set(scc)
+                final = {}
+                for root in scc:
+                    for j in scc:
+                        rem[j] = None
+                    # DFS postorder from root, staying inside the component
+                    seen = {root}
+                    stack = [(root, iter(succs[root]))]
+                    while stack:
+                        j, it = stack[-1]
+                        for s in it:
+                            if s in inside and s not in seen:
+                                seen.add(s)
+                                stack.append((s, iter(succs[s])))
+                                break
+                        else:
+                            stack.pop()
+                            rem[j] = paths_from(j)
+                    final[root] = rem[root]
+                for j in scc:
+                    rem[j] = final[j]
+
+        table = {}
+        for j, d in enumerate(rem):
+            for t, v in d.items():
+                table[(j, t)] = v
+        # an OS5 job on a cycle is its own predecessor, 0 minutes away
+        for t in self.os5_jobs:
+            if t in self.upstream[t]:
+                table[(t, t)] = 0
+        return table
+
+    def os5_pred_map(self, targets):
+        """
+        pred -> set of targets it is upstream of, for the given OS5 jobs.
+
+        Cached per target list (the unlocked OS5 jobs on real machines, the
+        same for every SA iteration of a run). Callers must not mutate it.
+        """
+        key = tuple(targets)
+        hit = self._os5_pred_maps.get(key)
+        if hit is None:
+            hit = {}
+            for t in targets:
+                for p in self.upstream[t]:
+                    hit.setdefault(p, set()).add(t)
+            self._os5_pred_maps[key] = hit
+        return hit
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from .scoring import static_features
+
+
+def _int_col(jobs, col, default=0):
+    if col not in jobs.columns:
+        return np.full(len(jobs), default, dtype=np.int64)
+    return pd.to_numeric(jobs[col], errors="coerce").fillna(default).astype(np.int64).to_numpy()
+
+
+def _obj_col(jobs, col):
+    if col not in jobs.columns:
+        return [None] * len(jobs)
+    return jobs[col].tolist()
+
+
+def _minute_col(jobs, col):
+    """Datetime column -> list of epoch minutes (floored), None for NaT."""
+    if col not in jobs.columns:
+        return [None] * len(jobs)
+    ts = pd.to_datetime(jobs[col], errors="coerce")
+    mins = ts.to_numpy(dtype="datetime64[m]").astype(np.int64).tolist()
+    return [m if ok else None for m, ok in zip(mins, ts.notna().tolist())]
+
+
+class JobTable:
+    """
+    Column-oriented store of the schedulable jobs (RecordType 60/115).
+
+    Built once per input set from the pre-normalized _wp/_wpU/_pg/_os/_dur/
+    _buf/_pos/_rec columns that run_scheduler_with_paths adds. Row i of every
+    column belongs to ids[i]; index maps job_id -> i. Numeric columns are
+    int64 NumPy arrays, text/timestamp columns plain lists.
+
+    ddl_min/date_start_min are the same dates as epoch minutes (None for
+    NaT), which is what the scheduler computes with; ddl/date_start keep
+    the original Timestamps for the output rows.
+
+    Rows are sorted by job_id, so the scheduler can use the row number as a
+    dense integer job id and still break ties in job_id order. Workplaces
+    are interned the same way: wp_id[i] indexes machines (sorted _wpU).
+    """
+
+    __slots__ = (
+        "ids", "index", "machines", "machine_index",
+        "wp", "wpU", "wp_id", "pg", "os", "dur", "buf", "buf_raw", "pos", "rec",
+        "ddl", "date_start", "ddl_min", "date_start_min", "eff_ddl",
+        "order_no", "order_pos", "item_no", "sort_pos", "_features",
+    )
+
+    def __init__(self, jobs: pd.DataFrame):
+        ids = jobs["job_id"].astype(str).str.strip()
+        keep = ~ids.duplicated(keep="last").to_numpy()
+        jobs, ids = jobs[keep], ids[keep]
+        order = np.argsort(ids.to_numpy(), kind="stable")
+        jobs, ids = jobs.iloc[order], ids.iloc[order]
+
+        self.ids = ids.tolist()
+        self.index = {jid: i for i, jid in enumerate(self.ids)}
+
+        self.wp = jobs["_wp"].tolist()
+        self.wpU = jobs["_wpU"].tolist()
+        self.machines = sorted(set(self.wpU))
+        self.machine_index = {wpU: m for m, wpU in enumerate(self.machines)}
+        self.wp_id = np.array([self.machine_index[w] for w in self.wpU], dtype=np.int64)
+        self.pg = jobs["_pg"].to_numpy(dtype=np.int64)
+        self.os = jobs["_os"].to_numpy(dtype=np.int64)
+        self.dur = jobs["_dur"].to_numpy(dtype=np.int64)
+        self.buf = jobs["_buf"].to_numpy(dtype=np.int64)
+        # unclipped buffer: cross-machine transfer time in earliest_start_for
+        self.buf_raw = _int_col(jobs, "buffer_min")
+        self.pos = jobs["_pos"].to_numpy(dtype=np.int64)
+        self.rec = jobs["_rec"].to_numpy(dtype=np.int64)
+
+        self.ddl = _obj_col(jobs, "effective_deadline")
+        self.date_start = _obj_col(jobs, "DateStart")
+        self.ddl_min = _minute_col(jobs, "effective_deadline")
+        self.date_start_min = _minute_col(jobs, "DateStart")
+        # "effective" deadline: a real date (year >= 2025), not a placeholder
+        self.eff_ddl = [isinstance(d, pd.Timestamp) and pd.notna(d) and d.year >= 2025 for d in self.ddl]
+
+        # pass-through columns for plan/unplaced output
+        self.order_no = _obj_col(jobs, "OrderNo")
+        self.order_pos = _obj_col(jobs, "OrderPos")
+        self.item_no = _obj_col(jobs, "ItemNo")
+        self.sort_pos = _obj_col(jobs, "SortPos")
+        self._features = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def score_features(self, now_min):
+        """Static heap_key feature matrix (scoring.static_features), cached per now."""
+        if self._features is None or self._features[0] != now_min:
+            self._features = (now_min, static_features(self, now_min))
+        return self._features[1]
+
+    def intern_graph(self, pred_sets, succ_multi):
+        """
+        job_id-keyed pred/succ sets -> tuples of row ids, indexed by row.
+
+        A predecessor that is not in the table maps to the extra id
+        len(self) (never resolved), so its successors stay blocked as
+        before; unknown successors are dropped.
+        """
+        n = len(self)
+        index = self.index
+        preds = [()] * (n + 1)
+        succs = [()] * (n + 1)
+        for i, jid in enumerate(self.ids):
+            ps = pred_sets.get(jid)
+            if ps:
+                preds[i] = tuple(sorted(index.get(p, n) for p in ps))
+            ss = succ_multi.get(jid)
+            if ss:
+                succs[i] = tuple(sorted(index[s] for s in ss if s in index))
+        return preds, succs
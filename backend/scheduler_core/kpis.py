@@ -63,6 +63,90 @@ def compute_kpis_multi(plan_df: pd.DataFrame):
     res["beyond_7d"] = (count_beyond / denom) * 100.0
     return res
 
+def plan_score(kpis) -> float:
+    """SA objective: 2*on_time + 0.8*within_2d - beyond_7d (percentages)."""
+    return (
+        2.0 * kpis.get("on_time", 0.0)
+        + 0.8 * kpis.get("within_2d", 0.0)
+        - 1.0 * kpis.get("beyond_7d", 0.0)
+    )
+
+
+class KpiCounter:
+    """
+    Running counts behind compute_kpis_multi's on_time/within_2d/beyond_7d,
+    kept by schedule() as rows are placed (start/ddl in epoch minutes, ddl
+    None = no LatestStartDate).
+
+    open is the number of rows that may still be added (set by the caller).
+    upper_bound() is the best plan_score() reachable from here: every open
+    row placed on time. The score is (a + 280 r) / (denom + r) in the number
+    r of extra on-time rows, monotone in r, so the best is at r = 0 or
+    r = open.
+    """
+
+    __slots__ = ("rows", "eff", "on", "w2", "b7", "open")
+
+    DAY_MIN = 24 * 60
+
+    def __init__(self):
+        self.rows = self.eff = self.on = self.w2 = self.b7 = self.open = 0
+
+    def copy(self):
+        c = KpiCounter()
+        c.rows, c.eff, c.on, c.w2, c.b7, c.open = self.rows, self.eff, self.on, self.w2, self.b7, self.open
+        return c
+
+    def add(self, start, ddl):
+        self.rows += 1
+        if ddl is None:
+            return
+        self.eff += 1
+        self.on += start <= ddl
+        self.w2 += start <= ddl + 2 * self.DAY_MIN
+        self.b7 += start > ddl + 7 * self.DAY_MIN
+
+    def add_frame(self, plan_df):
+        """Count the SCHEDULE_RT rows of a plan frame (e.g. the locked ops)."""
+        df = plan_df[plan_df["RecordType"].isin(SCHEDULE_RT)]
+        starts = pd.to_datetime(df["Start"], errors="coerce")
+        ddl = pd.to_datetime(df["LatestStartDate"], errors="coerce")
+        if starts.dt.tz is not None:
+            starts = starts.dt.tz_localize(None)
+        if ddl.dt.tz is not None:
+            ddl = ddl.dt.tz_localize(None)
+        eff = ddl.notna()
+        self.rows += int(len(df))
+        self.eff += int(eff.sum())
+        self.on += int((starts[eff] <= ddl[eff]).sum())
+        self.w2 += int((starts[eff] <= ddl[eff] + pd.Timedelta(days=2)).sum())
+        self.b7 += int((starts[eff] > ddl[eff] + pd.Timedelta(days=7)).sum())
+
+    def kpis(self):
+        """on_time/within_2d/beyond_7d of the rows so far, as compute_kpis_multi has them."""
+        noneff = self.rows - self.eff if INCLUDE_NON_EFFECTIVE_IN_ONTIME else 0
+        denom = self.rows if INCLUDE_NON_EFFECTIVE_IN_ONTIME else self.eff
+        if denom == 0:
+            return {"on_time": 0.0, "within_2d": 0.0, "beyond_7d": 0.0}
+        return {
+            "on_time": ((self.on + noneff) / denom) * 100.0,
+            "within_2d": ((self.w2 + noneff) / denom) * 100.0,
+            "beyond_7d": (self.b7 / denom) * 100.0,
+        }
+
+    def score(self) -> float:
+        return plan_score(self.kpis())
+
+    def upper_bound(self) -> float:
+        best = self.score()
+        if self.open > 0:
+            noneff = self.rows - self.eff if INCLUDE_NON_EFFECTIVE_IN_ONTIME else 0
+            denom = self.rows if INCLUDE_NON_EFFECTIVE_IN_ONTIME else self.eff
+            a = 100.0 * (2.0 * (self.on + noneff) + 0.8 * (self.w2 + noneff) - self.b7)
+            best = max(best, (a + 280.0 * self.open) / (denom + self.open))
+        return best
+
+
 def add_idle_time_columns(plan_df, shifts, unlimited_set):
     """Compute IdleBeforeReal/IdleBefore per machine against shift capacity."""
     if plan_df.empty:
@@ -0,0 +1,319 @@
+import numpy as np
+import pandas as pd
+
+# Calendar times are whole minutes since the Unix epoch (naive timestamps).
+NS_PER_MIN = 60_000_000_000
+
+# A start must leave at least this many minutes in its window (was GAP_TOL).
+GAP_TOL_MIN = 1
+
+
+def ts_to_min(ts) -> int:
+    """Naive Timestamp -> epoch minutes (floored, like .floor('min'))."""
+    return int(pd.Timestamp(ts).value // NS_PER_MIN)
+
+
+def min_to_ts(m):
+    """Epoch minutes -> naive Timestamp; None -> NaT."""
+    if m is None:
+        return pd.NaT
+    return pd.Timestamp(int(m) * NS_PER_MIN)
+
+
+class MachineCalendar:
+    """
+    Shift windows of one workplace as int64 epoch-minute arrays.
+
+    start/end are the (sorted, non-overlapping) windows, cursor is the first
+    free minute inside each window. All query methods take and return epoch
+    minutes; None means "no feasible time" (NaT in the old DataFrame code).
+
+    cap is a prefix sum over free window minutes (cap[j] = free minutes in
+    windows < j), kept in sync whenever a cursor moves, so duration and
+    capacity queries are binary searches instead of window-by-window walks.
+
+    version counts mutations (placements, subtracts), so callers can key
+    memoized previews on (machine, version) instead of on cursor values.
+    """
+
+    __slots__ = ("start", "end", "cursor", "cap", "version")
+
+    def __init__(self, start, end, cursor=None):
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        if cursor is None:
+            cursor = self.start.copy()
+        self.cursor = np.asarray(cursor, dtype=np.int64)
+        self.version = 0
+        self._rebuild_cap()
+
+    @classmethod
+    def from_frame(cls, wdf):
+        """Build from a build_windows() frame (columns start/end[/cursor])."""
+        if wdf is None or len(wdf) == 0:
+            return cls(np.empty(0, np.int64), np.empty(0, np.int64))
+        start = wdf["start"].to_numpy(dtype="datetime64[m]").astype(np.int64)
+        end = wdf["end"].to_numpy(dtype="datetime64[m]").astype(np.int64)
+        cal = cls(start, end)
+        keep = cal.end > cal.start
+        if not keep.all():
+            cal = cls(cal.start[keep], cal.end[keep])
+        return cal
+
+    def copy(self):
+        """Independent calendar with the same windows, cursors and version."""
+        c = MachineCalendar.__new__(MachineCalendar)
+        c.start = self.start  # windows are never mutated in place
+        c.end = self.end
+        c.cursor = self.cursor.copy()
+        c.cap = self.cap.copy()
+        c.version = self.version
+        return c
+
+    def __len__(self):
+        return len(self.start)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.start) == 0
+
+    def _first_ending_after(self, idx0, t) -> int:
+        """First window index >= idx0 whose end is strictly after t."""
+        return max(idx0, int(np.searchsorted(self.end, t, side="right")))
+
+    # ---------- capacity index ----------
+
+    def _rebuild_cap(self):
+        self.version += 1
+        cap = np.zeros(len(self.start) + 1, dtype=np.int64)
+        np.cumsum(self.end - self.cursor, out=cap[1:])
+        self.cap = cap
+
+    def _cursors_moved(self, lo, hi):
+        """Re-sync cap after cursors of windows [lo, hi) advanced."""
+        if hi <= lo:
+            return
+        self.version += 1
+        old_free = self.cap[lo + 1:hi + 1] - self.cap[lo:hi]
+        new_free = self.end[lo:hi] - self.cursor[lo:hi]
+        shrink = np.cumsum(old_free - new_free)
+        self.cap[lo + 1:hi + 1] -= shrink
+        self.cap[hi + 1:] -= shrink[-1]
+
+    def _free_before(self, idx0, t) -> int:
+        """Free minutes in windows >= idx0 that lie before t."""
+        n = len(self.start)
+        j = self._first_ending_after(idx0, t)
+        total = int(self.cap[j] - self.cap[idx0])
+        if j < n:
+            total += max(0, t - int(self.cursor[j]))
+        return total
+
+    def capacity_between(self, idx0, t0, t1) -> int:
+        """Free (uncursored) minutes in [t0, t1) from window idx0 on."""
+        if t1 <= t0 or idx0 >= len(self.start):
+            return 0
+        return self._free_before(idx0, t1) - self._free_before(idx0, t0)
+
+    # ---------- non-mutating queries ----------
+
+    def first_feasible_start(self, idx0, est):
+        """Earliest PG0/1 start >= est that leaves GAP_TOL_MIN in its window."""
+        n = len(self.start)
+        for j in range(self._first_ending_after(idx0, est), n):
+            st = max(int(self.start[j]), int(self.cursor[j]), est)
+            if st + GAP_TOL_MIN <= self.end[j]:
+                return st
+        return None
+
+    def preview_end_pg01(self, idx0, est, dur_min):
+        """End time if a PG0/1 op of dur_min started at est (no mutation)."""
+        if len(self.start) == 0:
+            return None
+        if dur_min <= 0:
+            return est
+
+        n = len(self.start)
+        idx = self._first_ending_after(idx0, est)
+        if idx >= n:
+            return None
+
+        # partial first window, then whole free windows via the prefix sums
+        s = max(int(self.cursor[idx]), est)
+        first = int(self.end[idx]) - s
+        if first >= dur_min:
+            return s + int(dur_min)
+
+        target = int(self.cap[idx + 1]) + int(dur_min) - max(0, first)
+        if target > self.cap[n]:
+            return None
+        k = int(np.searchsorted(self.cap, target, side="left")) - 1
+        return int(self.cursor[k]) + (target - int(self.cap[k]))
+
+    def preview_zero_duration(self, idx0, est):
+        n = len(self.start)
+        for j in range(idx0, n):
+            t = max(est, int(self.start[j]), int(self.cursor[j]))
+            if t <= self.end[j]:
+                return t
+        return None
+
+    def feasible_pg01(self, idx0, est) -> bool:
+        n = len(self.start)
+        for j in range(idx0, n):
+            if max(int(self.cursor[j]), est) + GAP_TOL_MIN <= self.end[j]:
+                return True
+        return False
+
+    def feasible_pg2(self, est) -> bool:
+        return len(self.end) > 0 and est < self.end[-1]
+
+    def feasible_zero_duration(self, idx0, est) -> bool:
+        return idx0 < len(self.end) and est <= self.end[-1]
+
+    def place_pg2(self, est, dur_min, idx0=0):
+        """
+        Shift-bound placement ignoring cursors (unlimited capacity).
+        Returns (start, end) or (None, None).
+        """
+        n = len(self.start)
+        j = self._first_ending_after(idx0, est)
+        if j >= n:
+            return None, None
+
+        start0 = max(est, int(self.start[j]))
+        if start0 >= self.end[j]:
+            return None, None
+        if dur_min <= 0:
+            return start0, start0
+
+        remain = int(dur_min)
+        curr = start0
+        while j < n and remain > 0:
+            we = int(self.end[j])
+            s = max(int(self.start[j]), curr)
+            if s < we:
+                take = min(remain, we - s)
+                curr = s + take
+                remain -= take
+            if remain > 0:
+                j += 1
+
+        if remain > 0:
+            return None, None
+        return start0, curr
+
+    # ---------- mutating placement ----------
+
+    def place_zero_duration(self, idx0, est):
+        n = len(self.start)
+        for j in range(idx0, n):
+            cur = int(self.cursor[j])
+            t = max(est, int(self.start[j]), cur)
+            if t <= self.end[j]:
+                if t > cur:
+                    self.cursor[j] = t
+                    self._cursors_moved(j, j + 1)
+                return t
+        return None
+
+    def place_pg01(self, idx0, est, dur_min):
+        """
+        Consume dur_min minutes of capacity from est on, advancing cursors.
+        Returns (start, end, new_idx); start/end are None if nothing fit.
+        """
+        n = len(self.start)
+        idx = self._first_ending_after(idx0, est)
+        lo = idx
+        remain = int(dur_min)
+        curr = est
+        first = last = None
+        while idx < n and remain > 0:
+            we = int(self.end[idx])
+            s = max(int(self.start[idx]), int(self.cursor[idx]), curr)
+            if s >= we:
+                idx += 1
+                continue
+            take = min(remain, we - s)
+            e = s + take
+            self.cursor[idx] = e
+            if first is None:
+                first = s
+            last = e
+            remain -= take
+            curr = e
+            if remain > 0 and e >= we:
+                idx += 1
+        self._cursors_moved(lo, min(idx + 1, n))
+        new_idx = min(idx, n - 1) if n > 0 else 0
+        return first, last, new_idx
+
+    def subtract(self, a, b):
+        """
+        Remove [a, b) from the windows (used for locked ops before placing).
+        0-duration or open intervals do not eat capacity.
+        """
+        if a is None or b is None or b <= a:
+            return
+        s, e = self.start, self.end
+        hit = (e > a) & (s < b)
+        if not hit.any():
+            return
+        left = hit & (s < a)
+        right = hit & (b < e)
+        keep = ~hit
+        new_s = np.concatenate([s[keep], s[left], np.full(int(right.sum()), b, np.int64)])
+        new_e = np.concatenate([e[keep], np.full(int(left.sum()), a, np.int64), e[right]])
+        order = np.argsort(new_s, kind="stable")
+        new_s, new_e = new_s[order], new_e[order]
+        ok = new_e > new_s
+        self.start = new_s[ok]
+        self.end = new_e[ok]
+        self.cursor = self.start.copy()
+        self._rebuild_cap()
+
+    def subtract_many(self, a, b):
+        """
+        Remove every [a[i], b[i]) at once, same result as calling subtract()
+        per interval: the locks are merged into a sorted union and the
+        windows are intersected with the gaps between them in one sweep.
+        """
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        ok = b > a
+        a, b = a[ok], b[ok]
+        if len(a) == 0 or len(self.start) == 0:
+            return
+        order = np.argsort(a, kind="stable")
+        a, b = a[order], b[order]
+
+        # merge overlapping/touching locks
+        reach = np.maximum.accumulate(b)
+        head = np.ones(len(a), dtype=bool)
+        head[1:] = a[1:] > reach[:-1]
+        lock_s = a[head]
+        lock_e = np.maximum.reduceat(b, np.flatnonzero(head))
+
+        s, e = self.start, self.end
+        if not ((e > lock_s[0]) & (s < lock_e[-1])).any():
+            return
+
+        # free gaps around the merged locks: [gap_s[k], gap_e[k])
+        lo, hi = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+        gap_s = np.concatenate([[lo], lock_e])
+        gap_e = np.concatenate([lock_s, [hi]])
+
+        # gaps overlapping window i: k0[i] .. k1[i]
+        k0 = np.searchsorted(gap_e, s, side="right")
+        k1 = np.searchsorted(gap_s, e, side="left") - 1
+        cnt = np.maximum(0, k1 - k0 + 1)
+        win = np.repeat(np.arange(len(s)), cnt)
+        gap = np.repeat(k0, cnt) + (np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt))
+
+        new_s = np.maximum(s[win], gap_s[gap])
+        new_e = np.minimum(e[win], gap_e[gap])
+        keep = new_e > new_s
+        self.start = new_s[keep]
+        self.end = new_e[keep]
+        self.cursor = self.start.copy()
+        self._rebuild_cap()
@@ -0,0 +1,77 @@
+import multiprocessing as mp
+import random
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Worker-side state: the compiled problem and the fixed run_once() inputs.
+# Set once per worker by _init (inherited without copying under fork).
+_W = {}
+
+
+def _init(state, cancel_event):
+    _W.update(state)
+    _W["cancel"] = cancel_event
+
+
+def _evaluate(cur_w, step_scale, seed, abort_below):
+    """Jitter cur_w with a candidate-seeded RNG and run one pass on it."""
+    cand_w = _W["jitter"](cur_w, step_scale, rng=random.Random(seed))
+    stats = {}
+    plan, late, unplaced, sc, _ = _W["run_once"](
+        None, _W["shifts"], _W["unlimited"], _W["outsourcing"], cand_w,
+        now_ts=_W["now_ts"], cancel_check=_W["cancel"].is_set, is_first_run=False,
+        cache_stats=stats, problem=_W["problem"], abort_below=abort_below,
+    )
+    return cand_w, plan, late, unplaced, sc, stats
+
+
+class SAPool:
+    """
+    Process pool that scores a batch of SA candidates at once.
+
+    state holds what every pass shares (problem, shifts, unlimited,
+    outsourcing, now_ts, and the run_once/jitter functions); it is handed to
+    each worker once at start-up, forked where the platform allows. A
+    candidate is identified by its seed, so results do not depend on which
+    worker ran it. Cancellation is polled in the parent and forwarded to
+    the workers through an Event their schedule() calls check.
+    """
+
+    POLL_S = 0.5
+
+    def __init__(self, workers, state):
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+        self.cancel_event = ctx.Event()
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx, initializer=_init, initargs=(state, self.cancel_event),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def evaluate(self, tasks, step_scale, cancel_check=None, abort_below=None):
+        """
+        Score one candidate per (cur_w, seed) task: a list of
+        (cand_w, plan, late, unplaced, score, cache_stats) in task order,
+        or None if the run was cancelled meanwhile. With abort_below, a
+        candidate cut short by run_once has plan None and its bound as score.
+        """
+        futs = [self.pool.submit(_evaluate, w, step_scale, s, abort_below) for w, s in tasks]
+        pending = set(futs)
+        while pending:
+            _, pending = wait(pending, timeout=self.POLL_S, return_when=FIRST_COMPLETED)
+            if cancel_check and cancel_check():
+                self.cancel_event.set()
+                for f in pending:
+                    f.cancel()
+                return None
+        results = [f.result() for f in futs]
+        if any(r[4] is None for r in results):
+            return None
+        return results
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from .config import GRACE_DAYS, INDUSTRIAL_FACTOR
+
+
+class PlanBuffer:
+    """
+    Ops placed by one schedule() call, kept as typed columns.
+
+    Only what is decided at placement time is stored (job row, start/end in
+    epoch minutes, reason text); everything else in a plan row is a column
+    of the JobTable and is gathered once in frame(). Arrays grow by doubling.
+    """
+
+    __slots__ = ("jid", "start", "end", "reason", "n")
+
+    def __init__(self, capacity=256):
+        self.jid = np.empty(capacity, dtype=np.int64)
+        self.start = np.empty(capacity, dtype=np.int64)
+        self.end = np.empty(capacity, dtype=np.int64)
+        self.reason = np.empty(capacity, dtype=object)
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def append(self, jid, start, end, reason):
+        i = self.n
+        if i == len(self.jid):
+            self._grow()
+        self.jid[i] = jid
+        self.start[i] = start
+        self.end[i] = end
+        self.reason[i] = reason
+        self.n = i + 1
+
+    def _grow(self):
+        cap = 2 * len(self.jid)
+        for name in ("jid", "start", "end", "reason"):
+            old = getattr(self, name)
+            new = np.empty(cap, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def frame(self, jt, is_outs_m) -> pd.DataFrame:
+        """Plan rows (same columns/order as the old per-row dicts)."""
+        n = self.n
+        if n == 0:
+            return pd.DataFrame()
+        j = self.jid[:n]
+        jl = j.tolist()
+        start, end = self.start[:n], self.end[:n]
+
+        ddl_min = [jt.ddl_min[i] for i in jl]
+        has_ddl = np.array([d is not None for d in ddl_min])
+        ddl = np.array([d if d is not None else 0 for d in ddl_min], dtype=np.int64)
+        grace = GRACE_DAYS * 24 * 60
+        before_lsd = np.where(has_ddl, start <= ddl, pd.NA).astype(object)
+        within_grace = np.where(has_ddl, start <= ddl + grace, pd.NA).astype(object)
+
+        pg = jt.pg[j]
+        os_ = jt.os[j]
+        outs = np.asarray(is_outs_m, dtype=bool)[jt.wp_id[j]]
+        delivery = [
+            jt.date_start[i] if o and s > 3 and jt.date_start_min[i] is not None else pd.NaT
+            for i, o, s in zip(jl, outs.tolist(), os_.tolist())
+        ]
+        buf = jt.buf[j]
+        dur = jt.dur[j]
+
+        return pd.DataFrame({
+            "job_id": [jt.ids[i] for i in jl],
+            "OrderNo": [jt.order_no[i] for i in jl],
+            "OrderPos": [jt.order_pos[i] for i in jl],
+            "Orderstate": os_,
+            "ItemNo": [jt.item_no[i] for i in jl],
+            "SortPos": pd.to_numeric([jt.sort_pos[i] for i in jl], errors="coerce"),
+            "WorkPlaceNo": [jt.wp[i] for i in jl],
+            "Start": pd.to_datetime(start, unit="m"),
+            "End": pd.to_datetime(end, unit="m"),
+            "Duration": dur,
+            "LatestStartDate": pd.to_datetime(
+                [jt.ddl[i] if d is not None else pd.NaT for i, d in zip(jl, ddl_min)]),
+            "StartsBeforeLSD": before_lsd,
+            "WithinGraceDays": within_grace,
+            "PriorityGroup": pg,
+            "IsUnlimitedMachine": pg == 2,
+            "IsOutsourcing": outs,
+            "OutsourcingDelivery": pd.to_datetime(delivery),
+            "BufferIndustrial": np.round(buf / INDUSTRIAL_FACTOR).astype(np.int64),
+            "BufferReal": buf,
+            "ReasonSelected": self.reason[:n],
+            "DurationReal": dur,
+            "RecordType": jt.rec[j],
+        })
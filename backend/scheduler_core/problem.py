@@ -0,0 +1,257 @@
+import numpy as np
+import pandas as pd
+
+from .windows import build_windows
+from .machine_calendar import MachineCalendar, ts_to_min
+from .jobtable import JobTable
+from .job_graph import JobGraph
+from .kpis import KpiCounter
+from .ready_index import CLS_PLAIN, CLS_NONEFF, CLS_NODDL, bucket_of
+
+
+def to_int(v, default=0):
+    x = pd.to_numeric(v, errors="coerce")
+    return int(default if pd.isna(x) else x)
+
+
+def to_min(v):
+    """Datetime-like -> epoch minutes (floored); None for NaT/None."""
+    if v is None or pd.isna(v):
+        return None
+    return ts_to_min(v)
+
+
+def _to_naive_utc(x):
+    """
+    Normalize any datetime-like to tz-naive Timestamp.
+    - If input has timezone (e.g. '...Z'), convert to UTC and drop tz.
+    - If input is naive already, keep as-is.
+    """
+    ts = pd.to_datetime(x, errors="coerce", utc=True)
+    if pd.isna(ts):
+        return ts
+    return ts.tz_convert(None)
+
+
+class Problem:
+    """
+    The weight-independent part of a schedule() call, compiled once per run.
+
+    Holds the job table and graph, the shift calendars with the frozen
+    (locked) intervals already cut out, per-machine flags, the pinned
+    starts, the locked ops (as plan rows, as (job, machine, end) and as KPI
+    counts) and the per-job ready buckets. Every SA iteration reuses it; schedule() only
+    copies the calendars and the OS5 target sets, which it mutates.
+    """
+
+    __slots__ = (
+        "jt", "graph", "now_m", "earliest_global_m", "freeze_until_m", "freeze_pg2",
+        "calendars", "cal_machines", "first_wp_m", "is_outs_m", "bad_wp_m",
+        "locked", "locked_part", "locked_rows", "locked_kpi", "pin_of", "os5_targets_by_wp", "ready_bucket",
+    )
+
+    def fresh_calendars(self):
+        return [c.copy() if c is not None else None for c in self.calendars]
+
+
+def _normalize_locks(locked_ops):
+    """Clean copy of the locked ops (valid Start/End), or None."""
+    if locked_ops is None or len(locked_ops) == 0:
+        return None
+    locked_df = locked_ops.copy()
+
+    # Ensure columns exist (matches your plan.csv columns)
+    needed = ["job_id", "WorkPlaceNo", "Start", "End"]
+    if not all(c in locked_df.columns for c in needed):
+        print(f"[FREEZE] locked_ops missing columns; skipping locks. Have={list(locked_df.columns)}")
+        return None
+
+    locked_df["job_id"] = locked_df["job_id"].astype(str).str.strip()
+    locked_df["WorkPlaceNo"] = locked_df["WorkPlaceNo"].astype(str).str.strip()
+    locked_df["Start"] = pd.to_datetime(locked_df["Start"], errors="coerce")
+    locked_df["End"] = pd.to_datetime(locked_df["End"], errors="coerce")
+
+    if "Duration" in locked_df.columns:
+        dur0 = pd.to_numeric(locked_df["Duration"], errors="coerce").fillna(0).astype(int).eq(0)
+        m = dur0 & locked_df["Start"].notna() & locked_df["End"].isna()
+        locked_df.loc[m, "End"] = locked_df.loc[m, "Start"]
+
+        # If End missing but Start exists (even without Duration), assume instantaneous lock
+    m2 = locked_df["Start"].notna() & locked_df["End"].isna()
+    locked_df.loc[m2, "End"] = locked_df.loc[m2, "Start"]
+
+    before = len(locked_df)
+
+    bad_start = locked_df["Start"].isna().sum()
+    bad_end = locked_df["End"].isna().sum()
+    bad_order = (locked_df["End"] < locked_df["Start"]).sum()
+
+    print(f"[FREEZE-DBG] locked_ops rows={before} bad_start={bad_start} bad_end={bad_end} end<start={bad_order}")
+
+    return locked_df[
+        locked_df["Start"].notna()
+        & locked_df["End"].notna()
+        & (locked_df["End"] >= locked_df["Start"])  # <-- allow 0 duration
+        ].copy()
+
+
+def _subtract_locks(wins, locked_df, jt, freeze_pg2):
+    """Cut the locked intervals out of the calendars, one sweep per machine."""
+    locked_df_cap = locked_df
+    if "PriorityGroup" in locked_df_cap.columns:
+        allowed = [0, 1] + ([2] if freeze_pg2 else [])
+        locked_df_cap = locked_df_cap[
+            locked_df_cap["PriorityGroup"].apply(lambda x: to_int(x, 2)).isin(allowed)
+        ]
+
+    locked_df_cap = locked_df_cap[locked_df_cap["Start"].notna() & locked_df_cap["End"].notna()]
+    if len(locked_df_cap) == 0:
+        return
+    lock_m = locked_df_cap["WorkPlaceNo"].astype(str).str.strip().str.upper().map(jt.machine_index)
+    lock_a = locked_df_cap["Start"].to_numpy(dtype="datetime64[m]").astype(np.int64)
+    lock_b = locked_df_cap["End"].to_numpy(dtype="datetime64[m]").astype(np.int64)
+    for m, rows in pd.Series(np.arange(len(lock_m))).groupby(lock_m.to_numpy(), sort=False):
+        m = int(m)
+        if wins[m] is None:
+            continue
+        rows = rows.to_numpy()
+        wins[m].subtract_many(lock_a[rows], lock_b[rows])
+
+
+def _locked_plan_rows(locked_df, jt):
+    """
+    Locked ops that map to a known job on a real workplace: the plan rows
+    they contribute (column-wise, plan schema) and (job, machine, end) per op.
+    """
+    lk = locked_df
+    lk_ids = lk["job_id"].astype(str).str.strip()
+    lk_wp = lk["WorkPlaceNo"].astype(str).str.strip()
+    lk_jid = lk_ids.map(jt.index)
+    known = lk_jid.notna()
+    good_wp = lk_wp.ne("") & lk_wp.str.upper().ne("TBA")
+    for jid_s in lk_ids[~known]:
+        print(f"[FREEZE-DBG] lock jid not in jobs -> skipping: {jid_s}")
+    for jid_s, wp in zip(lk_ids[known & ~good_wp], lk_wp[known & ~good_wp]):
+        print(f"[FREEZE-DBG] lock has bad wp -> skipping: jid={jid_s} wp={wp}")
+
+    keep = (known & good_wp).to_numpy()
+    lk, lk_ids, lk_wp = lk[keep], lk_ids[keep], lk_wp[keep]
+    n_lk = len(lk)
+    if n_lk == 0:
+        return None, []
+
+    def lk_col(name, default=None):
+        return lk[name] if name in lk.columns else pd.Series([default] * n_lk, index=lk.index, dtype=object)
+
+    def lk_int(name, default, nonneg=False):
+        v = pd.to_numeric(lk_col(name), errors="coerce").fillna(default).astype(int)
+        return v.clip(lower=0) if nonneg else v
+
+    dur_src = "Duration" if "Duration" in lk.columns else "DurationReal"
+    ddl_src = "LatestStartDate" if "LatestStartDate" in lk.columns else "effective_deadline"
+    part = pd.DataFrame({
+        "job_id": lk_ids,
+        "OrderNo": lk_col("OrderNo"),
+        "OrderPos": lk_col("OrderPos"),
+        "Orderstate": lk_int("Orderstate", 0),
+        "ItemNo": lk_col("ItemNo", np.nan),
+        "SortPos": pd.to_numeric(lk_col("SortPos"), errors="coerce"),
+        "WorkPlaceNo": lk_wp,
+        "Start": lk["Start"],
+        "End": lk["End"],
+        "Duration": lk_int(dur_src, 0, nonneg=True),
+        "LatestStartDate": pd.to_datetime(lk_col(ddl_src), errors="coerce", format="mixed"),
+        "StartsBeforeLSD": lk_col("StartsBeforeLSD", pd.NA),
+        "WithinGraceDays": lk_col("WithinGraceDays", pd.NA),
+        "PriorityGroup": lk_int("PriorityGroup", 2),
+        "IsUnlimitedMachine": [bool(v) for v in lk_col("IsUnlimitedMachine", False)],
+        "IsOutsourcing": [bool(v) for v in lk_col("IsOutsourcing", False)],
+        "OutsourcingDelivery": lk_col("OutsourcingDelivery", pd.NaT),
+        "BufferIndustrial": lk_int("BufferIndustrial", 0),
+        "BufferReal": lk_int("BufferReal", 0),
+        "ReasonSelected": lk_col("ReasonSelected", "FROZEN"),
+        "DurationReal": lk["DurationReal"] if "DurationReal" in lk.columns else lk_int("Duration", 0, nonneg=True),
+        "RecordType": lk_int("RecordType", 0),
+    }).reset_index(drop=True)
+
+    lk_end = lk["End"].to_numpy(dtype="datetime64[m]").astype(np.int64).tolist()
+    lk_m = [jt.machine_index.get(w) for w in lk_wp.str.upper()]
+    rows = list(zip(lk_jid[keep].astype(int).tolist(), lk_m, lk_end))
+    return part, rows
+
+
+def compile_problem(jobs, shifts, pred_sets, succ_multi, outsourcing_set, now_ts, locked_ops=None,
+                    freeze_until=None, freeze_pg2=False, pinned_starts=None, job_table=None, job_graph=None):
+    """Build the Problem for one input set (see schedule() for the arguments)."""
+    p = Problem()
+    jt = p.jt = job_table if job_table is not None else JobTable(jobs)
+    p.graph = job_graph if job_graph is not None else JobGraph(jt, pred_sets, succ_multi)
+    n_jobs = len(jt)
+    machines = jt.machines
+    n_mach = len(machines)
+
+    windows_by_wp, earliest_global, first_by_wp = build_windows(shifts, now_ts)
+    p.now_m = ts_to_min(now_ts)
+    p.earliest_global_m = ts_to_min(earliest_global)
+    p.freeze_until_m = to_min(freeze_until)
+    p.freeze_pg2 = freeze_pg2
+
+    pinned = {str(k).strip(): _to_naive_utc(v) for k, v in (pinned_starts or {}).items()}
+    p.pin_of = {jt.index[k]: to_min(v) for k, v in pinned.items() if k in jt.index}
+
+    # FREEZE HORIZON ENFORCEMENT
+    locked_df = _normalize_locks(locked_ops)
+    p.locked = bytearray(n_jobs + 1)
+    if locked_df is not None:
+        locked_ids = set(locked_df["job_id"].tolist())
+        for k in locked_ids:
+            if k in jt.index:
+                p.locked[jt.index[k]] = 1
+        print(f"[FREEZE] Applying locks: {len(locked_ids)} ops")
+
+    # windows live in array-backed calendars (epoch minutes), one per machine
+    # number; machines without shifts have None
+    wins_by_name = {str(wp).strip().upper(): df for wp, df in windows_by_wp.items()}
+    wins = [None] * n_mach
+    for m, name in enumerate(machines):
+        if name in wins_by_name:
+            wins[m] = MachineCalendar.from_frame(wins_by_name[name])
+    if locked_df is not None and len(locked_df) > 0:
+        _subtract_locks(wins, locked_df, jt, freeze_pg2)
+    p.calendars = wins
+    p.cal_machines = [m for m in range(n_mach) if wins[m] is not None]
+
+    # per-machine flags
+    outsourcing_upper = {str(x).strip().upper() for x in outsourcing_set}
+    p.is_outs_m = [name in outsourcing_upper for name in machines]
+    p.bad_wp_m = [(not name) or name == "TBA" for name in machines]
+    p.first_wp_m = [to_min(first_by_wp.get(name)) for name in machines]
+
+    if locked_df is not None and len(locked_df) > 0:
+        p.locked_part, p.locked_rows = _locked_plan_rows(locked_df, jt)
+    else:
+        p.locked_part, p.locked_rows = None, []
+    p.locked_kpi = KpiCounter()
+    if p.locked_part is not None:
+        p.locked_kpi.add_frame(p.locked_part)
+
+    # unlocked OS5 jobs per real machine
+    os5_targets = [[] for _ in range(n_mach)]
+    wp_id, os_ = jt.wp_id.tolist(), jt.os.tolist()
+    for jid in range(n_jobs):
+        if os_[jid] == 5 and not p.locked[jid] and not p.bad_wp_m[wp_id[jid]]:
+            os5_targets[wp_id[jid]].append(jid)
+    p.os5_targets_by_wp = [tuple(t) for t in os5_targets]
+
+    # ReadyIndex bucket per job (filter class x zero duration)
+    bucket = []
+    for pg, eff, ddl, dur in zip(jt.pg.tolist(), jt.eff_ddl, jt.ddl_min, jt.dur.tolist()):
+        if pg not in (0, 1) or eff:
+            cls = CLS_PLAIN
+        elif ddl is None:
+            cls = CLS_NODDL
+        else:
+            cls = CLS_NONEFF
+        bucket.append(bucket_of(cls, dur == 0))
+    p.ready_bucket = bucket
+    return p
@@ -0,0 +1,116 @@
+from heapq import heappush, heappop
+
+# Buckets split ready jobs by the filters the gap-fill/fallback picks apply
+# (see bucket_of) and by zero vs positive duration, which use different
+# feasibility previews.
+CLS_PLAIN = 0    # never filtered
+CLS_NONEFF = 1   # PG0/1 with a placeholder (non-effective) deadline
+CLS_NODDL = 2    # PG0/1 without any deadline
+N_BUCKETS = 6
+
+
+def bucket_of(cls, zero_dur) -> int:
+    return 2 * cls + (1 if zero_dur else 0)
+
+
+class ReadyIndex:
+    """
+    Ready jobs of one machine, ordered for the (st_feas, score, jid) picks.
+
+    est and score of a ready job are static (all preds are resolved), and for
+    a given calendar state st_feas = feas(est) is the least feasible start
+    >= est: monotone in est, and equal to the machine's free point
+    P = feas(-inf) for every est <= P. So each bucket keeps
+
+      wait  - heap of (est, score, jid), jobs with est > P (as last seen)
+      avail - heap of (score, jid), jobs with est <= P, all starting at P
+
+    P only moves forward (cursors and wp_ptr never go back), so a job never
+    returns from avail to wait. Placed/dropped jobs are skipped lazily via
+    alive(jid). score may be any orderable value (the zero gate uses a
+    (-pos, score) tuple).
+    """
+
+    __slots__ = ("wait", "avail")
+
+    def __init__(self, n_buckets=N_BUCKETS):
+        self.wait = [[] for _ in range(n_buckets)]
+        self.avail = [[] for _ in range(n_buckets)]
+
+    def push(self, bucket, est, score, jid):
+        heappush(self.wait[bucket], (est, score, jid))
+
+    def best(self, buckets, feas, alive, ok):
+        """
+        Best (st, score, jid) over the given buckets, or None.
+
+        feas(est) -> first feasible start >= est (None if there is none),
+        ok(st, jid) -> extra per-candidate check (OS5 lock). Candidates are
+        visited in (st, score, jid) order, so the first one passing ok wins.
+        """
+        free = feas(0)  # epoch 0 precedes every est
+        if free is None:
+            return None
+
+        wait, avail = self.wait, self.avail
+        for b in buckets:
+            w = wait[b]
+            while w and w[0][0] <= free:
+                _, score, jid = heappop(w)
+                if alive(jid):
+                    heappush(avail[b], (score, jid))
+
+        # everything in avail starts at the free point
+        res = None
+        held = []
+        while True:
+            top = None
+            for b in buckets:
+                a = avail[b]
+                while a and not alive(a[0][1]):
+                    heappop(a)
+                if a and (top is None or a[0] < avail[top][0]):
+                    top = b
+            if top is None:
+                break
+            score, jid = avail[top][0]
+            if ok(free, jid):
+                res = (free, score, jid)
+                break
+            held.append((top, heappop(avail[top])))
+        for b, e in held:
+            heappush(avail[b], e)
+        if res is not None:
+            return res
+
+        # later starts: take waiting jobs group by group of equal st_feas
+        held = []
+        while res is None:
+            e_min = None
+            for b in buckets:
+                w = wait[b]
+                while w and not alive(w[0][2]):
+                    heappop(w)
+                if w and (e_min is None or w[0][0] < e_min):
+                    e_min = w[0][0]
+            if e_min is None:
+                break
+            st = feas(e_min)
+            if st is None:
+                break
+            group = []
+            for b in buckets:
+                w = wait[b]
+                while w and w[0][0] <= st:
+                    e = heappop(w)
+                    if alive(e[2]):
+                        held.append((b, e))
+                        group.append((e[1], e[2]))
+            group.sort()
+            for score, jid in group:
+                if ok(st, jid):
+                    res = (st, score, jid)
+                    break
+        for b, e in held:
+            heappush(wait[b], e)
+        return res
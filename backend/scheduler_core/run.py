@@ -1,3 +1,4 @@
+import itertools
 import math
 import random
 from pathlib import Path
@@ -15,20 +16,51 @@ from .config import (
     SA_COOLING,
     SA_STEP_SCALE,
     SA_SEED,
+    SA_WORKERS,
+    SA_CHAINS,
+    SA_TEMP_RATIO,
+    SA_SWAP_EVERY,
+    SA_TIME_BUDGET_S,
+    SA_BUDGET_MAX_ITERS,
+    SA_STALL_WINDOW,
+    SA_MIN_IMPROVEMENT,
+    SA_WARM_START,
+    SA_WARM_SIBLINGS,
+    SA_WARM_MAX_SIBLINGS,
+    SA_EARLY_ABORT,
     INDUSTRIAL_FACTOR,
     SCHEDULE_RT,
 )
 from .io import load_cleaned_inputs
 from .precedence import build_dependency_graph
-from .scheduler import schedule
+from .scheduler import schedule, ScheduleAborted
+from .jobtable import JobTable
+from .job_graph import JobGraph
+from .problem import compile_problem
+from .parallel_sa import SAPool
+from .sa_budget import SABudget
+from .warm_start import warm_start_candidates
+from .run_cache import run_key, find_cached_run
+from .sa_checkpoint import (
+    BEST_PLAN_FILE,
+    clear_checkpoint,
+    load_best_plan,
+    load_checkpoint,
+    mark_cancelled,
+    rng_state_from_json,
+    rng_state_to_json,
+    save_best_plan,
+    save_checkpoint,
+)
+from .bounded_cache import merge_stats
 from .orders import make_orders_delivery_csv
-from .kpis import compute_kpis_multi, add_idle_time_columns
+from .kpis import compute_kpis_multi, add_idle_time_columns, plan_score
 from .report import write_summary
 from .scenario_config import load_scenario_config, scenario_now
 
 
 # Cancel / state flags (module at backend/scheduler_state.py)
-from scheduler_state import cancel_flag, active_jobs
+from scheduler_state import cancel_flag, active_jobs, best_so_far, run_cache
 
 def _iso(ts):
     if ts is None:
@@ -71,12 +103,81 @@ def df_to_json_records_safe(df: pd.DataFrame):
     return out.to_dict(orient="records")
 
 
+BEST_SO_FAR_FILE = "best_so_far.json"
+BEST_SO_FAR_ROWS_PREFIX = "best_so_far_rows_"  # + publish stamp + .pkl
+
+
+def publish_best_so_far(scenario_name, run_dir, plan, late, unplaced, score, weights, source):
+    """
+    Publish the current best plan of a running scenario: score, KPIs and
+    counts go to run_dir/best_so_far.json (small, polled by the UI), the
+    plan/unplaced rows to a pickle only turned into JSON when a client asks
+    for them (read_best_so_far). Every publish writes its own rows file
+    before the JSON that names it, so a reader never pairs one best's score
+    with another's rows; the JSON is replaced atomically and
+    best_so_far[scenario] points at it.
+    """
+    run_dir = Path(run_dir)
+    path = run_dir / BEST_SO_FAR_FILE
+    now = datetime.now()
+    rows_file = f"{BEST_SO_FAR_ROWS_PREFIX}{now.strftime('%Y%m%d_%H%M%S_%f')}.pkl"
+    rows_tmp = run_dir / (rows_file + ".tmp")
+    pd.to_pickle((plan, unplaced), rows_tmp)
+    rows_tmp.replace(run_dir / rows_file)
+    updated_at = now.strftime("%Y-%m-%dT%H:%M:%S")
+    payload = {
+        "scenario": scenario_name,
+        "run_dir": str(run_dir),
+        "updated_at": updated_at,
+        "source": source,
+        "plan_score": float(score),
+        "kpis": compute_kpis_multi(plan),
+        "weights": weights,
+        "n_plan": int(len(plan)),
+        "n_late": int(len(late)),
+        "n_unplaced": int(len(unplaced)),
+        "rows_file": rows_file,
+    }
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload, default=str), encoding="utf-8")
+    tmp.replace(path)
+    # keep the previous rows too: a reader may have just loaded the old JSON
+    for old in sorted(run_dir.glob(f"{BEST_SO_FAR_ROWS_PREFIX}*.pkl"))[:-2]:
+        old.unlink(missing_ok=True)
+    best_so_far[scenario_name] = {
+        "path": str(path), "plan_score": float(score), "source": source, "updated_at": updated_at,
+    }
+    print(f"[BEST] {scenario_name}: published score {score:.4f} ({source})")
+
+
+def latest_best_so_far(runs_root):
+    """best_so_far.json of the newest run under runs_root that has one, or None."""
+    runs_root = Path(runs_root)
+    if not runs_root.exists():
+        return None
+    for d in sorted(runs_root.iterdir(), reverse=True):
+        if (d / BEST_SO_FAR_FILE).exists():
+            return d / BEST_SO_FAR_FILE
+    return None
+
+
+def read_best_so_far(path, rows=True):
+    """Load a published best_so_far.json, with its plan/unplaced rows as records if rows."""
+    path = Path(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    rows_file = data.pop("rows_file", None)
+    if rows and rows_file and (path.parent / rows_file).exists():
+        plan, unplaced = pd.read_pickle(path.parent / rows_file)
+        data["plan"] = df_to_json_records_safe(plan)
+        data["unplaced"] = df_to_json_records_safe(unplaced)
+    return data
+
 
 # JITTER WEIGHTS (Simulated Annealing)
-def jitter_weights(weights, scale: float):
+def jitter_weights(weights, scale: float, rng=random):
     new_w = {}
     for k, v in weights.items():
-        factor = 1.0 + random.uniform(-scale, scale)
+        factor = 1.0 + rng.uniform(-scale, scale)
         nv = max(1e-6, v * factor)
 
         if k in ("w_has_ddl", "w_priority"):
@@ -94,40 +195,59 @@ def jitter_weights(weights, scale: float):
 
 
 # RUN ONCE
-def run_once(jobs, shifts, unlimited, outsourcing, weights, now_ts, cancel_check=None, locked_ops=None,freeze_until=None, freeze_pg2=False,pinned_starts=None, is_first_run=False):
+def run_once(jobs, shifts, unlimited, outsourcing, weights, now_ts, cancel_check=None, locked_ops=None,freeze_until=None, freeze_pg2=False,pinned_starts=None, is_first_run=False, job_table=None, job_graph=None, cache_stats=None, problem=None, abort_below=None):
     """
     Run one scheduling pass.
     Returns: plan, late, unplaced, score
     If the inner scheduler detects a cancellation, all four values are None.
+    With abort_below, a pass whose score provably stays below it is cut
+    short: plan/late/unplaced are None and score is its upper bound.
+    cache_stats (dict) accumulates the scheduler's memo hit/miss counters.
+    With a compiled problem (compile_problem) only weights/is_first_run are
+    taken per call; jobs, locks, freeze and pins come from the problem.
     """
-    base = jobs[jobs["RecordType"].isin(SCHEDULE_RT)].copy()
-    base["duration_min"] = (
-        pd.to_numeric(base["duration_min"], errors="coerce")
-        .fillna(0)
-        .astype(int)
-    )
+    if problem is not None:
+        base = None
+        job_graph = problem.graph
+    else:
+        base = jobs[jobs["RecordType"].isin(SCHEDULE_RT)].copy()
+        base["duration_min"] = (
+            pd.to_numeric(base["duration_min"], errors="coerce")
+            .fillna(0)
+            .astype(int)
+        )
 
-    pred_sets, succ_multi = build_dependency_graph(jobs)
+    if job_graph is not None:
+        pred_sets, succ_multi = job_graph.pred_sets, job_graph.succ_multi
+    else:
+        pred_sets, succ_multi = build_dependency_graph(jobs)
 
 
     # IMPORTANT: pass scenario_name into scheduler so it can read cancel_flag
-    plan, late, unplaced = schedule(
-        base,
-        shifts,
-        pred_sets,
-        succ_multi,
-        unlimited,
-        outsourcing,
-        weights,
-        now_ts=now_ts,
-        cancel_check=cancel_check,
-        locked_ops=locked_ops,
-        freeze_until=freeze_until,
-        freeze_pg2=freeze_pg2,
-        pinned_starts=pinned_starts,
-        skip_os5_seeding=(not is_first_run),
-
-    )
+    try:
+        plan, late, unplaced = schedule(
+            base,
+            shifts,
+            pred_sets,
+            succ_multi,
+            unlimited,
+            outsourcing,
+            weights,
+            now_ts=now_ts,
+            cancel_check=cancel_check,
+            locked_ops=locked_ops,
+            freeze_until=freeze_until,
+            freeze_pg2=freeze_pg2,
+            pinned_starts=pinned_starts,
+            skip_os5_seeding=(not is_first_run),
+            job_table=job_table,
+            job_graph=job_graph,
+            cache_stats=cache_stats,
+            problem=problem,
+            abort_below=abort_below,
+        )
+    except ScheduleAborted as e:
+        return None, None, None, e.bound, pred_sets
 
     # If scheduler was cancelled deep inside and signalled by returning None
     if plan is None or late is None or unplaced is None:
@@ -142,15 +262,75 @@ def run_once(jobs, shifts, unlimited, outsourcing, weights, now_ts, cancel_check
         plan = add_idle_time_columns(plan, shifts, unlimited)
 
     kpis = compute_kpis_multi(plan)
-    score = (
-        2.0 * kpis.get("on_time", 0.0)
-        + 0.8 * kpis.get("within_2d", 0.0)
-        - 1.0 * kpis.get("beyond_7d", 0.0)
-    )
+    score = plan_score(kpis)
 
     return plan, late, unplaced, score, pred_sets
 
 
+def publish_if_better(run_dir, best_score, latest_dir):
+    """
+    Publish gate: copy a finished run's files into output/ only if it beats
+    the currently released plan_score (or nothing is released yet).
+    """
+    run_dir, latest_dir = Path(run_dir), Path(latest_dir)
+    latest_plan_path = latest_dir / "plan.csv"
+    latest_meta_path = latest_dir / "run_meta.json"
+    publish = False
+    prev_score = None
+
+    if not latest_plan_path.exists() or not latest_meta_path.exists():
+        # First ever publish
+        publish = True
+        print("[PUBLISH] No existing output plan/meta → publishing this run.")
+    else:
+        try:
+            prev_meta = json.loads(latest_meta_path.read_text(encoding="utf-8"))
+            prev_score = prev_meta.get("plan_score", None)
+        except Exception as e:
+            print(f"[PUBLISH] Could not read previous output run_meta.json: {e}")
+            prev_score = None
+
+        # If previous score missing, you can either recompute or just publish.
+        # Safer for release: do NOT publish unless we can compare.
+        if prev_score is None:
+            print("[PUBLISH] Previous plan_score missing → NOT publishing (no safe comparison).")
+            publish = False
+        else:
+            publish = (best_score is not None and float(best_score) > float(prev_score))
+            print(f"[PUBLISH] Compare scores: new={best_score:.6f} vs old={prev_score:.6f} → publish={publish}")
+
+    if publish:
+        # the archived run_meta.json goes along, so the released meta matches the released plan
+        for fn in ["plan.csv", "late.csv", "unplaced.csv", "orders_delivery.csv", "summaryFile.csv", "run_meta.json"]:
+            shutil.copy2(run_dir / fn, latest_dir / fn)
+
+        print(f"[PUBLISH] output/ updated → {latest_dir}")
+    else:
+        print("[PUBLISH] output/ NOT updated; kept previous released plan.")
+    return publish
+
+
+def run_result(run_id, run_dir, plan, pred_sets):
+    """Return value of run_scheduler_with_paths for a finished (or cached) run."""
+    run_dir = Path(run_dir)
+    records = df_to_json_records_safe(plan)
+
+    # add predecessors only to JSON (not to CSV)
+    if pred_sets is not None:
+        for r in records:
+            jid = str(r.get("job_id") or "").strip()
+            r["PredIds"] = sorted(list(pred_sets.get(jid, set())))
+    return {
+        "run_id": run_id,
+        "run_dir": str(run_dir),
+        "plan": str(run_dir / "plan.csv"),
+        "late": str(run_dir / "late.csv"),
+        "unplaced": str(run_dir / "unplaced.csv"),
+        "orders_delivery": str(run_dir / "orders_delivery.csv"),
+        "summary": str(run_dir / "summaryFile.csv"),
+        "plan_records": records,
+    }
+
 
 # MAIN SCHEDULER (used by API)
 def run_scheduler_with_paths(
@@ -167,8 +347,10 @@ def run_scheduler_with_paths(
     sa_enabled=None,
     sa_config=None,        # NEW: Add SA config parameter
     preview_only=False,
-    now_ts=None
+    now_ts=None,
+    resume_run=None,       # run id whose SA checkpoint to continue from
 ):
+    t_run0 = time.time()  # SA time budgets count from here
     cfg = load_scenario_config(scenario_name) if scenario_name else {"mode": "real_time"}
     if now_ts is None:
         now_ts = scenario_now(cfg) if scenario_name else pd.Timestamp.now().floor("min")
@@ -176,10 +358,16 @@ def run_scheduler_with_paths(
     else:
         now_ts = pd.to_datetime(now_ts, errors="coerce", utc=True).tz_convert(None)
     freeze_pg2 = bool(cfg.get("freeze_pg2", False))
-    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_id = resume_run or datetime.now().strftime("%Y%m%d_%H%M%S")
     runs_dir = Path("scenarios") / str(scenario_name) / "runs" / run_id
     runs_dir.mkdir(parents=True, exist_ok=True)
     run_output_dir = runs_dir
+    ckpt = None
+    if resume_run:
+        ckpt = load_checkpoint(runs_dir)
+        if ckpt is None:
+            raise ValueError(f"No SA checkpoint to resume in {runs_dir}")
+        print(f"[CKPT] Resuming run {run_id} ({ckpt['mode']}, {ckpt['budget']['done']} candidates done)")
     latest_dir = Path(output_dir)
     latest_dir.mkdir(parents=True, exist_ok=True)
 
@@ -201,13 +389,47 @@ def run_scheduler_with_paths(
         sa_cooling = SA_COOLING
         sa_step_scale = SA_STEP_SCALE
         sa_seed = SA_SEED
+        sa_workers = SA_WORKERS
+        sa_batch = SA_WORKERS
+        sa_chains = SA_CHAINS
+        sa_temp_ratio = SA_TEMP_RATIO
+        sa_swap_every = SA_SWAP_EVERY
+        sa_time_budget = SA_TIME_BUDGET_S
+        sa_stall_window = SA_STALL_WINDOW
+        sa_min_improvement = SA_MIN_IMPROVEMENT
+        sa_warm_start = SA_WARM_START
+        sa_warm_siblings = SA_WARM_SIBLINGS
+        sa_early_abort = SA_EARLY_ABORT
         use_sa_enabled = SA_ENABLED
+        if sa_time_budget is not None:
+            sa_iters = SA_BUDGET_MAX_ITERS
     else:
         sa_iters = sa_config.get("iterations", SA_ITERS)
         sa_init_temp = sa_config.get("initial_temp", SA_INIT_TEMP)
         sa_cooling = sa_config.get("cooling", SA_COOLING)
         sa_step_scale = sa_config.get("step_scale", SA_STEP_SCALE)
         sa_seed = sa_config.get("seed", SA_SEED)
+        # parallel mode: candidates scored per temperature step
+        sa_workers = max(1, int(sa_config.get("workers", SA_WORKERS)))
+        sa_batch = max(1, int(sa_config.get("batch", sa_workers)))
+        # parallel tempering: one chain per temperature of a geometric ladder
+        sa_chains = max(1, int(sa_config.get("chains", SA_CHAINS)))
+        sa_temp_ratio = float(sa_config.get("temp_ratio", SA_TEMP_RATIO))
+        sa_swap_every = max(1, int(sa_config.get("swap_every", SA_SWAP_EVERY)))
+        # anytime mode: stop on the wall-clock budget or once the best
+        # score stalls; iterations then only caps the run
+        sa_time_budget = sa_config.get("time_budget_s", SA_TIME_BUDGET_S)
+        if sa_time_budget is not None:
+            sa_time_budget = float(sa_time_budget)
+            if "iterations" not in sa_config:
+                sa_iters = SA_BUDGET_MAX_ITERS
+        sa_stall_window = max(0, int(sa_config.get("stall_window", SA_STALL_WINDOW) or 0))
+        sa_min_improvement = float(sa_config.get("min_improvement", SA_MIN_IMPROVEMENT))
+        # start SA from the best weights of earlier runs / what-if siblings
+        sa_warm_start = bool(sa_config.get("warm_start", SA_WARM_START))
+        sa_warm_siblings = bool(sa_config.get("warm_siblings", SA_WARM_SIBLINGS))
+        # cut short candidates that can no longer beat the best score
+        sa_early_abort = bool(sa_config.get("early_abort", SA_EARLY_ABORT))
         use_sa_enabled = sa_config.get("enabled", SA_ENABLED)
 
     # Store in run_meta for tracking
@@ -216,6 +438,10 @@ def run_scheduler_with_paths(
     run_meta["sa_initial_temp"] = sa_init_temp
     run_meta["sa_cooling"] = sa_cooling
     run_meta["sa_step_scale"] = sa_step_scale
+    run_meta["sa_workers"] = sa_workers
+    run_meta["sa_batch"] = sa_batch
+    run_meta["sa_chains"] = sa_chains
+    run_meta["sa_early_abort"] = sa_early_abort
 
     freeze_h_global = int(cfg.get("freeze_horizon_hours", 0) or 0)
     freeze_by_wp = cfg.get("freeze_horizon_by_workplace", {})
@@ -369,6 +595,41 @@ def run_scheduler_with_paths(
     }
     run_meta["freeze_source"] = "output/plan.csv" if (freeze_h_global > 0 or freeze_by_wp) else None
     run_meta["locked_ops_count"] = int(len(locked_ops_all)) if locked_ops_all is not None else 0
+
+    # ===== RUN CACHE KEY =====
+    # Warm-started runs depend on earlier runs and time-budgeted ones on the
+    # clock, not only on their inputs: they get no key, so they are never
+    # served from (or as) a cached run. The key is still computed: a
+    # checkpoint only resumes under it.
+    use_sa_resolved = bool(sa_enabled) if sa_enabled is not None else bool(use_sa_enabled)
+    sa_mode = "pt" if sa_chains > 1 else "batch" if sa_workers > 1 else "sequential"
+    inputs_key = None
+    if scenario_name:
+        # the SA mode and only the settings it uses (each mode draws its
+        # candidates differently); workers do not change the result
+        sa_settings = {"enabled": use_sa_resolved}
+        if use_sa_resolved:
+            sa_settings.update(
+                mode=sa_mode, iterations=sa_iters, initial_temp=sa_init_temp, cooling=sa_cooling,
+                step_scale=sa_step_scale, seed=sa_seed, time_budget_s=sa_time_budget,
+                stall_window=sa_stall_window, min_improvement=sa_min_improvement,
+            )
+            if sa_early_abort:
+                sa_settings["early_abort"] = True
+            if sa_mode == "batch":
+                sa_settings["batch"] = sa_batch
+            elif sa_mode == "pt":
+                sa_settings.update(chains=sa_chains, temp_ratio=sa_temp_ratio, swap_every=sa_swap_every)
+        inputs_key = run_key(
+            [jobs_clean_path, shifts_clean_path, unlimited_path, outsourcing_path,
+             Path("scenarios") / str(scenario_name) / "config.json"],
+            cfg, now_ts, weights or DEFAULT_WEIGHTS, sa_settings,
+            locked_ops=locked_ops_all, pinned_starts=pinned_starts, freeze_until=freeze_enforce_until,
+        )
+    input_hash = inputs_key if not (use_sa_resolved and (sa_warm_start or sa_time_budget is not None)) else None
+    run_meta["input_hash"] = input_hash
+    if ckpt is not None and ckpt.get("inputs_key") != inputs_key:
+        raise ValueError(f"Inputs of {scenario_name} changed since the checkpoint of run {run_id}; cannot resume")
     # write archived meta for this run (always)
     (run_output_dir / "run_meta.json").write_text(
         json.dumps(run_meta, indent=2),
@@ -396,11 +657,38 @@ def run_scheduler_with_paths(
             cancel_flag[scenario_name] = False
             print(f"[ENGINE] active_jobs[{scenario_name}] set to False after cancel")
             print(f"[ENGINE] cancel_flag[{scenario_name}] set to False after cancel")
+            # a bare /resume must not pick cancelled work back up
+            mark_cancelled(run_output_dir)
         return {"cancelled": True}
 
-
-
-
+    # ===== RUN CACHE LOOKUP =====
+    # an archived run of this scenario with the same key is the result:
+    # republish it (same publish gate) instead of recomputing
+    cached = find_cached_run(runs_dir.parent, input_hash, skip_run=run_id) if input_hash and not ckpt else None
+    if scenario_name:
+        run_cache[scenario_name] = {
+            "hit": cached is not None, "input_hash": input_hash,
+            "run_id": cached[0].name if cached else run_id,
+        }
+    if cached is not None:
+        cached_dir, cached_meta = cached
+        print(f"[CACHE] HIT {input_hash[:12]} → reusing run {cached_dir.name}")
+        shutil.rmtree(runs_dir, ignore_errors=True)  # holds only this run's early meta
+        if not preview_only:
+            publish_if_better(cached_dir, cached_meta["plan_score"], latest_dir)
+        if (cached_dir / BEST_SO_FAR_FILE).exists() and not preview_only:
+            best_so_far[scenario_name] = {
+                "path": str(cached_dir / BEST_SO_FAR_FILE), "plan_score": cached_meta["plan_score"],
+                "source": "cached_run", "updated_at": cached_meta.get("run_ts"),
+            }
+        jobs, *_ = load_cleaned_inputs(jobs_clean_path, shifts_clean_path, unlimited_path, outsourcing_path, now_ts)
+        pred_sets, _ = build_dependency_graph(jobs)
+        update(100)
+        active_jobs[scenario_name] = False
+        cancel_flag[scenario_name] = False
+        return run_result(cached_dir.name, cached_dir, pd.read_csv(cached_dir / "plan.csv"), pred_sets)
+    if input_hash:
+        print(f"[CACHE] MISS {input_hash[:12]}")
 
     update(0)
 
@@ -437,32 +725,85 @@ def run_scheduler_with_paths(
     jobs['_pos'] = pd.to_numeric(jobs['OrderPos'], errors='coerce').fillna(0).astype(int)
     print("[ENGINE] Pre-normalization complete (DataFrame columns added)")
 
+    # Column-oriented job table, shared read-only by every run_once() below
+    job_table = JobTable(jobs[jobs["RecordType"].isin(SCHEDULE_RT)])
+    # precedence graph + OS5 upstream closures, likewise built once
+    job_graph = JobGraph(job_table, *build_dependency_graph(jobs))
+    run_meta["graph_build_s"] = job_graph.build_times
+    # calendars after locks, pins, flags, locked rows: identical for every
+    # pass below, so compile them once; each pass only brings its weights
+    t0 = time.perf_counter()
+    problem = compile_problem(
+        None, shifts, None, None, outsourcing, now_ts, locked_ops=locked_ops_all,
+        freeze_until=freeze_enforce_until, freeze_pg2=freeze_pg2, pinned_starts=pinned_starts,
+        job_table=job_table, job_graph=job_graph,
+    )
+    run_meta["problem_build_s"] = round(time.perf_counter() - t0, 4)
+    # scheduler memo counters, summed over every run_once() of this run
+    cache_stats = {}
+
     update(10)
 
     if scenario_name and cancel_flag.get(scenario_name):
         return early_cancel()
 
-    # FIRST RUN
-    print("[ENGINE] Running initial schedule pass")
-    random.seed(SA_SEED)
-
     base_weights = weights.copy() if weights else DEFAULT_WEIGHTS.copy()
-    print(f"[ENGINE] Initial weights: {base_weights}")
+    # SA state goes to run_dir/sa_checkpoint.json after every iteration/step
+    # (best plan pickled next to it), so a killed run can be resumed
+    checkpointing = bool(scenario_name) and use_sa_resolved and not preview_only
 
+    if ckpt is None:
+        # FIRST RUN
+        print("[ENGINE] Running initial schedule pass")
+        random.seed(SA_SEED)
 
-    plan, late, unplaced, score, pred_sets = run_once(
-        jobs, shifts, unlimited, outsourcing, base_weights, now_ts=now_ts, cancel_check=cancel_check, locked_ops=locked_ops_all, freeze_until=freeze_enforce_until, freeze_pg2 = freeze_pg2,pinned_starts=pinned_starts,is_first_run=True,
-    )
-
-    # If cancelled during first run
-    if plan is None:
-        print("[ENGINE] Cancellation bubbled up from first run_once()")
-        return early_cancel()
+        print(f"[ENGINE] Initial weights: {base_weights}")
 
-    best_plan, best_late, best_unplaced, best_score = plan, late, unplaced, score
-    best_weights = base_weights.copy()
+        plan, late, unplaced, score, pred_sets = run_once(
+            jobs, shifts, unlimited, outsourcing, base_weights, now_ts=now_ts, cancel_check=cancel_check, locked_ops=locked_ops_all, freeze_until=freeze_enforce_until, freeze_pg2 = freeze_pg2,pinned_starts=pinned_starts,is_first_run=True,
+            job_table=job_table, job_graph=job_graph, cache_stats=cache_stats, problem=problem,
+        )
 
-    print(f"[ENGINE] First run score = {best_score}")
+        # If cancelled during first run
+        if plan is None:
+            print("[ENGINE] Cancellation bubbled up from first run_once()")
+            return early_cancel()
+
+        best_plan, best_late, best_unplaced, best_score = plan, late, unplaced, score
+        best_weights = base_weights.copy()
+        print(f"[ENGINE] First run score = {best_score}")
+        # every new best score of this run, persisted in run_meta
+        score_trajectory = []
+        sa_aborted = 0  # SA candidates cut short by early_abort
+    else:
+        best_plan, best_late, best_unplaced = load_best_plan(ckpt["best_plan_path"])
+        best_score, best_weights = ckpt["best_score"], ckpt["best_weights"]
+        base_weights = ckpt["base_weights"]
+        pred_sets = job_graph.pred_sets
+        cache_stats.update(ckpt["cache_stats"])
+        score_trajectory = ckpt["score_trajectory"]
+        sa_aborted = ckpt.get("sa_aborted", 0)
+        run_meta["resumed"] = {"evaluations_done": ckpt["budget"]["done"], "at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S")}
+        print(f"[CKPT] Restored best score {best_score}")
+
+    def publish_best(source):
+        score_trajectory.append({
+            "source": source, "score": float(best_score), "t_s": round(time.time() - t_run0, 3),
+        })
+        if checkpointing:
+            save_best_plan(run_output_dir, best_plan, best_late, best_unplaced)
+        # intermediate artifact for /api/schedule/best-so-far (full runs only)
+        if scenario_name and not preview_only:
+            publish_best_so_far(
+                scenario_name, run_output_dir, best_plan, best_late, best_unplaced, best_score, best_weights, source)
+
+    if ckpt is None:
+        publish_best("first_run")
+    elif scenario_name and (run_output_dir / BEST_SO_FAR_FILE).exists():
+        best_so_far[scenario_name] = {
+            "path": str(run_output_dir / BEST_SO_FAR_FILE), "plan_score": float(best_score),
+            "source": "resumed", "updated_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        }
 
     update(25)
 
@@ -471,7 +812,243 @@ def run_scheduler_with_paths(
         use_sa = bool(sa_enabled)  # Explicit override
     else:
         use_sa = use_sa_enabled  # From config or sa_config parameter
-    if use_sa:
+
+    # warm start: score the best weights of earlier runs (this scenario's
+    # last run, then its what-if siblings') and let SA start from whichever
+    # set beats the first pass
+    warm_meta = {"enabled": bool(use_sa and sa_warm_start), "tried": [], "used": None}
+    if ckpt is not None:
+        warm_meta = ckpt["warm_start"]  # done before the checkpointed iterations
+    elif warm_meta["enabled"] and scenario_name:
+        candidates = warm_start_candidates(
+            scenario_name, base_weights, skip_run=run_id, siblings=sa_warm_siblings,
+            max_siblings=SA_WARM_MAX_SIBLINGS,
+        )
+        for label, w in candidates:
+            plan, late, unplaced, sc, _ = run_once(
+                jobs, shifts, unlimited, outsourcing, w, now_ts=now_ts, cancel_check=cancel_check,
+                locked_ops=locked_ops_all, freeze_until=freeze_enforce_until, freeze_pg2=freeze_pg2,
+                pinned_starts=pinned_starts, is_first_run=False,
+                job_table=job_table, job_graph=job_graph, cache_stats=cache_stats, problem=problem,
+            )
+            if plan is None:
+                print("[WARM] Cancellation bubbled up from run_once()")
+                return early_cancel()
+            print(f"[WARM] {label}: score {sc}")
+            warm_meta["tried"].append({"source": label, "score": float(sc)})
+            if sc > best_score:
+                best_weights = w
+                best_plan, best_late, best_unplaced, best_score = plan, late, unplaced, sc
+                warm_meta["used"] = label
+                publish_best(f"warm_start {label}")
+        if warm_meta["used"]:
+            base_weights = best_weights.copy()
+            print(f"[WARM] SA starts from the weights of {warm_meta['used']} (score {best_score})")
+    run_meta["sa_warm_start"] = warm_meta
+
+    # iteration cap, wall-clock budget and stall window of the SA loops below
+    budget = SABudget(
+        sa_iters, best_score, time_budget_s=sa_time_budget, stall_window=sa_stall_window,
+        min_improvement=sa_min_improvement, t0=t_run0,
+    )
+    if ckpt is not None:
+        budget.restore(ckpt["budget"])
+
+    def checkpoint(mode, loop):
+        # loop: the mode's own state after the last completed iteration/step
+        # (None: not started yet)
+        if not checkpointing:
+            return
+        save_checkpoint(run_output_dir, {
+            "run_id": run_id, "scenario": scenario_name, "inputs_key": inputs_key, "mode": mode,
+            "now_ts": _iso(now_ts), "saved_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "weights": weights, "sa_config": sa_config, "base_weights": base_weights,
+            "best_weights": best_weights, "best_score": float(best_score),
+            "best_plan_path": str(run_output_dir / BEST_PLAN_FILE),
+            "score_trajectory": score_trajectory, "cache_stats": cache_stats,
+            "warm_start": warm_meta, "budget": budget.state(), "loop": loop,
+            "sa_aborted": sa_aborted,
+        })
+
+    if ckpt is not None and ckpt["mode"] != sa_mode:
+        raise ValueError(f"Checkpoint of run {run_id} is for {ckpt['mode']} SA, not {sa_mode}")
+    loop = ckpt["loop"] if ckpt is not None else None
+    if use_sa and loop is None:
+        checkpoint(sa_mode, None)
+    if use_sa and sa_chains > 1:
+        # parallel tempering: chain i anneals from sa_init_temp * ratio**i;
+        # each step every chain proposes one jittered candidate (scored
+        # together in the pool), then neighbouring chains may swap states
+        n_steps = math.ceil(sa_iters / sa_chains)  # at most
+        n_workers = sa_workers if sa_workers > 1 else sa_chains
+        print(
+            f"[ENGINE] Starting parallel tempering: {sa_chains} chains x {n_steps} steps on {n_workers} workers "
+            f"(temp={sa_init_temp}, ratio={sa_temp_ratio}, swap every {sa_swap_every})")
+        rng = random.Random(sa_seed)
+        temps = [sa_init_temp * sa_temp_ratio ** i for i in range(sa_chains)]
+        chains = [{
+            "chain": i, "temp_start": temps[i], "weights": base_weights.copy(), "score": best_score,
+            "best_score": best_score, "proposals": 0, "accepted": 0, "swaps_accepted": 0,
+        } for i in range(sa_chains)]
+        swap_tries = swap_hits = 0
+        first_step = 0
+        if loop is not None:
+            rng.setstate(rng_state_from_json(loop["rng"]))
+            temps, chains = loop["temps"], loop["chains"]
+            swap_tries, swap_hits, first_step = loop["swap_tries"], loop["swap_hits"], loop["step"]
+            print(f"[CKPT] Parallel tempering continues at step {first_step + 1}")
+        pool_state = {
+            "run_once": run_once, "jitter": jitter_weights, "problem": problem,
+            "shifts": shifts, "unlimited": unlimited, "outsourcing": outsourcing, "now_ts": now_ts,
+        }
+        with SAPool(n_workers, pool_state) as pool:
+            for step in itertools.count(first_step):
+                if budget.stop():
+                    break
+                step_start = time.time()
+                live = chains[:min(sa_chains, budget.remaining())]
+                print(f"[PT] Step {step+1}/{n_steps}, Temps={[round(t, 3) for t in temps]}")
+
+                if cancel_check():
+                    print(f"[PT] CANCEL detected during step {step+1}")
+                    return early_cancel()
+
+                tasks = [(c["weights"], rng.randrange(2 ** 32)) for c in live]
+                results = pool.evaluate(
+                    tasks, sa_step_scale, cancel_check, abort_below=best_score if sa_early_abort else None)
+                if results is None:
+                    print(f"[PT] Cancellation bubbled up from worker pool in step {step+1}")
+                    return early_cancel()
+
+                for c, (cand_w, plan, late, unplaced, sc, stats) in zip(live, results):
+                    for name, st in stats.items():
+                        merge_stats(cache_stats, name, st)
+                    c["proposals"] += 1
+                    if plan is None:
+                        # below the best score: rejected without finishing the pass
+                        sa_aborted += 1
+                        continue
+                    t = temps[c["chain"]]
+                    if sc > c["score"] or rng.random() < math.exp((sc - c["score"]) / max(1e-9, t)):
+                        c["weights"], c["score"] = cand_w, sc
+                        c["accepted"] += 1
+                    c["best_score"] = max(c["best_score"], sc)
+                    if sc > best_score:
+                        best_weights = cand_w
+                        best_plan, best_late, best_unplaced, best_score = plan, late, unplaced, sc
+                        print(f"[PT] NEW BEST SCORE: {best_score} (chain {c['chain']})")
+                        publish_best(f"pt_step_{step + 1}")
+
+                # swap states of neighbours (even pairs, then odd pairs on
+                # the next attempt), accepted with the replica-exchange rule
+                if (step + 1) % sa_swap_every == 0:
+                    first = ((step + 1) // sa_swap_every) % 2
+                    for i in range(first, sa_chains - 1, 2):
+                        a, b = chains[i], chains[i + 1]
+                        swap_tries += 1
+                        d = (b["score"] - a["score"]) * (1.0 / max(1e-9, temps[i]) - 1.0 / max(1e-9, temps[i + 1]))
+                        if d >= 0 or rng.random() < math.exp(d):
+                            a["weights"], b["weights"] = b["weights"], a["weights"]
+                            a["score"], b["score"] = b["score"], a["score"]
+                            a["swaps_accepted"] += 1
+                            b["swaps_accepted"] += 1
+                            swap_hits += 1
+
+                print(f"[PT] Step {step+1} completed in {time.time() - step_start:.1f}s "
+                      f"(chain scores={[round(c['score'], 2) for c in chains]})")
+                budget.record(len(live), best_score, time.time() - step_start)
+                update(30 + int(budget.progress() * 50))
+                temps = [t * sa_cooling for t in temps]
+                checkpoint(sa_mode, {
+                    "step": step + 1, "rng": rng_state_to_json(rng.getstate()), "temps": temps,
+                    "chains": chains, "swap_tries": swap_tries, "swap_hits": swap_hits,
+                })
+
+        run_meta["sa_chain_stats"] = [{
+            "chain": c["chain"],
+            "temp_start": c["temp_start"],
+            "final_score": float(c["score"]),
+            "best_score": float(c["best_score"]),
+            "proposals": c["proposals"],
+            "accepted": c["accepted"],
+            "acceptance_rate": round(c["accepted"] / c["proposals"], 4) if c["proposals"] else None,
+            "swaps_accepted": c["swaps_accepted"],
+        } for c in chains]
+        run_meta["sa_swap_rate"] = round(swap_hits / swap_tries, 4) if swap_tries else None
+
+    elif use_sa and sa_workers > 1:
+        # same annealing schedule, but each temperature step scores sa_batch
+        # jittered candidates in parallel and the best of them is the
+        # proposal; sa_iters still counts candidate evaluations
+        n_steps = math.ceil(sa_iters / sa_batch)  # at most
+        print(
+            f"[ENGINE] Starting parallel Simulated Annealing: {sa_iters} candidates, "
+            f"{n_steps} steps x {sa_batch} on {sa_workers} workers (temp={sa_init_temp}, cooling={sa_cooling})")
+        rng = random.Random(sa_seed)
+        temp = sa_init_temp
+        cur_w, cur_score = base_weights.copy(), best_score
+        first_step = 0
+        if loop is not None:
+            rng.setstate(rng_state_from_json(loop["rng"]))
+            temp, cur_w, cur_score, first_step = loop["temp"], loop["cur_w"], loop["cur_score"], loop["step"]
+            print(f"[CKPT] Parallel SA continues at step {first_step + 1}")
+        pool_state = {
+            "run_once": run_once, "jitter": jitter_weights, "problem": problem,
+            "shifts": shifts, "unlimited": unlimited, "outsourcing": outsourcing, "now_ts": now_ts,
+        }
+        with SAPool(sa_workers, pool_state) as pool:
+            for step in itertools.count(first_step):
+                if budget.stop():
+                    break
+                step_start = time.time()
+                k = min(sa_batch, budget.remaining())
+                print(f"[SA] Step {step+1}/{n_steps} ({k} candidates), Temp={temp:.3f}")
+
+                if cancel_check():
+                    print(f"[SA] CANCEL detected during SA step {step+1}")
+                    return early_cancel()
+
+                seeds = [rng.randrange(2 ** 32) for _ in range(k)]
+                results = pool.evaluate(
+                    [(cur_w, sd) for sd in seeds], sa_step_scale, cancel_check,
+                    abort_below=best_score if sa_early_abort else None)
+                if results is None:
+                    print(f"[SA] Cancellation bubbled up from worker pool in step {step+1}")
+                    return early_cancel()
+
+                for cand_w, plan, late, unplaced, sc, stats in results:
+                    for name, st in stats.items():
+                        merge_stats(cache_stats, name, st)
+                    if plan is None:
+                        sa_aborted += 1
+                        continue
+                    if sc > best_score:
+                        best_weights = cand_w
+                        best_plan, best_late, best_unplaced, best_score = plan, late, unplaced, sc
+                        print(f"[SA] NEW BEST SCORE: {best_score}")
+                        publish_best(f"sa_step_{step + 1}")
+
+                # aborted candidates (below the best score) are not proposed
+                scored = [r for r in results if r[1] is not None]
+                if scored:
+                    cand_w, _, _, _, sc, _ = max(scored, key=lambda r: r[4])
+                    print(f"[SA] Step {step+1} completed in {time.time() - step_start:.1f}s "
+                          f"(best of batch={sc:.2f}, {k - len(scored)} aborted)")
+                    if sc > cur_score or rng.random() < math.exp((sc - cur_score) / max(1e-9, temp)):
+                        print(f"[SA] Accepted new weights with score {sc}")
+                        cur_w, cur_score = cand_w, sc
+                else:
+                    print(f"[SA] Step {step+1} completed in {time.time() - step_start:.1f}s (all {k} aborted)")
+
+                budget.record(k, best_score, time.time() - step_start)
+                update(30 + int(budget.progress() * 50))
+                temp *= sa_cooling
+                checkpoint(sa_mode, {
+                    "step": step + 1, "rng": rng_state_to_json(rng.getstate()), "temp": temp,
+                    "cur_w": cur_w, "cur_score": cur_score,
+                })
+
+    elif use_sa:
 
         print(
             f"[ENGINE] Starting Simulated Annealing: {sa_iters} iterations (temp={sa_init_temp}, cooling={sa_cooling})")
@@ -484,8 +1061,21 @@ def run_scheduler_with_paths(
             best_unplaced,
             best_score,
         )
-
-        for it in range(sa_iters):
+        first_it = 0
+        if loop is not None:
+            random.setstate(rng_state_from_json(loop["rng"]))
+            temp, cur_w, cur_score, first_it = loop["temp"], loop["cur_w"], loop["cur_score"], loop["iter"]
+            print(f"[CKPT] Simulated Annealing continues at iteration {first_it + 1}")
+
+        def seq_checkpoint(it):
+            checkpoint(sa_mode, {
+                "iter": it + 1, "rng": rng_state_to_json(random.getstate()), "temp": temp,
+                "cur_w": cur_w, "cur_score": cur_score,
+            })
+
+        for it in itertools.count(first_it):
+            if budget.stop():
+                break
             iter_start = time.time()
             print(f"[SA] Iter {it+1}/{sa_iters}, Temp={temp:.3f}")
 
@@ -501,20 +1091,28 @@ def run_scheduler_with_paths(
                 jobs, shifts, unlimited, outsourcing, cand_w,
                 now_ts=now_ts,
                 cancel_check=cancel_check, locked_ops=locked_ops_all, freeze_until=freeze_enforce_until, freeze_pg2 = freeze_pg2,pinned_starts=pinned_starts,is_first_run=False,
+                job_table=job_table, job_graph=job_graph, cache_stats=cache_stats, problem=problem,
+                abort_below=best_score if sa_early_abort else None,
             )
             iter_time = time.time() - iter_start
-            print(f"[SA] Iter {it + 1} completed in {iter_time:.1f}s (score={sc:.2f})")
 
             # If cancelled inside this run
-            if plan is None:
+            if sc is None:
                 print(f"[SA] Cancellation bubbled up from run_once() in iter {it+1}")
                 return early_cancel()
 
-            improve = sc > cur_score
-            accept = improve or (
-                random.random()
-                < math.exp((sc - cur_score) / max(1e-9, temp))
-            )
+            if plan is None:
+                # cannot beat the best score: rejected without finishing the pass
+                print(f"[SA] Iter {it + 1} aborted after {iter_time:.1f}s (bound={sc:.2f} < best={best_score:.2f})")
+                sa_aborted += 1
+                accept = False
+            else:
+                print(f"[SA] Iter {it + 1} completed in {iter_time:.1f}s (score={sc:.2f})")
+                improve = sc > cur_score
+                accept = improve or (
+                    random.random()
+                    < math.exp((sc - cur_score) / max(1e-9, temp))
+                )
 
             if accept:
                 print(f"[SA] Accepted new weights with score {sc}")
@@ -536,9 +1134,12 @@ def run_scheduler_with_paths(
                 )
                 pred_sets = pred_sets_iter
                 print(f"[SA] NEW BEST SCORE: {best_score}")
+                publish_best(f"sa_iter_{it + 1}")
 
-            update(30 + int((it / sa_iters) * 50))
+            budget.record(1, best_score, time.time() - iter_start)
+            update(30 + int(budget.progress() * 50))
             temp *= sa_cooling
+            seq_checkpoint(it)
 
     update(85)
 
@@ -549,6 +1150,16 @@ def run_scheduler_with_paths(
         return early_cancel()
 
     run_meta["plan_score"] = float(best_score) if best_score is not None else None
+    run_meta["cache_stats"] = cache_stats
+    run_meta["best_weights"] = best_weights
+    run_meta["score_trajectory"] = score_trajectory
+    run_meta["sa_aborted"] = sa_aborted
+    if use_sa:
+        print(f"[ENGINE] SA stopped ({budget.reason}) after {budget.done} candidates, {budget.elapsed():.1f}s")
+        run_meta.update(budget.meta())
+    else:
+        run_meta["sa_stop_reason"] = "disabled"
+    print(f"[ENGINE] Cache stats: {cache_stats}")
     (run_output_dir / "run_meta.json").write_text(
         json.dumps(run_meta, indent=2),
         encoding="utf-8"
@@ -605,48 +1216,13 @@ def run_scheduler_with_paths(
         pre_orders_late=pre_orders_late,
     )
     print(f"[WRITE] summaryFile.csv → {summary_csv_path}")
-    # ---- PUBLISH GATE: only overwrite output/ if this run beats currently released plan_score ----
-    publish = False
-    prev_score = None
-
-    if not latest_plan_path.exists() or not latest_meta_path.exists():
-        # First ever publish
-        publish = True
-        print("[PUBLISH] No existing output plan/meta → publishing this run.")
-    else:
-        try:
-            prev_meta = json.loads(latest_meta_path.read_text(encoding="utf-8"))
-            prev_score = prev_meta.get("plan_score", None)
-        except Exception as e:
-            print(f"[PUBLISH] Could not read previous output run_meta.json: {e}")
-            prev_score = None
-
-        # If previous score missing, you can either recompute or just publish.
-        # Safer for release: do NOT publish unless we can compare.
-        if prev_score is None:
-            print("[PUBLISH] Previous plan_score missing → NOT publishing (no safe comparison).")
-            publish = False
-        else:
-            publish = (best_score is not None and float(best_score) > float(prev_score))
-            print(f"[PUBLISH] Compare scores: new={best_score:.6f} vs old={prev_score:.6f} → publish={publish}")
-
+    if use_sa:
+        # outputs are written: nothing left to resume
+        clear_checkpoint(run_output_dir)
     if preview_only:
-        publish = False
-
-    if publish:
-        # write the released meta (now it matches released plan)
-        (latest_dir / "run_meta.json").write_text(
-            json.dumps(run_meta, indent=2),
-            encoding="utf-8"
-        )
-
-        for fn in ["plan.csv", "late.csv", "unplaced.csv", "orders_delivery.csv", "summaryFile.csv", "run_meta.json"]:
-            shutil.copy2(run_output_dir / fn, latest_dir / fn)
-
-        print(f"[PUBLISH] output/ updated → {latest_dir}")
-    else:
         print("[PUBLISH] output/ NOT updated; kept previous released plan.")
-    # -------------------------------------------------------------------------------
+    else:
+        publish_if_better(run_output_dir, best_score, latest_dir)
 
     update(100)
 
@@ -657,24 +1233,7 @@ def run_scheduler_with_paths(
         print(f"[ENGINE] cancel_flag[{scenario_name}] cleared after finish")
 
     print(f"===== [ENGINE] Finished scheduler for {scenario_name} =====\n")
-    records = df_to_json_records_safe(best_plan)
-
-    # add predecessors only to JSON (not to CSV)
-    if pred_sets is not None:
-        for r in records:
-            jid = str(r.get("job_id") or "").strip()
-            r["PredIds"] = sorted(list(pred_sets.get(jid, set())))
-    return {
-        "run_id": run_id,
-        "run_dir": str(run_output_dir),
-        "plan": str(plan_path),
-        "late": str(late_path),
-        "unplaced": str(unplaced_path),
-        "orders_delivery": str(orders_path),
-        "summary": str(summary_csv_path),
-        "plan_records": records,
-
-    }
+    return run_result(run_id, run_output_dir, best_plan, pred_sets)
 
 
 
@@ -0,0 +1,77 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+# Part of every key: bump when a scheduler change makes archived runs stale.
+RUN_CACHE_VERSION = 1
+
+# Files a finished run leaves in its run dir.
+RUN_FILES = ("plan.csv", "late.csv", "unplaced.csv", "orders_delivery.csv", "summaryFile.csv", "run_meta.json")
+
+
+def file_digest(path):
+    """sha256 of a file's bytes, streamed; None if it does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def frame_digest(df):
+    """Content hash of a DataFrame (locked ops), independent of row labels and column order."""
+    if df is None or len(df) == 0:
+        return None
+    df = df[sorted(df.columns, key=str)].reset_index(drop=True)
+    h = hashlib.sha256(json.dumps([str(c) for c in df.columns]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def run_key(input_paths, cfg, now_ts, weights, sa_settings, locked_ops=None, pinned_starts=None, freeze_until=None):
+    """
+    Hash over everything a run's result depends on: the cleaned input files,
+    the scenario config, now, weights, the resolved SA settings and the
+    locks/pins actually applied (freeze locks come from the released plan,
+    so they are hashed as applied, not as configured).
+    """
+    parts = {
+        "version": RUN_CACHE_VERSION,
+        "files": [file_digest(p) for p in input_paths],
+        "config": cfg,
+        "now": str(pd.Timestamp(now_ts)),
+        "weights": weights,
+        "sa": sa_settings,
+        "locked": frame_digest(locked_ops),
+        "pins": sorted((str(k), str(pd.Timestamp(v))) for k, v in (pinned_starts or {}).items()),
+        "freeze_until": None if freeze_until is None else str(pd.Timestamp(freeze_until)),
+    }
+    blob = json.dumps(parts, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def find_cached_run(runs_root, key, skip_run=None):
+    """
+    Newest archived run under runs_root with this input_hash that finished
+    (plan_score set, all output files present): (run_dir, run_meta) or None.
+    """
+    runs_root = Path(runs_root)
+    if not key or not runs_root.exists():
+        return None
+    for d in sorted(runs_root.iterdir(), reverse=True):
+        if d.name == skip_run or not (d / "run_meta.json").exists():
+            continue
+        try:
+            meta = json.loads((d / "run_meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if meta.get("input_hash") != key or meta.get("plan_score") is None:
+            continue
+        if all((d / fn).exists() for fn in RUN_FILES):
+            return d, meta
+    return None
@@ -0,0 +1,89 @@
+import time
+
+
+class SABudget:
+    """
+    Stopping rule of one SA run, checked before every iteration/step.
+
+    The run stops on the first of: max_iters candidate evaluations, the
+    wall-clock budget (time_budget_s counted from t0, the start of the run;
+    a step that would likely overrun it is not started), or convergence -
+    the best score has not risen by more than min_improvement over the last
+    stall_window evaluations (0 disables it). reason says which one hit.
+    """
+
+    __slots__ = (
+        "max_iters", "time_budget_s", "stall_window", "min_improvement", "t0",
+        "done", "ref_score", "since_improve", "step_s", "reason",
+    )
+
+    def __init__(self, max_iters, best_score, time_budget_s=None, stall_window=0, min_improvement=0.0, t0=None):
+        self.max_iters = int(max_iters)
+        self.time_budget_s = time_budget_s
+        self.stall_window = int(stall_window or 0)
+        self.min_improvement = float(min_improvement)
+        self.t0 = time.time() if t0 is None else t0
+        self.done = 0
+        self.ref_score = best_score  # best score at the last real improvement
+        self.since_improve = 0
+        self.step_s = 0.0  # duration of the last step, to predict the next
+        self.reason = None
+
+    def elapsed(self):
+        return time.time() - self.t0
+
+    def remaining(self):
+        return self.max_iters - self.done
+
+    def record(self, n, best_score, step_s):
+        """n more candidates were scored in step_s seconds; best_score is the best so far."""
+        self.done += n
+        self.step_s = step_s
+        if best_score > self.ref_score + self.min_improvement:
+            self.ref_score = best_score
+            self.since_improve = 0
+        else:
+            self.since_improve += n
+
+    def stop(self) -> bool:
+        if self.done >= self.max_iters:
+            self.reason = "iterations"
+        elif self.time_budget_s is not None and self.elapsed() + self.step_s > self.time_budget_s:
+            self.reason = "time_budget"
+        elif self.stall_window and self.since_improve >= self.stall_window:
+            self.reason = "converged"
+        else:
+            return False
+        return True
+
+    def progress(self) -> float:
+        """Fraction done, by iterations or by time, whichever is further."""
+        f = self.done / self.max_iters if self.max_iters else 1.0
+        if self.time_budget_s:
+            f = max(f, min(1.0, self.elapsed() / self.time_budget_s))
+        return f
+
+    def state(self):
+        """Counters for a checkpoint (see restore)."""
+        return {
+            "done": self.done, "ref_score": self.ref_score, "since_improve": self.since_improve,
+            "step_s": self.step_s, "elapsed_s": self.elapsed(),
+        }
+
+    def restore(self, state):
+        """Continue from a checkpoint; the time already spent counts against the budget."""
+        self.done = state["done"]
+        self.ref_score = state["ref_score"]
+        self.since_improve = state["since_improve"]
+        self.step_s = state["step_s"]
+        self.t0 = time.time() - state["elapsed_s"]
+
+    def meta(self):
+        return {
+            "sa_stop_reason": self.reason,
+            "sa_evaluations": self.done,
+            "sa_elapsed_s": round(self.elapsed(), 3),
+            "sa_time_budget_s": self.time_budget_s,
+            "sa_stall_window": self.stall_window,
+            "sa_min_improvement": self.min_improvement,
+        }
@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+CHECKPOINT_FILE = "sa_checkpoint.json"
+BEST_PLAN_FILE = "best_plan.pkl"
+
+
+def rng_state_to_json(state):
+    """random.getstate() -> JSON-able list (the Mersenne state tuple becomes a list)."""
+    version, internal, gauss = state
+    return [version, list(internal), gauss]
+
+
+def rng_state_from_json(obj):
+    version, internal, gauss = obj
+    return version, tuple(internal), gauss
+
+
+def _write_atomic(path, write):
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    tmp.replace(path)
+
+
+def save_checkpoint(run_dir, state):
+    """Write the SA state of a run to run_dir/sa_checkpoint.json (replaced atomically)."""
+    path = Path(run_dir) / CHECKPOINT_FILE
+    _write_atomic(path, lambda p: p.write_text(json.dumps(state, default=str), encoding="utf-8"))
+    return path
+
+
+def load_checkpoint(run_dir):
+    path = Path(run_dir) / CHECKPOINT_FILE
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"[CKPT] Could not read {path}: {e}")
+        return None
+
+
+def save_best_plan(run_dir, plan, late, unplaced):
+    """Pickle the best plan/late/unplaced frames, so a resumed run can write them as they were."""
+    path = Path(run_dir) / BEST_PLAN_FILE
+    _write_atomic(path, lambda p: pd.to_pickle((plan, late, unplaced), p))
+    return path
+
+
+def load_best_plan(path):
+    return pd.read_pickle(path)
+
+
+def mark_cancelled(run_dir):
+    """Flag a run's checkpoint as cancelled: only resuming it by run id continues it."""
+    ckpt = load_checkpoint(run_dir)
+    if ckpt is not None:
+        ckpt["cancelled"] = True
+        save_checkpoint(run_dir, ckpt)
+
+
+def clear_checkpoint(run_dir):
+    """Drop the checkpoint and best plan of a run that finished: nothing is left to resume."""
+    for name in (CHECKPOINT_FILE, BEST_PLAN_FILE):
+        (Path(run_dir) / name).unlink(missing_ok=True)
+
+
+def latest_resumable_run(runs_root):
+    """Newest run dir under runs_root with a checkpoint that was not cancelled, or None."""
+    runs_root = Path(runs_root)
+    if not runs_root.exists():
+        return None
+    for d in sorted(runs_root.iterdir(), reverse=True):
+        ckpt = load_checkpoint(d)
+        if ckpt is not None and not ckpt.get("cancelled"):
+            return d
+    return None
@@ -2,341 +2,244 @@ import heapq, math
 import pandas as pd
 from .config import (
     DEFAULT_WEIGHTS, GRACE_DAYS, INDUSTRIAL_FACTOR,
-    SCHEDULE_RT
+    SCHEDULE_RT, ROUGH_END_CACHE_SIZE, INCLUDE_NON_EFFECTIVE_IN_ONTIME
 )
-from .windows import build_windows
+from .machine_calendar import GAP_TOL_MIN
+from .problem import compile_problem
+from .scoring import FEATURES, OS5_ABSOLUTE, static_scores, weight_vector
+from .plan_buffer import PlanBuffer
+from .bounded_cache import BoundedCache, merge_stats
+from .ready_index import ReadyIndex, CLS_PLAIN, CLS_NONEFF, CLS_NODDL, bucket_of
 from collections import deque
 import numpy as np
 
 
-# helpers
-def to_int(v, default=0):
-    x = pd.to_numeric(v, errors="coerce")
-    return int(default if pd.isna(x) else x)
-
-
-def to_int_nonneg(v, default=0):
-    x = to_int(v, default)
-    return x if x >= 0 else 0
-
-
-def minutes_between(a, b):
-    try:
-        if pd.isna(a) or pd.isna(b):
-            return 0
-        delta = b - a
-        if delta == pd.NaT:
-            return 0
-        return int(delta.total_seconds() // 60)
-    except:
-        return 0
-
-
-def has_effective_deadline(row) -> bool:
-    ddl = row.get("effective_deadline")
-    return isinstance(ddl, pd.Timestamp) and pd.notna(ddl) and ddl.year >= 2025
-
-
-# scoring
-def heap_key(row, earliest_ts, cont_same_machine, weights, now_ts):
-    ddl = row.get("effective_deadline")
-    has_ddl = 0 if (isinstance(ddl, pd.Timestamp) and pd.notna(ddl)) else 1
-    ddl_minutes = max(0, minutes_between(now_ts, ddl)) if pd.notna(ddl) else 10_000_000
-
-    grp = row['_pg']
-    ost = row['_os']
-
-    if ost == 5:
-        lateness = 0
-        duration_late = 0
-        if pd.notna(ddl):
-            ddl_minutes = 0  # treat as urgent
-
-    dur = row['_dur']
-    # Absolute OS5 priority ONLY for real (capacity-consuming) work
-    if ost == 5 and dur > 0:
-        return -1e12
-
-    cont = 0 if cont_same_machine else 1
-
-    pos = row['_pos']
-    earliest_min = max(0, minutes_between(now_ts, earliest_ts))
-
-    lateness = 0
-    duration_late = 0
-    spt_near = 0
-    if pd.notna(ddl):
-        late_min = minutes_between(ddl, earliest_ts)
-        lateness = max(0, late_min)
-        if lateness > 0:
-            duration_late = dur
-        if ddl_minutes <= 2 * 24 * 60:
-            spt_near = dur
-
-    f = {
-        "w_has_ddl": has_ddl,
-        "w_priority": grp,
-        "w_orderstate": -ost * 100,
-        "w_cont": cont,
-        "w_ddl_minutes": ddl_minutes,
-        "w_lateness": lateness,
-        "w_duration_late": duration_late,
-        "w_spt_near": spt_near,
-        "w_earliest": earliest_min,
-        "w_duration": dur,
-        "w_orderpos": -pos,
-    }
-    return sum(weights.get(k, 0.0) * v for k, v in f.items())
+class ScheduleAborted(Exception):
+    """schedule() gave up: its plan_score can no longer reach abort_below."""
 
+    def __init__(self, bound):
+        super().__init__(bound)
+        self.bound = bound
 
-def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set, weights, now_ts, cancel_check=None,
-             locked_ops=None, freeze_until=None, freeze_pg2=False, pinned_starts=None, skip_os5_seeding=False):
-    pinned_starts = pinned_starts or {}
-
-    def _to_naive_utc(x):
-        """
-        Normalize any datetime-like to tz-naive Timestamp.
-        - If input has timezone (e.g. '...Z'), convert to UTC and drop tz.
-        - If input is naive already, keep as-is.
-        """
-        ts = pd.to_datetime(x, errors="coerce", utc=True)
-        if pd.isna(ts):
-            return ts
-        return ts.tz_convert(None)
-
-    pinned_starts = {str(k).strip(): _to_naive_utc(v) for k, v in pinned_starts.items()}
-
-    windows_by_wp, earliest_global, first_by_wp = build_windows(shifts, now_ts)
 
-    # FREEZE HORIZON ENFORCEMENT
-    locked_df = None
-    locked_ids = set()
-    locked_plan_rows = []
+def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set, weights, now_ts, cancel_check=None,
+             locked_ops=None, freeze_until=None, freeze_pg2=False, pinned_starts=None, skip_os5_seeding=False,
+             job_table=None, job_graph=None, cache_stats=None, problem=None, abort_below=None):
+    # everything that does not depend on the weights (run.py compiles it once
+    # per run and passes it in; standalone callers get it built here)
+    prob = problem if problem is not None else compile_problem(
+        jobs, shifts, pred_sets, succ_multi, outsourcing_set, now_ts, locked_ops=locked_ops,
+        freeze_until=freeze_until, freeze_pg2=freeze_pg2, pinned_starts=pinned_starts,
+        job_table=job_table, job_graph=job_graph,
+    )
+
+    # All scheduling times below are int epoch minutes (None = no time);
+    # Timestamps only come back when plan_df is built.
+    now_m = prob.now_m
+    earliest_global_m = prob.earliest_global_m
+    freeze_until_m = prob.freeze_until_m
+    freeze_pg2 = prob.freeze_pg2
+
+    # Inside this function a job is its row number in the job table and a
+    # workplace its machine number; job_id and WorkPlaceNo strings only come
+    # back when rows are written out.
+    jt = prob.jt
+    ids = jt.ids
+    n_jobs = len(jt)
+    machines = jt.machines
+    n_mach = len(machines)
+
+    # pred/succ as tuples of job numbers; n_jobs stands for "unknown job"
+    graph = prob.graph
+    preds_of, succs_of = graph.preds, graph.succs
+
+    # plain-list views of the columns used in the hot paths
+    wp_of = jt.wp
+    wpm_of = jt.wp_id.tolist()
+    pg_of = jt.pg.tolist()
+    os_of = jt.os.tolist()
+    dur_of = jt.dur.tolist()
+    buf_raw_of = jt.buf_raw.tolist()
+    pos_of = jt.pos.tolist()
+    rec_of = jt.rec.tolist()
+    ddl_of = jt.ddl_min
+    eff_ddl_of = jt.eff_ddl
+    date_start_of = jt.date_start_min
+
+    # heap_key = static per-job part (feature columns . weights, once per
+    # call) + the terms that depend on the pick: earliest start, lateness
+    # against it and same-machine continuation. weights is a dict or a
+    # vector in FEATURES order.
+    wv = weight_vector(weights)
+    static_sc = static_scores(jt.score_features(now_m), wv).tolist()
+    os5_abs = ((jt.os == 5) & (jt.dur > 0)).tolist()
+    w_cont = float(wv[FEATURES.index("w_cont")])
+    w_lateness = float(wv[FEATURES.index("w_lateness")])
+    w_duration_late = float(wv[FEATURES.index("w_duration_late")])
+    w_earliest = float(wv[FEATURES.index("w_earliest")])
+
+    def heap_key(jid, earliest_min, cont_same_machine):
+        """Priority of job jid (lower = picked first)."""
+        if os5_abs[jid]:
+            return OS5_ABSOLUTE
+        sc = static_sc[jid] + w_earliest * max(0, earliest_min - now_m)
+        if not cont_same_machine:
+            sc += w_cont
+        ddl = ddl_of[jid]
+        if ddl is not None and earliest_min > ddl:
+            sc += w_lateness * (earliest_min - ddl) + w_duration_late * dur_of[jid]
+        return sc
+
+    pin_of = prob.pin_of
+    locked = prob.locked
 
     def _is_locked(jid):
-        return str(jid).strip() in locked_ids
-
-    if locked_ops is not None and len(locked_ops) > 0:
-        locked_df = locked_ops.copy()
-
-        # Ensure columns exist (matches your plan.csv columns)
-        needed = ["job_id", "WorkPlaceNo", "Start", "End"]
-        if not all(c in locked_df.columns for c in needed):
-            print(f"[FREEZE] locked_ops missing columns; skipping locks. Have={list(locked_df.columns)}")
-            locked_df = None
-
-    if locked_df is not None:
-        locked_df["job_id"] = locked_df["job_id"].astype(str).str.strip()
-        locked_df["WorkPlaceNo"] = locked_df["WorkPlaceNo"].astype(str).str.strip()
-        locked_df["Start"] = pd.to_datetime(locked_df["Start"], errors="coerce")
-        locked_df["End"] = pd.to_datetime(locked_df["End"], errors="coerce")
-
-        if "Duration" in locked_df.columns:
-            dur0 = pd.to_numeric(locked_df["Duration"], errors="coerce").fillna(0).astype(int).eq(0)
-            m = dur0 & locked_df["Start"].notna() & locked_df["End"].isna()
-            locked_df.loc[m, "End"] = locked_df.loc[m, "Start"]
-
-            # If End missing but Start exists (even without Duration), assume instantaneous lock
-        m2 = locked_df["Start"].notna() & locked_df["End"].isna()
-        locked_df.loc[m2, "End"] = locked_df.loc[m2, "Start"]
-
-        before = len(locked_df)
-
-        bad_start = locked_df["Start"].isna().sum()
-        bad_end = locked_df["End"].isna().sum()
-        bad_order = (locked_df["End"] < locked_df["Start"]).sum()
-
-        print(f"[FREEZE-DBG] locked_ops rows={before} bad_start={bad_start} bad_end={bad_end} end<start={bad_order}")
-
-        locked_df = locked_df[
-            locked_df["Start"].notna()
-            & locked_df["End"].notna()
-            & (locked_df["End"] >= locked_df["Start"])  # <-- allow 0 duration
-            ].copy()
-
-        locked_ids = set(locked_df["job_id"].tolist())
-        print(f"[FREEZE] Applying locks: {len(locked_ids)} ops")
-
-
-
-        # Helper: subtract [a,b) from a machine's windows
-        def _subtract_interval(wdf, a, b):
-            # 0-duration locks should NOT eat capacity
-            if pd.isna(a) or pd.isna(b) or b <= a:
-                nd = wdf.copy()
-                if "cursor" not in nd.columns:
-                    nd["cursor"] = nd["start"]
-                return nd
-            out = []
-            for _, rr in wdf.iterrows():
-                s, e = rr["start"], rr["end"]
-                if e <= a or s >= b:
-                    out.append((s, e))
-                    continue
-                if s < a:
-                    out.append((s, a))
-                if b < e:
-                    out.append((b, e))
-            nd = pd.DataFrame(out, columns=["start", "end"])
-            if nd.empty:
-                return nd.assign(cursor=pd.NaT)
-            nd["cursor"] = nd["start"]
-            return nd[nd["end"] > nd["start"]].reset_index(drop=True)
-
-        # Remove locked capacity from windows_by_wp BEFORE normalizing to wins
-        for wp, g in locked_df.groupby("WorkPlaceNo", sort=False):
-            wpU = str(wp).strip().upper()
-            if wpU not in {str(k).strip().upper() for k in windows_by_wp.keys()}:
-                # windows_by_wp keys might not be upper yet; we'll handle via wins below
-                pass
-
-        # We'll apply subtraction after wins is created (keys upper)
-
-    # normalize window dict to UPPER keys to avoid mismatches
-    wins = {str(wp).strip().upper(): df.copy() for wp, df in windows_by_wp.items()}
-    for df in wins.values():
-        if "cursor" not in df.columns:
-            df["cursor"] = df["start"]  # safety
-
-    # Apply locked intervals onto normalized windows (wins)
-    if locked_df is not None and len(locked_df) > 0:
-        locked_df_cap = locked_df
-        if "PriorityGroup" in locked_df_cap.columns:
-            allowed = [0, 1] + ([2] if freeze_pg2 else [])
-            locked_df_cap = locked_df_cap[
-                locked_df_cap["PriorityGroup"].apply(lambda x: to_int(x, 2)).isin(allowed)
-            ]
-
-        if len(locked_df_cap) > 0:
-            for wp, g in locked_df_cap.groupby("WorkPlaceNo", sort=False):
-                wpU = str(wp).strip().upper()
-                if wpU not in wins:
-                    continue
-                wdf = wins[wpU]
-                for _, rr in g.iterrows():
-                    wdf = _subtract_interval(wdf, rr["Start"], rr["End"])
-                wins[wpU] = wdf
+        return locked[jid]
+
+    # calendars with the locked intervals already cut out; this call's copy
+    wins = prob.fresh_calendars()
+    cal_machines = prob.cal_machines
 
-    wp_ptr = {wp: 0 for wp in wins}
+    wp_ptr = [0] * n_mach
     if cancel_check and cancel_check():
         return None, None, None
 
-    unlimited_upper = {str(x).strip().upper() for x in unlimited_set}
-    outsourcing_upper = {str(x).strip().upper() for x in outsourcing_set}
-    plan_rows = []
-    end_times = {}
-    placed = set()
-
-    # jobs map
-    jobdict = {str(r["job_id"]).strip(): r for _, r in jobs.iterrows()}
-
-    # Pre-normalized fields already exist in DataFrame (done once in run.py)
-    # Just verify they're present for debugging
-    if '_wpU' not in jobdict[next(iter(jobdict))]:
-        print("[WARNING] Pre-normalized fields missing! This shouldn't happen.")
-
-    # indegree init
-    indeg = {jid: len(pred_sets.get(jid, set())) for jid in jobdict.keys()}
+    # per-machine flags
+    is_outs_m = prob.is_outs_m
+    bad_wp_m = prob.bad_wp_m
+    first_wp_m = prob.first_wp_m
+    ap0031 = jt.machine_index.get("AP0031")
+
+    plan_buf = PlanBuffer()
+    # on-time/within-2d/beyond-7d counts of the plan so far (locked rows
+    # included); open counts the jobs that may still add a KPI row. With
+    # abort_below set, the pass stops once even placing all of them on time
+    # could not lift plan_score() to it.
+    kpi = prob.locked_kpi.copy()
+    kpi_row = [1] * n_jobs if INCLUDE_NON_EFFECTIVE_IN_ONTIME else [int(d is not None) for d in ddl_of]
+    kpi.open = sum(kpi_row)
+    # resolved[j]: j placed or given up; end_times[j] its end (None if given up)
+    resolved = bytearray(n_jobs + 1)
+    end_times = [None] * (n_jobs + 1)
+    # pred_ready[j]: latest end over j's preds that have one, plus the
+    # transfer buffer for preds on another machine (see _propagate_end)
+    pred_ready = [None] * (n_jobs + 1)
+    placed = bytearray(n_jobs + 1)
+
+    # readiness counters: indeg[j] = preds not yet placed and released,
+    # unresolved[j] = preds not yet resolved (placed or given up). A job is
+    # ready once both are 0; one whose indeg hits 0 first waits in
+    # pending_ready until _mark_resolved queues it on ready_events.
+    indeg = [len(preds_of[j]) for j in range(n_jobs)] + [0]
+    unresolved = list(indeg)
+    ready_events = []
+
+    def _mark_resolved(jid):
+        if resolved[jid]:
+            return
+        resolved[jid] = 1
+        kpi.open -= kpi_row[jid]
+        for s in succs_of[jid]:
+            unresolved[s] -= 1
+            if unresolved[s] == 0 and s in pending_ready:
+                ready_events.append(s)
 
     # Fast ready-deadline sets
-    has_any_deadline = {}
-    has_effective_pg01 = {}
-    gap_eval_cache = {}
-    rough_end_cache = {}
+    has_any_deadline = [False] * n_jobs
+    has_effective_pg01 = [False] * n_jobs
+    ready_bucket = prob.ready_bucket
+    # keyed on the calendar version: any placement on wpm invalidates its entries
+    rough_end_cache = BoundedCache(ROUGH_END_CACHE_SIZE)
     # pred -> specific OS5 job remaining minutes (NOT wp)
-    os5_remaining_minutes_job = {}  # (pred_jid, os5_jid) -> minutes or None
-    rem_cache_job = {}  # (jid, os5_jid) -> minutes
-    rem_visiting_job = set()  # (jid, os5_jid)
+    os5_remaining_minutes_job = graph.os5_remaining  # (pred_jid, os5_jid) -> minutes
     dirty_publish_wps = set()
     # jobs that are indeg==0 but must wait until preds_resolved() before entering heap
     pending_ready = set()
     dirty_best_wps = set()
-    os5_targets_by_wp = {}
-    os5_pred_eta = {}  # wpU -> Timestamp
+    os5_targets_by_wp = [set(t) for t in prob.os5_targets_by_wp]
+    os5_pred_eta = [None] * n_mach  # machine -> minute
     ready_heap = []
-    ready_by_wp = {wp: set() for wp in wins}
-    cont_ready_by_wp = {wp: set() for wp in wins}
+    # ready jobs per calendar machine for gap-fill/fallback, plus the
+    # zero-duration ones for the zero gate and a heap of outs milestones
+    ready_idx = [ReadyIndex() if wins[m] is not None else None for m in range(n_mach)]
+    zero_idx = [ReadyIndex(1) if wins[m] is not None else None for m in range(n_mach)]
+    # one (st_feas, -pos, sc, jid, wpm, gen) entry per machine, like best_wp_heap;
+    # a machine is republished when a zero op gets ready on it or it places a job
+    zero_heap = []
+    zero_gen = [0] * n_mach
+    dirty_zero_wps = set()
+    outs_ready = []  # (est, score, jid)
+    indexed = bytearray(n_jobs + 1)
+    cont_ready_by_wp = [set() for _ in range(n_mach)]
     os5_ready = set()
-    os5_ready_by_wp = {wp: set() for wp in wins}
 
     best_wp_heap = []
-    best_wp_gen = {wp: 0 for wp in wins}
+    best_wp_gen = [0] * n_mach
 
-    dead = set()
+    dead = bytearray(n_jobs + 1)
     OS5_UPSTREAM_BOOST = 5e11  # big, but still less than OS5 absolute priority (-1e12)
     # tiny upstream bonus (stronger but still small)
     UPSTREAM_EPS = 0.5
     # remember last placed per machine (for strict same-machine continuation)
-    machine_last_job = {}  # wpU -> job_id
+    machine_last_job = [None] * n_mach  # machine -> job
     ready_with_deadline = set()
     ready_with_effective_pg01 = set()
     # OS5 prediction system
-    OS5_PICK_HORIZON = pd.Timedelta(hours=1)
-    os5_lock_cache = {}
-    OS5_LOCK_HORIZON = pd.Timedelta(days=1)
-    os5_lock_until = {}
-    os5_upstream_jobs = set()
+    OS5_PICK_HORIZON = 60
+    os5_lock_cache = [None] * n_mach
+    OS5_LOCK_HORIZON = 24 * 60
+    os5_lock_until = [None] * n_mach
     seeded_pred = set()
 
     LOOKAHEAD = 20
-    GAP_TOL = pd.Timedelta(minutes=1)
-
-    for jid, rr in jobdict.items():
-        if cancel_check and cancel_check():
-            return None, None, None
-        if rr['_os'] == 5:
-            if _is_locked(jid):  # ✅ NEW
-                continue
-            wpU = rr['_wpU']
-            if wpU and wpU != "TBA":
-                os5_targets_by_wp.setdefault(wpU, set()).add(jid)
 
     os5_eta_by_job = {}
-    os5_pred_to_jobs = {}
-
-    for jid, r in jobdict.items():
+    # per machine: (eta, os5 job) min-heap, stale entries dropped lazily, and
+    # the targets whose eta/earliest start changed since the last recompute
+    os5_eta_heap = [[] for _ in range(n_mach)]
+    os5_eta_dirty = [set(tgts) for tgts in os5_targets_by_wp]
+    # os5 job -> preds whose (pred, os5) key is in seeded_pred
+    seeded_by_os5 = {}
+
+    for jid in range(n_jobs):
         if cancel_check and cancel_check():
             return None, None, None
-        ddl = r.get("effective_deadline")
-        has_any_deadline[jid] = pd.notna(ddl)
-        has_effective_pg01[jid] = (r['_pg'] in (0, 1) and has_effective_deadline(r))
+        has_any_deadline[jid] = ddl_of[jid] is not None
+        has_effective_pg01[jid] = (pg_of[jid] in (0, 1) and eff_ddl_of[jid])
 
-    def _is_outs_milestone(row) -> bool:
-        wpU = row['_wpU']
-        return (wpU in outsourcing_upper) and (row['_os'] > 3)
+    def _is_outs_milestone(jid) -> bool:
+        return is_outs_m[wpm_of[jid]] and (os_of[jid] > 3)
 
     def _has_real_pred(jid) -> bool:
-        """Any predecessor that consumes capacity (PG in {0,1}) and is known in jobdict."""
-        preds = pred_sets.get(jid, set())
-        for p in preds:
-            prow = jobdict.get(p)
-            if prow is None:
+        """Any predecessor that consumes capacity (PG in {0,1}) and is a known job."""
+        for p in preds_of[jid]:
+            if p == n_jobs:
                 continue
-            if prow['_pg'] in (0, 1):
+            if pg_of[p] in (0, 1):
                 return True
         return False
 
-    def _apply_freeze_shift(row, est):
+    def _apply_freeze_shift(jid, est):
         """Shift op's earliest start to freeze_until if needed."""
-        if freeze_until is None or pd.isna(est):
+        if freeze_until_m is None or est is None:
             return est
 
-        pg = row['_pg']
+        pg = pg_of[jid]
 
-        if pg in (0, 1) and est < freeze_until:
-            return freeze_until
+        if pg in (0, 1) and est < freeze_until_m:
+            return freeze_until_m
 
-        if pg == 2 and freeze_pg2 and est < freeze_until:
-            return freeze_until
+        if pg == 2 and freeze_pg2 and est < freeze_until_m:
+            return freeze_until_m
 
         return est
 
     def _refresh_ready_sets_for(jid):
-        if jid in placed or indeg.get(jid, 0) != 0:
+        if placed[jid] or indeg[jid] != 0:
             return
-        if has_any_deadline.get(jid, False):
+        if has_any_deadline[jid]:
             ready_with_deadline.add(jid)
-        if has_effective_pg01.get(jid, False):
+        if has_effective_pg01[jid]:
             ready_with_effective_pg01.add(jid)
 
     def _remove_from_ready_sets(jid):
@@ -349,154 +252,112 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
     def any_effective_remaining_pg01():
         return bool(ready_with_effective_pg01)
 
-    def _collect_all_upstream(start_jid):
-        seen = set()
-        stack = [start_jid]
-        while stack:
-            if cancel_check and cancel_check():
-                return seen
-            cur = stack.pop()
-            for p in pred_sets.get(cur, set()):
-                if p not in seen:
-                    seen.add(p)
-                    stack.append(p)
-        return seen
+    def _cursor_at(wdf, idx):
+        return int(wdf.cursor[idx])
 
     def preview_end_in_windows_pg01(wdf, idx0, est, dur_min):
         """Non-mutating end-time preview for PG0/1 op."""
         if wdf is None or wdf.empty:
-            return pd.NaT
+            return None
         if dur_min <= 0:
             return est
+        return wdf.preview_end_pg01(idx0, est, dur_min)
 
-        n = len(wdf)
-        idx = idx0
-        while idx < n and not (wdf.at[idx, "end"] > est):
-            idx += 1
-        if idx >= n:
-            return pd.NaT
-
-        remain = int(dur_min)
-        curr = est
-
-        while idx < n and remain > 0:
-            ws, we = wdf.at[idx, "start"], wdf.at[idx, "end"]
-            cur = wdf.at[idx, "cursor"]
-            s = max(ws, cur, curr)
-            if s >= we:
-                idx += 1
-                continue
-            free = minutes_between(s, we)
-            if free <= 0:
-                idx += 1
-                continue
-            take = min(remain, free)
-            e = s + pd.Timedelta(minutes=take)
-            remain -= take
-            curr = e
-            if remain > 0 and e >= we:
-                idx += 1
-
-        if remain > 0:
-            return pd.NaT
-        return curr
-
-    def _rough_end_for_prediction(jid, row, est):
-        wpU = row['_wpU']
-        wdf = wins.get(wpU)
+    def _rough_end_for_prediction(jid, est):
+        wpm = wpm_of[jid]
+        wdf = wins[wpm]
         if wdf is None or wdf.empty:
             return est
 
-        idx0 = wp_ptr.get(wpU, 0)
+        idx0 = wp_ptr[wpm]
         if idx0 >= len(wdf):
             return est
 
-        dur = row['_dur']
+        dur = dur_of[jid]
         if dur <= 0:
             return est
 
-        cursor0 = wdf.at[idx0, "cursor"]
-        ck = (wpU, idx0, cursor0, est, dur)
+        ck = (wpm, wdf.version, idx0, est, dur)
         hit = rough_end_cache.get(ck)
         if hit is not None:
             return hit
 
         end_pred = preview_end_in_windows_pg01(wdf, idx0, est, dur)
-        if pd.isna(end_pred):
-            end_pred = est + pd.Timedelta(minutes=dur)
+        if end_pred is None:
+            end_pred = est + dur
 
-        rough_end_cache[ck] = end_pred
+        rough_end_cache.put(ck, end_pred)
         return end_pred
 
-    def earliest_start_for(jid, row):
+    def _propagate_end(jid):
+        """Fold end_times[jid] into pred_ready of its successors."""
+        end = end_times[jid]
+        if end is None:
+            return
+        wpm = wpm_of[jid]
+        cross = end + buf_raw_of[jid]
+        for s in succs_of[jid]:
+            r = end if wpm_of[s] == wpm else cross
+            cur = pred_ready[s]
+            if cur is None or r > cur:
+                pred_ready[s] = r
+                if os_of[s] == 5:
+                    os5_eta_dirty[wpm_of[s]].add(s)
+
+    def earliest_start_for(jid):
         if cancel_check and cancel_check():
-            return now_ts
-
-        wp = str(row.get("WorkPlaceNo")).strip()
-        wpU = wp.upper()
-
-        preds = pred_sets.get(jid, set())
-        ready_times = []
-        for p in preds:
-            if p in end_times:
-                prow = jobdict.get(p, {})
-                if str(prow.get("WorkPlaceNo", "")).strip().upper() == wpU:
-                    ready_times.append(end_times[p])
-                else:
-                    buf = int(pd.to_numeric(prow.get("buffer_min", 0), errors="coerce") or 0)
-                    et = pd.to_datetime(end_times.get(p), errors="coerce")
-                    if pd.notna(et):
-                        ready_times.append(et + pd.Timedelta(minutes=buf))
-
-        if _is_outs_milestone(row):
-            ev = pd.to_datetime(row.get("DateStart"), errors="coerce")
-            if pd.notna(ev) and ev > now_ts:
+            return now_m
+
+        wpm = wpm_of[jid]
+        ready = pred_ready[jid]
+
+        if _is_outs_milestone(jid):
+            ev = date_start_of[jid]
+            if ev is not None and ev > now_m:
                 est = ev
             else:
-                if _has_real_pred(jid) and ready_times:
-                    est = max(ready_times)
+                if ready is not None and _has_real_pred(jid):
+                    est = ready
                 else:
-                    est = now_ts
-            est = _apply_freeze_shift(row, est)
+                    est = now_m
+            est = _apply_freeze_shift(jid, est)
             return est
 
-        candidates = [now_ts, earliest_global]
-        if ready_times:
-            candidates.append(max(ready_times))
+        est = max(now_m, earliest_global_m)
+        if ready is not None and ready > est:
+            est = ready
 
-        first_wp = first_by_wp.get(wpU, pd.NaT)
-        if pd.notna(first_wp):
-            candidates.append(first_wp)
+        first_wp = first_wp_m[wpm]
+        if first_wp is not None and first_wp > est:
+            est = first_wp
 
-        if wpU in outsourcing_upper:
-            ev_gate = row.get("DateStart")
-            os = row['_os']
-            if pd.notna(ev_gate) and os > 3:
-                candidates.append(ev_gate)
+        if is_outs_m[wpm]:
+            ev_gate = date_start_of[jid]
+            if ev_gate is not None and os_of[jid] > 3 and ev_gate > est:
+                est = ev_gate
 
-        est = max(candidates)
-        est = _apply_freeze_shift(row, est)
+        est = _apply_freeze_shift(jid, est)
         # ✅ STEP 2a: interactive pin (user move)
-        pin = pinned_starts.get(str(jid).strip())
-        if pd.notna(pin):
-            est = max(est, pin)
+        pin = pin_of.get(jid)
+        if pin is not None and pin > est:
+            est = pin
 
         return est
 
-    def fits_before_os5_lock(wpU, st_feas, dur_min):
-        lock_until = os5_lock_until.get(wpU, pd.NaT)
-        if pd.isna(lock_until):
-            lock_until = os5_barrier_for_wp(wpU)
+    def fits_before_os5_lock(wpm, st_feas, dur_min):
+        lock_until = os5_lock_until[wpm]
+        if lock_until is None:
+            lock_until = os5_barrier_for_wp(wpm)
 
-        if pd.isna(lock_until):
+        if lock_until is None:
             return True
 
-        wdf = wins.get(wpU)
+        wdf = wins[wpm]
         if wdf is None or wdf.empty:
             return True
 
-        idx0 = wp_ptr.get(wpU, 0)
-        t0 = max(now_ts, wdf.at[idx0, "cursor"])
+        idx0 = wp_ptr[wpm]
+        t0 = max(now_m, _cursor_at(wdf, idx0))
 
         if lock_until <= t0:
             return dur_min == 0 and st_feas <= t0
@@ -504,261 +365,160 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
         if dur_min <= 0:
             return st_feas <= lock_until
 
-        end_if_run = preview_end_in_windows_pg01(wdf, idx0, st_feas, dur_min)
-        if pd.isna(end_if_run):
+        # enough free capacity before the lock <=> the op would end before it
+        if wdf.capacity_between(idx0, st_feas, lock_until) >= dur_min:
             return True
-        return end_if_run <= lock_until
+        # an op that can never finish does not block (same as before)
+        return wdf.preview_end_pg01(idx0, st_feas, dur_min) is None
 
-    def update_os5_lock_for_wp(wpU):
-        eta = os5_pred_eta.get(wpU, pd.NaT)
+    def update_os5_lock_for_wp(wpm):
+        eta = os5_pred_eta[wpm]
 
-        if pd.isna(eta):
-            os5_lock_until.pop(wpU, None)
-            os5_lock_cache.pop(wpU, None)
+        if eta is None:
+            os5_lock_until[wpm] = None
+            os5_lock_cache[wpm] = None
             return
 
-        wdf = wins.get(wpU)
+        wdf = wins[wpm]
         if wdf is None or wdf.empty:
             return
 
-        idx0 = wp_ptr.get(wpU, 0)
-        t0 = max(now_ts, wdf.at[idx0, "cursor"])
+        idx0 = wp_ptr[wpm]
+        t0 = max(now_m, _cursor_at(wdf, idx0))
 
         if eta <= t0:
-            os5_lock_until.pop(wpU, None)
-            os5_lock_cache.pop(wpU, None)
+            os5_lock_until[wpm] = None
+            os5_lock_cache[wpm] = None
 
-            if os5_targets_by_wp.get(wpU):
-                os5_pred_eta[wpU] = t0
+            if os5_targets_by_wp[wpm]:
+                os5_pred_eta[wpm] = t0
             else:
-                os5_pred_eta.pop(wpU, None)
+                os5_pred_eta[wpm] = None
             return
 
         if eta > (t0 + OS5_LOCK_HORIZON):
-            os5_lock_until.pop(wpU, None)
+            os5_lock_until[wpm] = None
             return
 
-        c = os5_lock_cache.get(wpU)
+        c = os5_lock_cache[wpm]
         if c is not None:
             c_idx0, c_t0, c_eta, c_lock = c
             if c_idx0 == idx0 and c_t0 == t0 and c_eta == eta:
-                if pd.notna(c_lock):
-                    os5_lock_until[wpU] = c_lock
+                if c_lock is not None:
+                    os5_lock_until[wpm] = c_lock
                 return
 
         lock_feas = first_feasible_start_pg01(wdf, idx0, eta)
-        os5_lock_cache[wpU] = (idx0, t0, eta, lock_feas)
+        os5_lock_cache[wpm] = (idx0, t0, eta, lock_feas)
 
-        if pd.isna(lock_feas):
+        if lock_feas is None:
             return
 
-        prev = os5_lock_until.get(wpU, pd.NaT)
-        if pd.isna(prev) or lock_feas < prev:
-            os5_lock_until[wpU] = lock_feas
+        prev = os5_lock_until[wpm]
+        if prev is None or lock_feas < prev:
+            os5_lock_until[wpm] = lock_feas
 
-    def os5_barrier_for_wp(wpU):
-        """FEASIBLE boundary time for upcoming OS5 on wpU."""
-        eta = os5_pred_eta.get(wpU, pd.NaT)
-        if pd.isna(eta):
-            return pd.NaT
+    def os5_barrier_for_wp(wpm):
+        """FEASIBLE boundary time for upcoming OS5 on machine wpm."""
+        eta = os5_pred_eta[wpm]
+        if eta is None:
+            return None
 
-        wdf = wins.get(wpU)
+        wdf = wins[wpm]
         if wdf is None or wdf.empty:
-            return pd.NaT
+            return None
 
-        idx0 = wp_ptr.get(wpU, 0)
-        t0 = max(now_ts, wdf.at[idx0, "cursor"])
+        idx0 = wp_ptr[wpm]
+        t0 = max(now_m, _cursor_at(wdf, idx0))
 
-        c = os5_lock_cache.get(wpU)
+        c = os5_lock_cache[wpm]
         if c is not None:
             c_idx0, c_t0, c_eta, c_bar = c
             if c_idx0 == idx0 and c_t0 == t0 and c_eta == eta:
                 return c_bar
 
         bar = first_feasible_start_pg01(wdf, idx0, eta)
-        os5_lock_cache[wpU] = (idx0, t0, eta, bar)
+        os5_lock_cache[wpm] = (idx0, t0, eta, bar)
         return bar
 
-    for os5_jid, r in jobdict.items():
-        if cancel_check and cancel_check():
-            return None, None, None
-        if r['_os'] != 5:
-            continue
-        if _is_locked(os5_jid):  # ✅ NEW
-            continue
-
-        wp_os5 = r['_wpU']
-        if not wp_os5 or wp_os5 == "TBA":
-            continue
-
-        upstream = _collect_all_upstream(os5_jid)
-        os5_upstream_jobs |= upstream
+    # transitive OS5 upstream closures come precomputed with the graph
+    os5_pred_to_jobs = graph.os5_pred_map(
+        [j for j in graph.os5_jobs if not _is_locked(j) and not bad_wp_m[wpm_of[j]]])
+    os5_upstream_jobs = os5_pred_to_jobs.keys()
 
-        for p in upstream:
-            os5_pred_to_jobs.setdefault(p, set()).add(os5_jid)
+    def _set_os5_eta(j, eta):
+        os5_eta_by_job[j] = eta
+        os5_eta_dirty[wpm_of[j]].add(j)
 
-    def recompute_wp_os5_eta(wpU):
-        tgts = os5_targets_by_wp.get(wpU)
+    def recompute_wp_os5_eta(wpm):
+        tgts = os5_targets_by_wp[wpm]
         if not tgts:
-            os5_pred_eta.pop(wpU, None)
-            os5_lock_until.pop(wpU, None)
-            os5_lock_cache.pop(wpU, None)
+            os5_pred_eta[wpm] = None
+            os5_lock_until[wpm] = None
+            os5_lock_cache[wpm] = None
             return
 
-        best = pd.NaT
-        for j in tgts:
-            if j in placed:
+        # only targets whose ETA or earliest start moved need a new entry;
+        # for the rest max(eta, earliest start) is still the stored eta
+        h = os5_eta_heap[wpm]
+        for j in os5_eta_dirty[wpm]:
+            if placed[j] or j not in tgts:
                 continue
-
-            rowj = jobdict.get(j)
-            if rowj is None:
-                continue
-
-            base = earliest_start_for(j, rowj)
-            eta = os5_eta_by_job.get(j, pd.NaT)
-            eta = base if pd.isna(eta) else max(eta, base)
-
+            base = earliest_start_for(j)
+            eta = os5_eta_by_job.get(j)
+            eta = base if eta is None else max(eta, base)
             os5_eta_by_job[j] = eta
+            heapq.heappush(h, (eta, j))
+        os5_eta_dirty[wpm].clear()
 
-            if pd.isna(best) or eta < best:
-                best = eta
-
-        if pd.isna(best):
-            os5_pred_eta.pop(wpU, None)
-        else:
-            os5_pred_eta[wpU] = best
-
-    def os5_eta_for_wp(wpU):
-        eta = os5_pred_eta.get(wpU, pd.NaT)
-        if pd.notna(eta):
-            return eta
-
-        lu = os5_lock_until.get(wpU, pd.NaT)
-        if pd.notna(lu):
-            return lu
-
-        return pd.NaT
-
-    os5_all_preds_by_wp = {}
-    for os5_jid, rr in jobdict.items():
-        if cancel_check and cancel_check():
-            return None, None, None
-        if rr['_os'] == 5:
-            if _is_locked(os5_jid):  # ✅ NEW
-                continue
-            wpU = rr['_wpU']
-            if wpU and wpU != "TBA":
-                upstream = _collect_all_upstream(os5_jid)
-                os5_all_preds_by_wp.setdefault(wpU, set()).update(upstream)
-
-    os5_reachers_by_wp = {wpU: set(tgts) for wpU, tgts in os5_targets_by_wp.items()}
-    for wpU in os5_all_preds_by_wp:
-        os5_reachers_by_wp.setdefault(wpU, set()).update(os5_all_preds_by_wp[wpU])
-
-    rem_cache = {}
-    rem_visiting = set()
-
-    upstream_of_os5 = {}
-    for os5_jid, r in jobdict.items():
-        if cancel_check and cancel_check():
-            return None, None, None
-        if r['_os'] != 5:
-            continue
-        if _is_locked(os5_jid):  # ✅ NEW
-            continue
-        upstream_of_os5[os5_jid] = _collect_all_upstream(os5_jid)
-
-    def rem_to_os5_job(jid, os5_jid):
-        key = (jid, os5_jid)
-        if key in rem_cache_job:
-            return rem_cache_job[key]
-        if key in rem_visiting_job:
-            return None
-        if jid == os5_jid:
-            rem_cache_job[key] = 0
-            return 0
-
-        rem_visiting_job.add(key)
-        ups = upstream_of_os5.get(os5_jid, set())
-
-        best = None
-        for s in succ_multi.get(jid, ()):
-            if s != os5_jid and s not in ups:
-                continue
-
-            buf = to_int_nonneg(jobdict.get(jid, {}).get("buffer_min"), 0)
-
-            if s == os5_jid:
-                step = buf
-            else:
-                dur = to_int_nonneg(jobdict.get(s, {}).get("duration_min"), 0)
-                step = buf + dur
-
-            r = rem_to_os5_job(s, os5_jid)
-            if r is None:
-                continue
-
-            cand = step + r
-            if best is None or cand > best:
-                best = cand
-
-        rem_visiting_job.discard(key)
-        rem_cache_job[key] = best
-        return best
-
-
-
-    def _precompute_os5_remaining_job():
-        for pred_jid, os5_jobs in os5_pred_to_jobs.items():
-            if cancel_check and cancel_check():
-                return
-            for os5_jid in os5_jobs:
-                os5_remaining_minutes_job[(pred_jid, os5_jid)] = rem_to_os5_job(pred_jid, os5_jid)
-
-    _precompute_os5_remaining_job()
+        while h:
+            eta, j = h[0]
+            if not placed[j] and j in tgts and os5_eta_by_job.get(j) == eta:
+                break
+            heapq.heappop(h)
+        os5_pred_eta[wpm] = h[0][0] if h else None
 
     # ================= EARLY OS5 PREDICTION SEEDING =================
     if not skip_os5_seeding:
         print("Seeding early OS5 predictions...")
 
         # Seed base ETA for every OS5 job first
-        for wpU, tgts in os5_targets_by_wp.items():
+        for wpm, tgts in enumerate(os5_targets_by_wp):
+            if not tgts:
+                continue
             if cancel_check and cancel_check():
                 return None, None, None
             for os5_jid in tgts:
-                row_os5 = jobdict[os5_jid]
-                os5_eta_by_job[os5_jid] = earliest_start_for(os5_jid, row_os5)
-            recompute_wp_os5_eta(wpU)
+                _set_os5_eta(os5_jid, earliest_start_for(os5_jid))
+            recompute_wp_os5_eta(wpm)
 
         # Then seed predictions from ready upstream jobs
         for upstream_jid in os5_pred_to_jobs.keys():
             if cancel_check and cancel_check():
                 return None, None, None
-            if indeg.get(upstream_jid, 0) != 0:
+            if upstream_jid == n_jobs:
                 continue
-
-            row_up = jobdict.get(upstream_jid)
-            if row_up is None:
+            if indeg[upstream_jid] != 0:
                 continue
 
-            est0 = earliest_start_for(upstream_jid, row_up)
-            end0 = _rough_end_for_prediction(upstream_jid, row_up, est0)
+            est0 = earliest_start_for(upstream_jid)
+            end0 = _rough_end_for_prediction(upstream_jid, est0)
 
             for os5_jid in os5_pred_to_jobs.get(upstream_jid, ()):
                 rem = os5_remaining_minutes_job.get((upstream_jid, os5_jid))
                 if rem is None:
                     continue
 
-                cand = end0 + pd.Timedelta(minutes=int(rem))
-                prevj = os5_eta_by_job.get(os5_jid, pd.NaT)
+                cand = end0 + rem
+                prevj = os5_eta_by_job.get(os5_jid)
 
-                if pd.isna(prevj) or cand > prevj:
-                    os5_eta_by_job[os5_jid] = cand
+                if prevj is None or cand > prevj:
+                    _set_os5_eta(os5_jid, cand)
 
-                    wpU = str(jobdict[os5_jid].get("WorkPlaceNo", "")).strip().upper()
-                    if wpU and wpU != "TBA":
-                        recompute_wp_os5_eta(wpU)
-                        dirty_best_wps.add(wpU)
+                    wpm = wpm_of[os5_jid]
+                    if not bad_wp_m[wpm]:
+                        recompute_wp_os5_eta(wpm)
+                        dirty_best_wps.add(wpm)
 
         print(f"Seeded {len(os5_eta_by_job)} OS5 jobs")
     else:
@@ -769,234 +529,150 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
     # ===============================================================
 
     def is_upstream_pending(jid):
-        succs = succ_multi.get(jid, set())
-        return any(s not in placed for s in succs)
-
-    def is_continuation(jid, row):
-        preds = pred_sets.get(jid, set())
-        for p in preds:
-            if p in end_times:
-                prow = jobdict.get(p)
-                if prow is not None:
-                    if str(prow.get("WorkPlaceNo", "")).strip().upper() == str(
-                            row.get("WorkPlaceNo", "")).strip().upper():
-                        return True
+        return any(not placed[s] for s in succs_of[jid])
+
+    def is_continuation(jid):
+        wpm = wpm_of[jid]
+        for p in preds_of[jid]:
+            if resolved[p] and wpm_of[p] == wpm:
+                return True
         return False
 
-    def has_direct_continuation(jid, row):
-        wpU = row['_wpU']
-        last = machine_last_job.get(wpU)
-        if not last:
+    def has_direct_continuation(jid):
+        last = machine_last_job[wpm_of[jid]]
+        if last is None:
             return False
-        preds = pred_sets.get(jid, set())
-        return last in preds
+        return last in preds_of[jid]
 
-    def is_pg2_row(row) -> bool:
-        return row['_pg'] == 2
+    def is_pg2_job(jid) -> bool:
+        return pg_of[jid] == 2
 
     def preds_resolved(jid) -> bool:
-        for p in pred_sets.get(jid, set()):
-            if p not in end_times:
-                return False
-        return True
+        return unresolved[jid] == 0
 
-    def _first_feasible_start_cached(wpU, jid, row, est):
-        wdf = wins.get(wpU)
-        if wdf is None or wdf.empty:
-            return pd.NaT
-        idx0 = wp_ptr.get(wpU, 0)
-        return first_feasible_start_pg01(wdf, idx0, est)
+    def _alive(jid):
+        return not (placed[jid] or dead[jid])
 
-    def _best_gapfill_for_wp(wpU):
-        best = None
-        wdf = wins.get(wpU)
+    def _best_ready_on_wp(wpm, classes):
+        """Best (st_feas, dur_flag, sc, jid) among wpm's ready jobs of the given classes."""
+        wdf = wins[wpm]
         if wdf is None or wdf.empty:
             return None
-
-        s = ready_by_wp.get(wpU)
-        if not s:
-            return None
-
-        idx0 = wp_ptr.get(wpU, 0)
+        idx0 = wp_ptr[wpm]
         if idx0 >= len(wdf):
             return None
-        cursor0 = wdf.at[idx0, "cursor"]
-
-        to_remove = []
-        for jid in s:
-            if cancel_check and cancel_check():
-                return None
-
-            if jid in placed or jid in dead:
-                to_remove.append(jid)
-                continue
-
-            row = jobdict.get(jid)
-            if row is None:
-                to_remove.append(jid)
-                continue
-
-            if is_pg2_row(row) and not _is_outs_milestone(row):
-                to_remove.append(jid)
-                continue
-
-            grp = row['_pg']
-            ddl_try = row.get("effective_deadline")
-
-            if grp in (0, 1) and pd.isna(ddl_try) and has_pending_deadline_ops():
-                continue
-
-            ck = (wpU, jid, idx0, cursor0)
-            cached = gap_eval_cache.get(ck)
-
-            if cached is None:
-                est = earliest_start_for(jid, row)
-                dur0 = row['_dur']
-
-                if dur0 == 0:
-                    st_feas = preview_zero_duration_time(wdf, idx0, est)
-                else:
-                    st_feas = first_feasible_start_pg01(wdf, idx0, est)
-
-                if pd.isna(st_feas):
-                    gap_eval_cache[ck] = (pd.NaT, 1, float("inf"), dur0, row['_os'])
-                    continue
-
-                sc = heap_key(row, est, is_continuation(jid, row), weights, now_ts)
-                if is_upstream_pending(jid):
-                    sc -= UPSTREAM_EPS
-                if jid in os5_upstream_jobs:
-                    sc = min(sc, -9e11)
-
-                dur_flag = 0 if dur0 == 0 else 1
-                ost0 = row['_os']
-
-                gap_eval_cache[ck] = (st_feas, dur_flag, sc, dur0, ost0)
-
-            else:
-                st_feas, dur_flag, sc, dur0, ost0 = cached
-                if pd.isna(st_feas):
-                    continue
-
-            if ost0 != 5 and not _is_outs_milestone(row):
-                if not fits_before_os5_lock(wpU, st_feas, dur0):
-                    continue
+        ix = ready_idx[wpm]
 
-            key = (st_feas, dur_flag, sc, jid)
-            if (best is None) or (key < best):
-                best = key
-
-        for jid in to_remove:
-            s.discard(jid)
+        def ok(st, jid):
+            if os_of[jid] == 5 or _is_outs_milestone(jid):
+                return True
+            return fits_before_os5_lock(wpm, st, dur_of[jid])
 
+        best = None
+        for dur_flag, feas in (
+                (0, lambda est: preview_zero_duration_time(wdf, idx0, est)),
+                (1, lambda est: first_feasible_start_pg01(wdf, idx0, est)),
+        ):
+            found = ix.best([bucket_of(c, dur_flag == 0) for c in classes], feas, _alive, ok)
+            if found is not None:
+                st_feas, sc, jid = found
+                key = (st_feas, dur_flag, sc, jid)
+                if best is None or key < best:
+                    best = key
         return best
 
-    def _publish_best_for_wp(wpU):
-        best_wp_gen[wpU] = best_wp_gen.get(wpU, 0) + 1
-        gen = best_wp_gen[wpU]
+    def _best_gapfill_for_wp(wpm):
+        if has_pending_deadline_ops():
+            return _best_ready_on_wp(wpm, (CLS_PLAIN, CLS_NONEFF))
+        return _best_ready_on_wp(wpm, (CLS_PLAIN, CLS_NONEFF, CLS_NODDL))
+
+    def _publish_best_for_wp(wpm):
+        best_wp_gen[wpm] += 1
+        gen = best_wp_gen[wpm]
 
-        best = _best_gapfill_for_wp(wpU)
+        best = _best_gapfill_for_wp(wpm)
         if best is None:
             return
         st_feas, dur_flag, sc, jid = best
-        heapq.heappush(best_wp_heap, (st_feas, dur_flag, sc, jid, wpU, gen))
+        heapq.heappush(best_wp_heap, (st_feas, dur_flag, sc, jid, wpm, gen))
 
     def update_predictive_os5_lock_from_upstream(picked_jid, picked_end):
-        if pd.isna(picked_end):
+        if picked_end is None:
             return
 
         for os5_jid in os5_pred_to_jobs.get(picked_jid, ()):
             if _is_locked(os5_jid):  # ✅ NEW (critical)
                 continue
-            if os5_jid in placed:
+            if placed[os5_jid]:
                 continue
 
             rem = os5_remaining_minutes_job.get((picked_jid, os5_jid))
             if rem is None:
                 continue
 
-            cand = picked_end + pd.Timedelta(minutes=int(rem))
+            cand = picked_end + rem
 
-            prevj = os5_eta_by_job.get(os5_jid, pd.NaT)
-            if pd.isna(prevj) or cand > prevj:
-                os5_eta_by_job[os5_jid] = cand
+            prevj = os5_eta_by_job.get(os5_jid)
+            if prevj is None or cand > prevj:
+                _set_os5_eta(os5_jid, cand)
 
-                wpU = str(jobdict[os5_jid].get("WorkPlaceNo", "")).strip().upper()
-                recompute_wp_os5_eta(wpU)
-                dirty_best_wps.add(wpU)
+                wpm = wpm_of[os5_jid]
+                recompute_wp_os5_eta(wpm)
+                dirty_best_wps.add(wpm)
+
+    def _publish_zero_for_wp(wpm):
+        zero_gen[wpm] += 1
+        wdf = wins[wpm]
+        if wdf.empty:
+            return
+        idx0 = wp_ptr[wpm]
+        found = zero_idx[wpm].best(
+            (0,), lambda est: preview_zero_duration_time(wdf, idx0, est), _alive, lambda st, jid: True)
+        if found is None:
+            return
+        st_feas, (neg_pos, sc), jid = found
+        heapq.heappush(zero_heap, (st_feas, neg_pos, sc, jid, wpm, zero_gen[wpm]))
 
     def _best_zero_duration_global():
-        best = None
-        for wpU in wins.keys():
+        for wpm in dirty_zero_wps:
             if cancel_check and cancel_check():
                 return None
+            _publish_zero_for_wp(wpm)
+        dirty_zero_wps.clear()
 
-            wdf = wins.get(wpU)
-            if wdf is None or wdf.empty:
-                continue
-            idx0 = wp_ptr.get(wpU, 0)
-
-            s = ready_by_wp.get(wpU)
-            if not s:
-                continue
-
-            to_remove = []
-            for jid in s:
-                if jid in placed or jid in dead:
-                    to_remove.append(jid)
-                    continue
-                row = jobdict.get(jid)
-                if row is None:
-                    to_remove.append(jid)
-                    continue
-
-                if row['_dur'] != 0:
-                    continue
-
-                est = earliest_start_for(jid, row)
-                st_feas = preview_zero_duration_time(wdf, idx0, est)
-                if pd.isna(st_feas):
-                    continue
-
-                pos = row['_pos']
-                sc = heap_key(row, est, is_continuation(jid, row), weights, now_ts)
-                key = (st_feas, -pos, sc, jid)
-
-                if (best is None) or (key < best):
-                    best = key
-
-            for jid in to_remove:
-                s.discard(jid)
-
-        return best
+        while zero_heap:
+            st_feas, neg_pos, sc, jid, wpm, gen = zero_heap[0]
+            if gen == zero_gen[wpm] and _alive(jid):
+                return st_feas, neg_pos, sc, jid
+            heapq.heappop(zero_heap)
+        return None
 
     def push_if_ready(jid):
-        if jid in placed or jid in dead:
+        if placed[jid] or dead[jid]:
             return
-        if indeg.get(jid, 0) != 0:
+        if indeg[jid] != 0:
             return
         if not preds_resolved(jid):
             pending_ready.add(jid)
             return
 
-        row = jobdict[jid]
-        is_pg2 = is_pg2_row(row)
+        is_pg2 = is_pg2_job(jid)
 
-        wpU = row['_wpU']
-        if not wpU or wpU == "TBA":
+        wpm = wpm_of[jid]
+        if bad_wp_m[wpm]:
             return
 
-        os = row['_os']
+        os = os_of[jid]
 
         if os == 5:
-            eta0 = earliest_start_for(jid, row)
+            eta0 = earliest_start_for(jid)
 
-            prevj = os5_eta_by_job.get(jid, pd.NaT)
-            if pd.isna(prevj) or eta0 > prevj:
-                os5_eta_by_job[jid] = eta0
+            prevj = os5_eta_by_job.get(jid)
+            if prevj is None or eta0 > prevj:
+                _set_os5_eta(jid, eta0)
 
-                recompute_wp_os5_eta(wpU)
-                dirty_best_wps.add(wpU)
+                recompute_wp_os5_eta(wpm)
+                dirty_best_wps.add(wpm)
 
         if jid in os5_pred_to_jobs:
             for os5_jid in os5_pred_to_jobs.get(jid, ()):
@@ -1004,179 +680,123 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
                 if key in seeded_pred:
                     continue
                 seeded_pred.add(key)
+                seeded_by_os5.setdefault(os5_jid, []).append(jid)
 
-                est0 = earliest_start_for(jid, row)
-                end0 = _rough_end_for_prediction(jid, row, est0)
+                est0 = earliest_start_for(jid)
+                end0 = _rough_end_for_prediction(jid, est0)
                 update_predictive_os5_lock_from_upstream(jid, end0)
 
-        if is_pg2 and not _is_outs_milestone(row):
+        if is_pg2 and not _is_outs_milestone(jid):
             return
 
         if os == 5:
             os5_ready.add(jid)
-            os5_ready_by_wp.setdefault(wpU, set()).add(jid)
 
-        if has_direct_continuation(jid, row):
-            cont_ready_by_wp.setdefault(wpU, set()).add(jid)
+        if has_direct_continuation(jid):
+            cont_ready_by_wp[wpm].add(jid)
 
-        ready_by_wp.setdefault(wpU, set()).add(jid)
-        dirty_publish_wps.add(wpU)
+        _index_ready(jid, wpm)
+        dirty_publish_wps.add(wpm)
+
+    def _index_ready(jid, wpm):
+        if indexed[jid]:
+            return
+        indexed[jid] = 1
+        est = earliest_start_for(jid)
+        sc = heap_key(jid, est, is_continuation(jid))
+        if _is_outs_milestone(jid):
+            heapq.heappush(outs_ready, (est, sc, jid))
+        ix = ready_idx[wpm]
+        if ix is not None:
+            if dur_of[jid] == 0:
+                zero_idx[wpm].push(0, est, (-pos_of[jid], sc), jid)
+                dirty_zero_wps.add(wpm)
+            if is_upstream_pending(jid):
+                sc -= UPSTREAM_EPS
+            if jid in os5_upstream_jobs:
+                sc = min(sc, -9e11)
+            ix.push(ready_bucket[jid], est, sc, jid)
 
     def flush_pending_ready():
-        for jid in list(pending_ready):
+        while ready_events:
             if cancel_check and cancel_check():
                 return
-            if jid in placed or indeg.get(jid, 0) != 0:
-                pending_ready.discard(jid)
+            jid = ready_events.pop()
+            if jid not in pending_ready:
                 continue
-            if preds_resolved(jid):
-                pending_ready.discard(jid)
-                push_if_ready(jid)
+            pending_ready.discard(jid)
+            if placed[jid] or indeg[jid] != 0:
+                continue
+            push_if_ready(jid)
 
     def flush_dirty_publish():
         if not dirty_publish_wps:
             return
-        for wpU in list(dirty_publish_wps):
+        for wpm in list(dirty_publish_wps):
             if cancel_check and cancel_check():
                 return
-            _publish_best_for_wp(wpU)
+            _publish_best_for_wp(wpm)
         dirty_publish_wps.clear()
 
     def release_successors_after_place(jid):
-        for succ in succ_multi.get(jid, set()):
+        for succ in succs_of[jid]:
             if cancel_check and cancel_check():
                 return
-            if succ in placed:
+            if placed[succ]:
                 continue
 
-            indeg[succ] = max(0, indeg.get(succ, 0) - 1)
+            indeg[succ] = max(0, indeg[succ] - 1)
 
             if indeg[succ] == 0:
                 _refresh_ready_sets_for(succ)
                 push_if_ready(succ)
 
     def place_pg2_unlimited_in_windows(wdf, earliest, dur_min):
-        if wdf is None or wdf.empty:
-            return (pd.NaT, pd.NaT)
-
-        earliest = pd.to_datetime(earliest, errors="coerce")
-        if pd.isna(earliest):
-            return (pd.NaT, pd.NaT)
+        if wdf is None or wdf.empty or earliest is None:
+            return (None, None)
+        return wdf.place_pg2(earliest, dur_min)
 
-        n = len(wdf)
-        j = 0
-        while j < n and not (wdf.at[j, "end"] > earliest):
-            j += 1
-        if j >= n:
-            return (pd.NaT, pd.NaT)
+    def sched_minutes_for_shifts(jid) -> int:
+        dur_real = dur_of[jid]
+        os = os_of[jid]
 
-        ws, we = wdf.at[j, "start"], wdf.at[j, "end"]
-        start0 = max(earliest, ws)
-        if start0 >= we:
-            return (pd.NaT, pd.NaT)
-
-        if dur_min <= 0:
-            return (start0, start0)
-
-        remain = int(dur_min)
-        curr = start0
-        start = start0
-        end = start0
-
-        while j < n and remain > 0:
-            ws, we = wdf.at[j, "start"], wdf.at[j, "end"]
-            s = max(ws, curr)
-            if s < we:
-                free = minutes_between(s, we)
-                if free > 0:
-                    take = min(remain, free)
-                    e = s + pd.Timedelta(minutes=take)
-                    end = e
-                    remain -= take
-                    curr = e
-
-            if remain > 0:
-                j += 1
-                if j < n:
-                    curr = max(curr, wdf.at[j, "start"])
-
-        if remain > 0:
-            return (pd.NaT, pd.NaT)
-
-        return (start, end)
-
-    def sched_minutes_for_shifts(row) -> int:
-        dur_real = row['_dur']
-        wpU = row['_wpU']
-        os = row['_os']
-
-        if wpU == "AP0031" and os <= 3:
+        if wpm_of[jid] == ap0031 and os <= 3:
             return int(math.ceil(dur_real / INDUSTRIAL_FACTOR))
         return dur_real
 
     def resolve_pg2_one(jid) -> bool:
-        if jid in placed:
+        if placed[jid]:
             return True
 
-        row = jobdict.get(jid)
-        if row is None or not is_pg2_row(row):
+        if not is_pg2_job(jid):
             return False
 
         if not preds_resolved(jid):
             return False
 
-        wpU = row['_wpU']
-        est = earliest_start_for(jid, row)
+        wpm = wpm_of[jid]
+        est = earliest_start_for(jid)
 
-        if _is_outs_milestone(row):
+        if _is_outs_milestone(jid):
             st, en = est, est
         else:
-            dur_real = row['_dur']
-            dur_sched = sched_minutes_for_shifts(row)
+            dur_sched = sched_minutes_for_shifts(jid)
 
-            wdf = wins.get(wpU)
+            wdf = wins[wpm]
             st, en = place_pg2_unlimited_in_windows(wdf, est, dur_sched)
 
-            if pd.isna(st) or pd.isna(en):
+            if st is None or en is None:
                 return False
 
-        ddl = row.get("effective_deadline")
-        ddl = ddl if pd.notna(ddl) else pd.NaT
-        starts_before_lsd = pd.NA
-        within_grace = pd.NA
-        if pd.notna(ddl):
-            starts_before_lsd = bool(st <= ddl)
-            within_grace = bool(st <= (ddl + pd.Timedelta(days=GRACE_DAYS)))
-
-        is_outs = (wpU in outsourcing_upper)
-        out_delivery = row.get("DateStart") if (
-                is_outs and row['_os'] > 3 and pd.notna(row.get("DateStart"))
-        ) else pd.NaT
-        buf_real = row['_buf']
-        buf_ind = int(round(buf_real / INDUSTRIAL_FACTOR))
-
-        plan_rows.append({
-            "job_id": jid, "OrderNo": row.get("OrderNo"), "OrderPos": row.get("OrderPos"),
-            "Orderstate": row['_os'],
-            "ItemNo": row.get("ItemNo"), "SortPos": row.get("SortPos"),
-            "WorkPlaceNo": str(row.get("WorkPlaceNo", "")).strip(),
-            "Start": st, "End": en,
-            "Duration": to_int_nonneg(row.get("duration_min"), 0),
-            "LatestStartDate": ddl,
-            "StartsBeforeLSD": starts_before_lsd, "WithinGraceDays": within_grace,
-            "PriorityGroup": 2,
-            "IsUnlimitedMachine": True,
-            "IsOutsourcing": is_outs, "OutsourcingDelivery": out_delivery,
-            "BufferIndustrial": buf_ind, "BufferReal": buf_real,
-            "ReasonSelected": "PG2 resolved (shift-bound, no capacity)",
-            "DurationReal": to_int_nonneg(row.get("duration_min"), 0),
-            "RecordType": to_int(row.get("RecordType"), 0)
-        })
+        plan_buf.append(jid, st, en, "PG2 resolved (shift-bound, no capacity)")
+        kpi.add(st, ddl_of[jid])
 
-        placed.add(jid)
+        placed[jid] = 1
         _remove_from_ready_sets(jid)
 
+        _mark_resolved(jid)
         end_times[jid] = en
+        _propagate_end(jid)
         update_predictive_os5_lock_from_upstream(jid, en)
 
         release_successors_after_place(jid)
@@ -1189,13 +809,10 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
             if cancel_check and cancel_check():
                 return
             x = q.popleft()
-            for s in succ_multi.get(x, set()):
-                if s in placed:
-                    continue
-                row = jobdict.get(s)
-                if row is None:
+            for s in succs_of[x]:
+                if placed[s]:
                     continue
-                if not is_pg2_row(row):
+                if not is_pg2_job(s):
                     continue
 
                 if not preds_resolved(s):
@@ -1204,168 +821,80 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
                 if resolve_pg2_one(s):
                     q.append(s)
 
-    def _has_immediate_same_machine_successor(jid, row):
-        wpU = row['_wpU']
-        for s in succ_multi.get(jid, set()):
-            srow = jobdict.get(s)
-            if srow is None:
+    def _has_immediate_same_machine_successor(jid):
+        wpm = wpm_of[jid]
+        for s in succs_of[jid]:
+            if wpm_of[s] != wpm:
                 continue
-            if str(srow.get("WorkPlaceNo", "")).strip().upper() != wpU:
-                continue
-            preds = pred_sets.get(s, set())
-            others = preds - {jid}
-            if all((p in placed) for p in others):
+            if all(placed[p] for p in preds_of[s] if p != jid):
                 return True
         return False
 
     def first_feasible_start_pg01(wdf, idx0, est):
         if wdf is None or wdf.empty:
-            return pd.NaT
-        n = len(wdf)
-        for j in range(idx0, n):
-            cur = wdf.at[j, "cursor"]
-            ws = wdf.at[j, "start"]
-            we = wdf.at[j, "end"]
-            st = max(ws, cur, est)
-            if st + GAP_TOL <= we:
-                return st
-        return pd.NaT
+            return None
+        return wdf.first_feasible_start(idx0, est)
 
     def _feasible_now(jid, est=None):
-        row = jobdict[jid]
-        wpU = row['_wpU']
-        wdf = wins.get(wpU)
+        wpm = wpm_of[jid]
+        wdf = wins[wpm]
         if wdf is None or wdf.empty:
             return False
-        idx = wp_ptr.get(wpU, 0)
+        idx = wp_ptr[wpm]
         if est is None:
-            est = earliest_start_for(jid, row)
+            est = earliest_start_for(jid)
 
-        pg = row['_pg']
+        pg = pg_of[jid]
 
         if pg == 2:
-            for j in range(len(wdf)):
-                if est < wdf.at[j, "end"]:
-                    return True
-            return False
-
-        for j in range(idx, len(wdf)):
-            cursor = wdf.at[j, "cursor"]
-            win_end = wdf.at[j, "end"]
-            if max(cursor, est) + GAP_TOL <= win_end:
-                return True
-        return False
+            return wdf.feasible_pg2(est)
+        return wdf.feasible_pg01(idx, est)
 
     def feasible_zero_duration(wdf, idx0, est):
         if wdf is None or wdf.empty:
             return False
-        for j in range(idx0, len(wdf)):
-            if est <= wdf.at[j, "end"]:
-                return True
-        return False
+        return wdf.feasible_zero_duration(idx0, est)
 
     def place_zero_duration_on_wp(wdf, idx0, est):
         if wdf is None or wdf.empty:
-            return pd.NaT
-        for j in range(idx0, len(wdf)):
-            ws, we = wdf.at[j, "start"], wdf.at[j, "end"]
-            cur = wdf.at[j, "cursor"]
-            t = max(est, ws, cur)
-            if t <= we:
-                if t > cur:
-                    wdf.at[j, "cursor"] = t
-                return t
-        return pd.NaT
+            return None
+        return wdf.place_zero_duration(idx0, est)
 
     def preview_zero_duration_time(wdf, idx0, est):
         if wdf is None or wdf.empty:
-            return pd.NaT
-        for j in range(idx0, len(wdf)):
-            ws, we = wdf.at[j, "start"], wdf.at[j, "end"]
-            cur = wdf.at[j, "cursor"]
-            t = max(est, ws, cur)
-            if t <= we:
-                return t
-        return pd.NaT
-
-    # Pre-place locked ops
-    if locked_df is not None and len(locked_df) > 0:
-        # Add locked ops into plan_rows in the same schema you output later
-        for _, rr in locked_df.iterrows():
-            jid = str(rr["job_id"]).strip()
-            wp = str(rr["WorkPlaceNo"]).strip()
-            wpU = wp.upper()
-            st = pd.to_datetime(rr["Start"], errors="coerce")
-            en = pd.to_datetime(rr["End"], errors="coerce")
-
-            # ---- DEBUG: why a lock might be skipped ----
-            if jid not in jobdict:
-                print(f"[FREEZE-DBG] lock jid not in jobs -> skipping: {jid}")
-                continue
-
-            if not wp or wpU == "TBA":
-                print(f"[FREEZE-DBG] lock has bad wp -> skipping: jid={jid} wp={wp}")
-                continue
+            return None
+        return wdf.preview_zero_duration(idx0, est)
+
+    # Pre-place locked ops (their plan rows come ready-made from the problem)
+    locked_placed = []
+    locked_part = prob.locked_part
+    for jid, m, en in prob.locked_rows:
+        if not placed[jid]:
+            locked_placed.append(jid)
+        placed[jid] = 1
+        _mark_resolved(jid)
+        end_times[jid] = en
+        if m is not None:
+            machine_last_job[m] = jid
 
-            if pd.isna(st) or pd.isna(en):
-                print(f"[FREEZE-DBG] lock has NaT times -> skipping: jid={jid} st={st} en={en}")
-                continue
-
-            if en < st:
-                print(f"[FREEZE-DBG] lock end<start -> skipping: jid={jid} st={st} en={en}")
-                continue
-            # -------------------------------------------
-
-            plan_rows.append({
-                "job_id": jid,
-                "OrderNo": rr.get("OrderNo"),
-                "OrderPos": rr.get("OrderPos"),
-                "Orderstate": to_int(rr.get("Orderstate"), 0),
-                "ItemNo": rr.get("ItemNo"),
-                "SortPos": rr.get("SortPos"),
-                "WorkPlaceNo": wp,
-                "Start": st,
-                "End": en,
-                "Duration": to_int_nonneg(rr.get("Duration", rr.get("DurationReal", 0)), 0),
-                "LatestStartDate": pd.to_datetime(rr.get("LatestStartDate", rr.get("effective_deadline")),
-                                                  errors="coerce"),
-                "StartsBeforeLSD": rr.get("StartsBeforeLSD", pd.NA),
-                "WithinGraceDays": rr.get("WithinGraceDays", pd.NA),
-                "PriorityGroup": to_int(rr.get("PriorityGroup"), 2),
-                "IsUnlimitedMachine": bool(rr.get("IsUnlimitedMachine", False)),
-                "IsOutsourcing": bool(rr.get("IsOutsourcing", False)),
-                "OutsourcingDelivery": rr.get("OutsourcingDelivery", pd.NaT),
-                "BufferIndustrial": rr.get("BufferIndustrial", 0),
-                "BufferReal": rr.get("BufferReal", 0),
-                "ReasonSelected": rr.get("ReasonSelected", "FROZEN"),
-                "DurationReal": rr.get("DurationReal", to_int_nonneg(rr.get("Duration", 0), 0)),
-                "RecordType": to_int(rr.get("RecordType"), 0),
-            })
-
-            placed.add(jid)
-            end_times[jid] = en
-            machine_last_job[wpU] = jid
-
-    if placed:
-        for jid in placed:
-            for succ in succ_multi.get(jid, set()):
-                indeg[succ] = max(0, indeg.get(succ, 0) - 1)
+    for jid in locked_placed:
+        _propagate_end(jid)
+        for succ in succs_of[jid]:
+            indeg[succ] = max(0, indeg[succ] - 1)
 
     # seed heap with indegree==0
-    for jid, deg in indeg.items():
+    for jid in range(n_jobs):
         if cancel_check and cancel_check():
             return None, None, None
 
-        if deg != 0:
+        if indeg[jid] != 0:
             continue
-        if jid in placed:
+        if placed[jid]:
             continue
 
         _refresh_ready_sets_for(jid)
 
-        row0 = jobdict[jid]
-
-        if to_int(row0.get("PriorityGroup"), 2) == 2:
+        if pg_of[jid] == 2:
             if preds_resolved(jid):
                 resolve_pg2_one(jid)
                 auto_resolve_pg2_closure(jid)
@@ -1390,10 +919,20 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
         dirty_best_wps.clear()
     flush_dirty_publish()
 
+    def _check_abort(bound):
+        # the slack keeps float rounding of the bound from cutting a tie
+        if bound < abort_below - 1e-9:
+            print(f"[ABORT] score bound {bound:.2f} < {abort_below:.2f} after {len(plan_buf)} ops")
+            if cache_stats is not None:
+                merge_stats(cache_stats, "rough_end_cache", rough_end_cache.stats())
+            raise ScheduleAborted(bound)
+
     # Main scheduling loop
     while True:
         if cancel_check and cancel_check():
             return None, None, None
+        if abort_below is not None:
+            _check_abort(kpi.upper_bound())
 
         picked = None
         pick_reason = None
@@ -1407,31 +946,9 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
             dirty_best_wps.clear()
 
         # (0) outsourcing milestones
-        best_outs = None
-        for wpU in outsourcing_upper:
-            if cancel_check and cancel_check():
-                return None, None, None
-
-            s = ready_by_wp.get(wpU)
-            if not s:
-                continue
-            to_remove = []
-            for jid in s:
-                if jid in placed or jid in dead:
-                    to_remove.append(jid)
-                    continue
-                row = jobdict.get(jid)
-                if row is None:
-                    to_remove.append(jid)
-                    continue
-                if _is_outs_milestone(row):
-                    est = earliest_start_for(jid, row)
-                    sc = heap_key(row, est, is_continuation(jid, row), weights, now_ts)
-                    key = (est, sc, jid)
-                    if (best_outs is None) or (key < best_outs):
-                        best_outs = key
-            for jid in to_remove:
-                s.discard(jid)
+        while outs_ready and not _alive(outs_ready[0][2]):
+            heapq.heappop(outs_ready)
+        best_outs = outs_ready[0] if outs_ready else None
 
         if best_outs is not None:
             picked = best_outs[2]
@@ -1452,21 +969,17 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
                 if cancel_check and cancel_check():
                     return None, None, None
 
-                if jid in placed or jid in dead:
-                    to_remove.append(jid)
-                    continue
-                row = jobdict.get(jid)
-                if row is None:
+                if placed[jid] or dead[jid]:
                     to_remove.append(jid)
                     continue
 
-                wpU = row['_wpU']
+                wpm = wpm_of[jid]
 
-                est = earliest_start_for(jid, row)
+                est = earliest_start_for(jid)
 
-                dur0 = row['_dur']
-                wdf = wins.get(wpU)
-                idx0 = wp_ptr.get(wpU, 0)
+                dur0 = dur_of[jid]
+                wdf = wins[wpm]
+                idx0 = wp_ptr[wpm]
 
                 if dur0 == 0:
                     if not feasible_zero_duration(wdf, idx0, est):
@@ -1480,17 +993,17 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
                 else:
                     st_feas = first_feasible_start_pg01(wdf, idx0, est)
 
-                if pd.isna(st_feas):
+                if st_feas is None:
                     continue
-                t0 = max(now_ts, wdf.at[idx0, "cursor"])
+                t0 = max(now_m, _cursor_at(wdf, idx0))
                 if st_feas > (t0 + OS5_PICK_HORIZON):
                     continue
 
-                sc = heap_key(row, est, is_continuation(jid, row), weights, now_ts)
+                sc = heap_key(jid, est, is_continuation(jid))
 
                 if is_upstream_pending(jid):
                     sc -= UPSTREAM_EPS
-                if _has_immediate_same_machine_successor(jid, row):
+                if _has_immediate_same_machine_successor(jid):
                     sc += 1_000_000
 
                 dur_flag = 0 if dur0 == 0 else 1
@@ -1509,48 +1022,44 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
         # (2) strict continuation
         if picked is None:
             best_cont = None
-            for wpU in wins.keys():
+            for wpm in cal_machines:
                 if cancel_check and cancel_check():
                     return None, None, None
 
-                s = cont_ready_by_wp.get(wpU)
+                s = cont_ready_by_wp[wpm]
                 if not s:
                     continue
 
                 to_remove = []
                 for jid in s:
-                    if jid in placed or jid in dead:
+                    if placed[jid] or dead[jid]:
                         to_remove.append(jid)
                         continue
-                    row = jobdict.get(jid)
-                    if row is None:
-                        to_remove.append(jid)
-                        continue
-                    if not has_direct_continuation(jid, row):
+                    if not has_direct_continuation(jid):
                         to_remove.append(jid)
                         continue
 
-                    wdf = wins.get(wpU)
-                    idx = wp_ptr.get(wpU, 0)
-                    if wdf is None or wdf.empty or idx >= len(wdf):
+                    wdf = wins[wpm]
+                    idx = wp_ptr[wpm]
+                    if wdf.empty or idx >= len(wdf):
                         continue
 
-                    est = earliest_start_for(jid, row)
-                    grp = row['_pg']
+                    est = earliest_start_for(jid)
+                    grp = pg_of[jid]
                     if grp == 2:
-                        feasible = (est < wdf.at[idx, "end"])
+                        feasible = (est < wdf.end[idx])
                     else:
-                        cursor = wdf.at[idx, "cursor"]
-                        window_end = wdf.at[idx, "end"]
-                        feasible = (cursor + GAP_TOL <= window_end) and (est <= cursor + GAP_TOL)
+                        cursor = int(wdf.cursor[idx])
+                        window_end = int(wdf.end[idx])
+                        feasible = (cursor + GAP_TOL_MIN <= window_end) and (est <= cursor + GAP_TOL_MIN)
 
                     if not feasible:
                         continue
 
-                    dur0 = row['_dur']
+                    dur0 = dur_of[jid]
                     dur_flag = 0 if dur0 == 0 else 1
 
-                    sc = heap_key(row, est, True, weights, now_ts)
+                    sc = heap_key(jid, est, True)
                     if is_upstream_pending(jid):
                         sc -= UPSTREAM_EPS
 
@@ -1570,22 +1079,19 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
                 if cancel_check and cancel_check():
                     return None, None, None
 
-                st_feas, dur_flag, sc, jid, wpU, gen = heapq.heappop(best_wp_heap)
+                st_feas, dur_flag, sc, jid, wpm, gen = heapq.heappop(best_wp_heap)
 
-                if gen != best_wp_gen.get(wpU, 0):
+                if gen != best_wp_gen[wpm]:
                     continue
-                if jid in placed or jid in dead:
+                if placed[jid] or dead[jid]:
                     continue
 
-                row = jobdict.get(jid)
-                if row is None:
-                    continue
-                dur0 = row['_dur']
-                ost0 = row['_os']
+                dur0 = dur_of[jid]
+                ost0 = os_of[jid]
 
-                if ost0 != 5 and not _is_outs_milestone(row):
-                    if not fits_before_os5_lock(wpU, st_feas, dur0):
-                        dirty_publish_wps.add(wpU)
+                if ost0 != 5 and not _is_outs_milestone(jid):
+                    if not fits_before_os5_lock(wpm, st_feas, dur0):
+                        dirty_publish_wps.add(wpm)
                         continue
 
                 picked = jid
@@ -1595,67 +1101,18 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
         # (4) FALLBACK
         if picked is None:
             best_fb = None
-            for wpU in wins.keys():
+            if any_effective_remaining_pg01():
+                fb_classes = (CLS_PLAIN,)
+            elif has_pending_deadline_ops():
+                fb_classes = (CLS_PLAIN, CLS_NONEFF)
+            else:
+                fb_classes = (CLS_PLAIN, CLS_NONEFF, CLS_NODDL)
+            for wpm in cal_machines:
                 if cancel_check and cancel_check():
                     return None, None, None
-
-                s = ready_by_wp.get(wpU)
-                if not s:
-                    continue
-
-                to_remove = []
-                for jid in s:
-                    if jid in placed or jid in dead:
-                        to_remove.append(jid)
-                        continue
-                    row = jobdict.get(jid)
-                    if row is None:
-                        to_remove.append(jid)
-                        continue
-                    if is_pg2_row(row) and not _is_outs_milestone(row):
-                        continue
-
-                    grp = row['_pg']
-                    ddl_try = row.get("effective_deadline")
-
-                    if grp in (0, 1):
-                        if (not has_effective_deadline(row)) and any_effective_remaining_pg01():
-                            continue
-                        if pd.isna(ddl_try) and has_pending_deadline_ops():
-                            continue
-
-                    est = earliest_start_for(jid, row)
-                    dur0 = row['_dur']
-
-                    wdf = wins.get(wpU)
-                    idx0 = wp_ptr.get(wpU, 0)
-
-                    if dur0 == 0:
-                        st_feas = preview_zero_duration_time(wdf, idx0, est)
-                    else:
-                        st_feas = first_feasible_start_pg01(wdf, idx0, est)
-
-                    if pd.isna(st_feas):
-                        continue
-
-                    ost0 = row['_os']
-                    if ost0 != 5 and not _is_outs_milestone(row):
-                        if not fits_before_os5_lock(wpU, st_feas, dur0):
-                            continue
-
-                    sc = heap_key(row, est, is_continuation(jid, row), weights, now_ts)
-                    if is_upstream_pending(jid):
-                        sc -= UPSTREAM_EPS
-                    if jid in os5_upstream_jobs:
-                        sc = min(sc, -9e11)
-
-                    dur_flag = 0 if dur0 == 0 else 1
-                    key = (st_feas, dur_flag, sc, jid)
-
-                    if (best_fb is None) or (key < best_fb):
-                        best_fb = key
-                for jid in to_remove:
-                    s.discard(jid)
+                key = _best_ready_on_wp(wpm, fb_classes)
+                if key is not None and (best_fb is None or key < best_fb):
+                    best_fb = key
 
             if best_fb is not None:
                 picked = best_fb[3]
@@ -1664,41 +1121,39 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
         if picked is None:
             break
 
-        dead.add(picked)
+        dead[picked] = 1
+        if wins[wpm_of[picked]] is not None:
+            dirty_zero_wps.add(wpm_of[picked])
 
         if picked is not None:
-            rr = jobdict.get(picked)
-            if rr is not None and is_pg2_row(rr) and not _is_outs_milestone(rr):
+            if is_pg2_job(picked) and not _is_outs_milestone(picked):
                 resolve_pg2_one(picked)
                 auto_resolve_pg2_closure(picked)
                 flush_pending_ready()
                 continue
 
         # -------------------- PLACE PICKED --------------------
-        r = jobdict[picked]
-        est_picked = earliest_start_for(picked, r)
+        est_picked = earliest_start_for(picked)
 
-        wp = str(r["WorkPlaceNo"]).strip()
-        wpU = wp.upper()
-        pg = r['_pg']
+        wpm = wpm_of[picked]
+        pg = pg_of[picked]
 
-        dur = r['_dur']
+        dur = dur_of[picked]
 
-        ddl = r.get("effective_deadline")
-        ddl = ddl if pd.notna(ddl) else pd.NaT
+        ddl = ddl_of[picked]
 
-        if (wpU in outsourcing_upper) and (r['_os'] > 3):
+        if _is_outs_milestone(picked):
             start = est_picked
             end = start
         else:
-            if not wp or wpU == "TBA":
-                placed.add(picked)
+            if bad_wp_m[wpm]:
+                placed[picked] = 1
                 _remove_from_ready_sets(picked)
-                end_times[picked] = pd.NaT
+                _mark_resolved(picked)
                 continue
 
             earliest = est_picked
-            w = wins.get(wpU)
+            w = wins[wpm]
 
             if pg == 2:
                 if dur == 0:
@@ -1709,58 +1164,29 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
                         return None, None, None
 
                     if w is None or w.empty:
-                        placed.add(picked)
-                        end_times[picked] = pd.NaT
+                        placed[picked] = 1
+                        _mark_resolved(picked)
                         continue
-                    idx0 = wp_ptr.get(wpU, 0)
-                    n = len(w)
-                    j = idx0
-                    while j < n and not (w.at[j, "end"] > earliest):
-                        j += 1
-                    if j >= n:
-                        j = 0
-                        while j < n and not (w.at[j, "end"] > earliest):
-                            j += 1
-                    remain = dur
-                    curr = earliest
-                    segs = []
-                    while j < n and remain > 0:
-                        ws, we = w.at[j, "start"], w.at[j, "end"]
-                        s = max(ws, curr)
-                        if s >= we:
-                            j += 1
-                            continue
-                        free = minutes_between(s, we)
-                        if free <= 0:
-                            j += 1
-                            continue
-                        take = min(remain, free)
-                        e = s + pd.Timedelta(minutes=take)
-                        segs.append((s, e))
-                        remain -= take
-                        curr = e
-                        if remain > 0 and e >= we:
-                            j += 1
-                    wp_ptr[wpU] = min(idx0, n - 1) if n > 0 else 0
-                    if not segs:
-                        placed.add(picked)
-                        end_times[picked] = pd.NaT
+                    idx0 = wp_ptr[wpm]
+                    start, end = w.place_pg2(earliest, dur, idx0)
+                    if start is None:
+                        placed[picked] = 1
+                        _mark_resolved(picked)
                         continue
-                    start, end = segs[0][0], segs[-1][1]
 
             else:
                 if dur == 0:
                     if w is None or w.empty:
-                        placed.add(picked)
+                        placed[picked] = 1
                         _remove_from_ready_sets(picked)
-                        end_times[picked] = pd.NaT
+                        _mark_resolved(picked)
                         continue
-                    idx0 = wp_ptr.get(wpU, 0)
+                    idx0 = wp_ptr[wpm]
                     t0 = place_zero_duration_on_wp(w, idx0, earliest)
-                    if pd.isna(t0):
-                        placed.add(picked)
+                    if t0 is None:
+                        placed[picked] = 1
                         _remove_from_ready_sets(picked)
-                        end_times[picked] = pd.NaT
+                        _mark_resolved(picked)
                         continue
                     start = t0
                     end = t0
@@ -1770,116 +1196,56 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
                         return None, None, None
 
                     if w is None or w.empty:
-                        placed.add(picked)
-                        end_times[picked] = pd.NaT
+                        placed[picked] = 1
+                        _mark_resolved(picked)
                         continue
-                    idx = wp_ptr.get(wpU, 0)
-                    n = len(w)
-
-                    while idx < n and not (w.at[idx, "end"] > earliest):
-                        idx += 1
-                    remain = dur
-                    curr = earliest
-                    segs = []
-                    while idx < n and remain > 0:
-                        if cancel_check and cancel_check():
-                            return None, None, None
-
-                        ws, we, cur = w.at[idx, "start"], w.at[idx, "end"], w.at[idx, "cursor"]
-                        s = max(ws, cur, curr)
-                        if s >= we:
-                            idx += 1
-                            continue
-                        free = minutes_between(s, we)
-                        if free <= 0:
-                            idx += 1
-                            continue
-
-                        take = min(remain, free)
-                        e = s + pd.Timedelta(minutes=take)
-                        w.at[idx, "cursor"] = e
-                        segs.append((s, e))
-                        remain -= take
-                        curr = e
-                        if remain > 0 and e >= we:
-                            idx += 1
-                    wp_ptr[wpU] = min(idx, n - 1) if n > 0 else 0
-
-                    if not segs:
-                        placed.add(picked)
-                        end_times[picked] = pd.NaT
-                        continue
-                    start, end = segs[0][0], segs[-1][1]
-
-        starts_before_lsd = pd.NA
-        within_grace = pd.NA
-        if pd.notna(ddl):
-            starts_before_lsd = bool(start <= ddl)
-            within_grace = bool(start <= (ddl + pd.Timedelta(days=GRACE_DAYS)))
-
+                    idx = wp_ptr[wpm]
+                    start, end, wp_ptr[wpm] = w.place_pg01(idx, earliest, dur)
 
+                    if start is None:
+                        placed[picked] = 1
+                        _mark_resolved(picked)
+                        continue
 
-        if pd.notna(ddl):
+        if ddl is not None:
             if start > ddl:
                 primary = "Past deadline (urgent)"
             else:
                 dt = ddl - start
-                if dt <= pd.Timedelta(days=1):
+                if dt <= 24 * 60:
                     primary = "Imminent deadline (<1 day)"
-                elif dt <= pd.Timedelta(days=3):
+                elif dt <= 3 * 24 * 60:
                     primary = "Upcoming deadline (<3 days)"
                 else:
-                    primary = f"Has deadline on {ddl:%d-%m-%Y %H:%M}"
+                    primary = f"Has deadline on {jt.ddl[picked]:%d-%m-%Y %H:%M}"
         else:
             primary = "No deadline (priority/fit)"
 
         secondary = (
-            "Continuation (no buffer)" if is_continuation(picked, r)
-            else "Outsourced milestone" if ((wpU in outsourcing_upper) and (r['_os'] > 3))
-            else "Unlimited parallel window" if r['_pg'] == 2
-            else "Bottleneck operation" if r['_pg'] == 0
+            "Continuation (no buffer)" if is_continuation(picked)
+            else "Outsourced milestone" if _is_outs_milestone(picked)
+            else "Unlimited parallel window" if pg == 2
+            else "Bottleneck operation" if pg == 0
             else "Best candidate now"
         )
 
-        is_outs = (wpU in outsourcing_upper)
-        out_delivery = r.get("DateStart") if (
-                is_outs and r['_os'] > 3 and pd.notna(r.get("DateStart"))) else pd.NaT
-        buf_real = r['_buf']
-        buf_ind = int(round(buf_real / INDUSTRIAL_FACTOR))
-
-        plan_rows.append({
-            "job_id": picked, "OrderNo": r.get("OrderNo"), "OrderPos": r.get("OrderPos"),
-            "Orderstate": r['_os'],
-            "ItemNo": r.get("ItemNo"), "SortPos": r.get("SortPos"), "WorkPlaceNo": wp,
-            "Start": start, "End": end,
-            "Duration": to_int_nonneg(r.get("duration_min"), 0),
-            "LatestStartDate": ddl,
-            "StartsBeforeLSD": starts_before_lsd, "WithinGraceDays": within_grace,
-            "PriorityGroup": r['_pg'],
-            "IsUnlimitedMachine": (r['_pg'] == 2),
-            "IsOutsourcing": is_outs, "OutsourcingDelivery": out_delivery,
-            "BufferIndustrial": buf_ind, "BufferReal": buf_real,
-            "ReasonSelected": f"{primary} | {secondary}",
-            "DurationReal": to_int_nonneg(r.get("duration_min"), 0),
-            "RecordType": r['_rec']
-        })
+        plan_buf.append(picked, start, end, f"{primary} | {secondary}")
+        kpi.add(start, ddl)
 
-        placed.add(picked)
+        placed[picked] = 1
         _remove_from_ready_sets(picked)
+        _mark_resolved(picked)
         end_times[picked] = end
+        _propagate_end(picked)
 
         update_predictive_os5_lock_from_upstream(picked, end)
 
-        wpU = r['_wpU']
-        if wpU:
-            ready_by_wp.get(wpU, set()).discard(picked)
-            cont_ready_by_wp.get(wpU, set()).discard(picked)
+        cont_ready_by_wp[wpm].discard(picked)
         os5_ready.discard(picked)
-        os5_ready_by_wp.get(wpU, set()).discard(picked)
 
-        if wpU in wins:
-            update_os5_lock_for_wp(wpU)
-            dirty_publish_wps.add(wpU)
+        if wins[wpm] is not None:
+            update_os5_lock_for_wp(wpm)
+            dirty_publish_wps.add(wpm)
 
         if dirty_best_wps:
             for wpx in list(dirty_best_wps):
@@ -1890,50 +1256,59 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
             dirty_best_wps.clear()
         flush_dirty_publish()
 
-        machine_last_job[wpU] = picked
+        machine_last_job[wpm] = picked
 
-        for s in succ_multi.get(picked, ()):
+        for s in succs_of[picked]:
             if cancel_check and cancel_check():
                 return None, None, None
-            if s in placed or s in dead:
-                continue
-            srow = jobdict.get(s)
-            if srow is None:
+            if placed[s] or dead[s]:
                 continue
-            if srow['_pg'] == 2 and not _is_outs_milestone(srow):
+            if pg_of[s] == 2 and not _is_outs_milestone(s):
                 continue
-            if str(srow.get("WorkPlaceNo", "")).strip().upper() != wpU:
+            if wpm_of[s] != wpm:
                 continue
-            if indeg.get(s, 0) == 0 and preds_resolved(s):
-                cont_ready_by_wp.setdefault(wpU, set()).add(s)
+            if indeg[s] == 0 and preds_resolved(s):
+                cont_ready_by_wp[wpm].add(s)
 
         auto_resolve_pg2_closure(picked)
         flush_pending_ready()
         flush_dirty_publish()
 
-        if r['_os'] == 5:
-            os5_lock_until.pop(wpU, None)
-            os5_lock_cache.pop(wpU, None)
+        if os_of[picked] == 5:
+            os5_lock_until[wpm] = None
+            os5_lock_cache[wpm] = None
 
             os5_eta_by_job.pop(picked, None)
 
-            if wpU in os5_targets_by_wp:
-                os5_targets_by_wp[wpU].discard(picked)
+            os5_targets_by_wp[wpm].discard(picked)
 
-            recompute_wp_os5_eta(wpU)
+            recompute_wp_os5_eta(wpm)
 
-            seeded_pred = {k for k in seeded_pred if k[1] != picked}
+            for p in seeded_by_os5.pop(picked, ()):
+                seeded_pred.discard((p, picked))
 
-            dirty_best_wps.add(wpU)
+            dirty_best_wps.add(wpm)
 
         release_successors_after_place(picked)
 
-    plan_df = pd.DataFrame(plan_rows)
+    # nothing else gets placed: the score is final (and frames are not built
+    # for a pass that is discarded anyway)
+    if abort_below is not None:
+        _check_abort(kpi.score())
+
+    # scheduled rows come out of the buffer as datetime64 already; only the
+    # locked rows may still need parsing / tz stripping
+    plan_df = plan_buf.frame(jt, is_outs_m)
+    if locked_part is not None:
+        plan_df = pd.concat([locked_part, plan_df], ignore_index=True) if not plan_df.empty else locked_part
+        # locks without ItemNo are NaN there; keep the column text, not object
+        plan_df["ItemNo"] = plan_df["ItemNo"].infer_objects()
     if not plan_df.empty:
         plan_df = plan_df.sort_values(["WorkPlaceNo", "Start"]).reset_index(drop=True)
         for col in ["Start", "End", "LatestStartDate", "OutsourcingDelivery"]:
             if col in plan_df.columns:
-                plan_df[col] = pd.to_datetime(plan_df[col], errors="coerce")
+                if not pd.api.types.is_datetime64_any_dtype(plan_df[col]):
+                    plan_df[col] = pd.to_datetime(plan_df[col], errors="coerce")
                 if plan_df[col].dt.tz is not None:
                     plan_df[col] = plan_df[col].dt.tz_localize(None)
 
@@ -1946,11 +1321,6 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
     ])
 
     if not plan_df.empty:
-        # make sure datetimes are datetimes
-        plan_df["Start"] = pd.to_datetime(plan_df["Start"], errors="coerce")
-        plan_df["End"] = pd.to_datetime(plan_df["End"], errors="coerce")
-        plan_df["LatestStartDate"] = pd.to_datetime(plan_df["LatestStartDate"], errors="coerce")
-
         m = plan_df["LatestStartDate"].notna() & plan_df["Start"].notna()
         tmp = plan_df.loc[m, [
             "job_id", "OrderNo", "OrderPos", "Orderstate", "WorkPlaceNo",
@@ -1964,48 +1334,33 @@ def schedule(jobs, shifts, pred_sets, succ_multi, unlimited_set, outsourcing_set
         tmp["DaysLate"] = np.maximum(0, np.ceil(delta_days.fillna(0))).astype(int)
 
         late_df = tmp[tmp["DaysLate"] > 0].sort_values(["WorkPlaceNo", "Start"]).reset_index(drop=True)
-        for col in ["Start", "End", "LatestStartDate", "Allowed"]:
-            if col in late_df.columns:
-                late_df[col] = pd.to_datetime(late_df[col], errors="coerce")
-                if late_df[col].dt.tz is not None:
-                    late_df[col] = late_df[col].dt.tz_localize(None)
 
     if cancel_check and cancel_check():
         return None, None, None
 
-    # Unplaced
+    # Unplaced (job numbers are in job_id order, so this stays sorted)
     placed_ids = set(plan_df["job_id"]) if not plan_df.empty else set()
-    all_ids = set(jobdict.keys())
-    remaining = sorted(all_ids - placed_ids)
-    unplaced_rows = []
-    for jid in remaining:
-        if cancel_check and cancel_check():
-            return None, None, None
-
-        r = jobdict[jid]
-        wp = str(r.get("WorkPlaceNo", "")).strip()
-        wpU = wp.upper()
-        if not wp or wpU == "TBA":
-            reason = "workplace_missing_or_TBA"
-        elif indeg.get(jid, 0) > 0:
-            reason = "blocked_by_predecessor_or_material"
-        else:
-            reason = "no_capacity_in_windows"
-        unplaced_rows.append({
-            "job_id": jid,
-            "OrderNo": r.get("OrderNo"),
-            "OrderPos": r.get("OrderPos"),
-            "WorkPlaceNo": wp,
-            "LatestStartDate": r.get("effective_deadline"),
-            "Orderstate": r['_os'],
-            "reason": reason
+    left = np.array([j for j in range(n_jobs) if ids[j] not in placed_ids], dtype=np.int64)
+    if len(left):
+        bad = np.asarray(bad_wp_m, dtype=bool)[jt.wp_id[left]]
+        blocked = np.asarray(indeg[:n_jobs])[left] > 0
+        reason = np.where(bad, "workplace_missing_or_TBA",
+                          np.where(blocked, "blocked_by_predecessor_or_material", "no_capacity_in_windows"))
+        rl = left.tolist()
+        unp_df = pd.DataFrame({
+            "job_id": [ids[j] for j in rl],
+            "OrderNo": [jt.order_no[j] for j in rl],
+            "OrderPos": [jt.order_pos[j] for j in rl],
+            "WorkPlaceNo": [wp_of[j] for j in rl],
+            "LatestStartDate": [jt.ddl[j] for j in rl],
+            "Orderstate": [os_of[j] for j in rl],
+            "reason": reason.astype(object),
         })
+    else:
+        unp_df = pd.DataFrame()
 
-
-    unp_df = pd.DataFrame(unplaced_rows)
-
-    gap_eval_cache.clear()
+    if cache_stats is not None:
+        merge_stats(cache_stats, "rough_end_cache", rough_end_cache.stats())
     rough_end_cache.clear()
-    rem_cache.clear()
 
-    return plan_df, late_df, unp_df
\ No newline at end of file
+    return plan_df, late_df, unp_df
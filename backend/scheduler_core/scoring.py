@@ -0,0 +1,50 @@
+import numpy as np
+
+# heap_key features, in weight-vector order. The per-pick (dynamic) ones are
+# zero in the static matrix and added in the scheduling loop.
+FEATURES = (
+    "w_has_ddl", "w_priority", "w_orderstate", "w_cont", "w_ddl_minutes", "w_lateness",
+    "w_duration_late", "w_spt_near", "w_earliest", "w_duration", "w_orderpos",
+)
+
+NO_DDL_MINUTES = 10_000_000
+OS5_ABSOLUTE = -1e12  # capacity-consuming OS5 work always goes first
+
+
+def weight_vector(weights) -> np.ndarray:
+    """Weights dict -> float vector in FEATURES order (missing keys = 0)."""
+    if isinstance(weights, np.ndarray):
+        return weights
+    return np.array([float(weights.get(k, 0.0)) for k in FEATURES])
+
+
+def static_features(jt, now_min) -> np.ndarray:
+    """
+    (n_jobs, len(FEATURES)) matrix of the per-job features of heap_key that
+    do not depend on the pick: deadline presence/slack, priority group,
+    orderstate, duration, orderpos. Dynamic columns are 0.
+    """
+    n = len(jt)
+    has = np.array([d is not None for d in jt.ddl_min], dtype=bool)
+    ddl = np.array([d if d is not None else now_min for d in jt.ddl_min], dtype=np.int64)
+    os5 = jt.os == 5
+    dur = jt.dur
+
+    ddl_minutes = np.where(has, np.maximum(0, ddl - now_min), NO_DDL_MINUTES)
+    ddl_minutes[has & os5] = 0  # OS5 with a deadline: treat as urgent
+
+    f = np.zeros((n, len(FEATURES)))
+    col = FEATURES.index
+    f[:, col("w_has_ddl")] = ~has
+    f[:, col("w_priority")] = jt.pg
+    f[:, col("w_orderstate")] = -jt.os * 100
+    f[:, col("w_ddl_minutes")] = ddl_minutes
+    f[:, col("w_spt_near")] = np.where(has & (ddl_minutes <= 2 * 24 * 60), dur, 0)
+    f[:, col("w_duration")] = dur
+    f[:, col("w_orderpos")] = -jt.pos
+    return f
+
+
+def static_scores(features, weights) -> np.ndarray:
+    """Static part of heap_key for every job: features @ weights (dict or vector)."""
+    return features @ weight_vector(weights)
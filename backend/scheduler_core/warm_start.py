@@ -0,0 +1,88 @@
+import json
+from pathlib import Path
+
+from .scenario_config import load_scenario_config
+
+SCENARIOS_DIR = Path("scenarios")
+
+
+def _family_root(name, cfg):
+    """Scenario a what-if was created from (itself if it is not a what-if)."""
+    return cfg.get("source_scenario") or name
+
+
+def related_scenarios(scenario_name):
+    """
+    What-if siblings of a scenario: its source, the source's other what-ifs,
+    and its own what-ifs. Older what-ifs without source_scenario in their
+    config are matched by the <source>_whatif_ name create-what-if gives them.
+    """
+    if not SCENARIOS_DIR.exists():
+        return []
+    root = _family_root(scenario_name, load_scenario_config(scenario_name))
+    out = []
+    for d in sorted(SCENARIOS_DIR.iterdir()):
+        name = d.name
+        if name == scenario_name or not d.is_dir():
+            continue
+        try:
+            src = _family_root(name, load_scenario_config(name))
+        except (OSError, ValueError):
+            continue
+        if name.startswith(f"{root}_whatif_"):
+            src = root
+        if src in (root, scenario_name) or name == root:
+            out.append(name)
+    return out
+
+
+def last_best_weights(scenario_name, skip_run=None):
+    """(run_id, run_meta) of the newest run of a scenario that saved best_weights."""
+    runs = SCENARIOS_DIR / scenario_name / "runs"
+    if not runs.exists():
+        return None
+    for d in sorted(runs.iterdir(), reverse=True):  # run ids are timestamps
+        if d.name == skip_run:
+            continue
+        meta_path = d / "run_meta.json"
+        if not meta_path.exists():
+            continue
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if meta.get("best_weights"):
+            return d.name, meta
+    return None
+
+
+def warm_start_candidates(scenario_name, base_weights, skip_run=None, siblings=True, max_siblings=3):
+    """
+    Weight sets worth trying before SA: the best weights of the scenario's
+    last run, then those of up to max_siblings what-if siblings (newest run
+    first). Keys follow base_weights (missing ones taken from it), and sets
+    equal to base_weights or to an earlier candidate are dropped.
+    Returns [(label, weights)].
+    """
+    found = []
+    own = last_best_weights(scenario_name, skip_run=skip_run)
+    if own:
+        found.append((scenario_name, *own))
+    if siblings:
+        sib = []
+        for name in related_scenarios(scenario_name):
+            r = last_best_weights(name)
+            if r:
+                sib.append((name, *r))
+        sib.sort(key=lambda t: t[1], reverse=True)
+        found += sib[:max_siblings]
+
+    out, seen = [], {tuple(sorted(base_weights.items()))}
+    for name, run_id, meta in found:
+        w = {k: float(meta["best_weights"].get(k, v)) for k, v in base_weights.items()}
+        key = tuple(sorted(w.items()))
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append((f"{name}/{run_id}", w))
+    return out
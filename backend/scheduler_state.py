@@ -6,6 +6,8 @@ active_jobs = {}       # scenario -> True/False (scheduler running)
 progress = {}          # scenario -> int (0–100)
 cancel_flag = {}       # scenario -> True/False
 errors = {}            # scenario -> str or None
+best_so_far = {}       # scenario -> {path, plan_score, source, updated_at} of the running best plan
+run_cache = {}         # scenario -> {hit, input_hash, run_id} of the last run-cache lookup
 
 # Optional: track thread references (useful for debugging)
 threads = {}           # scenario -> Thread object
@@ -29,3 +31,5 @@ def init_scenario_state(scenario: str):
     cancel_flag[scenario] = False
     progress[scenario] = 0
     errors[scenario] = None
+    best_so_far.pop(scenario, None)
+    run_cache.pop(scenario, None)
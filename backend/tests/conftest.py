@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the backend modules import each other as top-level packages (app.py runs from backend/)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,48 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+import scheduler_core.run as run_mod
+from scheduler_core.kpis import KpiCounter, compute_kpis_multi, plan_score
+from test_resume import write_scenario
+
+SCENARIO = "EA"
+
+
+def test_early_abort_cuts_exactly_the_candidates_below_the_best(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = Path("scenarios") / SCENARIO
+    paths = write_scenario(root, pd.Timestamp.now().floor("min"), n_orders=20, seed=11)
+
+    # score every candidate a second time without the bound to check the cut
+    run_once = run_mod.run_once
+    calls = []
+
+    def checked_run_once(*args, **kwargs):
+        res = run_once(*args, **kwargs)
+        if kwargs.get("abort_below") is not None:
+            full = run_once(*args, **{**kwargs, "abort_below": None, "cache_stats": {}})
+            calls.append((kwargs["abort_below"], res, full))
+        return res
+
+    monkeypatch.setattr(run_mod, "run_once", checked_run_once)
+    run_mod.run_scheduler_with_paths(
+        *paths, root / "output", scenario_name=SCENARIO,
+        sa_config={"enabled": True, "iterations": 16, "step_scale": 1.0, "early_abort": True})
+
+    assert calls
+    for best, (plan, _, _, sc, _), (full_plan, _, _, full_sc, _) in calls:
+        counts = KpiCounter()
+        counts.add_frame(full_plan)
+        assert counts.score() == full_sc == plan_score(compute_kpis_multi(full_plan))
+        if plan is None:
+            # aborted: the reported bound holds and lies below the best
+            assert full_sc <= sc + 1e-9 and sc < best
+        else:
+            assert sc == full_sc and sc > best - 1e-9
+
+    (run_dir,) = (root / "runs").iterdir()
+    meta = json.loads((run_dir / "run_meta.json").read_text(encoding="utf-8"))
+    aborted = sum(plan is None for _, (plan, *_), _ in calls)
+    assert meta["sa_early_abort"] and meta["sa_aborted"] == aborted > 0
@@ -0,0 +1,126 @@
+import random
+
+import pandas as pd
+
+from scheduler_core.job_graph import JobGraph
+from scheduler_core.jobtable import JobTable
+from scheduler_core.precedence import build_dependency_graph
+
+
+def job_table(rows):
+    """JobTable of (job_id, Orderstate, duration_min, buffer_min) rows, pre-normalized as in run.py."""
+    jobs = pd.DataFrame(rows, columns=["job_id", "_os", "_dur", "_buf"])
+    jobs["_wp"] = jobs["_wpU"] = "M01"
+    jobs["_pg"], jobs["_rec"], jobs["_pos"] = 1, 60, 1
+    jobs["buffer_min"] = jobs["_buf"]
+    return JobTable(jobs)
+
+
+def graph_of(rows, edges):
+    pred_sets = {r[0]: set() for r in rows}
+    succ_multi = {r[0]: set() for r in rows}
+    for a, b in edges:
+        pred_sets[b].add(a)
+        succ_multi[a].add(b)
+    jt = job_table(rows)
+    return jt, JobGraph(jt, pred_sets, succ_multi)
+
+
+def brute_force(jt, g):
+    """Longest buffer+duration simple path j -> OS5 t for every pair, by enumerating all paths."""
+    buf, dur = jt.buf.tolist(), jt.dur.tolist()
+    os5 = set(g.os5_jobs)
+    best = {}
+
+    def walk(start, j, cost, seen):
+        for s in g.succs[j]:
+            if s in seen:
+                continue
+            if s in os5 and best.get((start, s), -1) < cost + buf[j]:
+                best[(start, s)] = cost + buf[j]
+            walk(start, s, cost + buf[j] + dur[s], seen | {s})
+
+    for j in range(len(jt)):
+        walk(j, j, 0, {j})
+    return best
+
+
+def named(jt, table):
+    return {(jt.ids[j], jt.ids[t]): v for (j, t), v in table.items()}
+
+
+def off_diagonal(table):
+    return {k: v for k, v in table.items() if k[0] != k[1]}
+
+
+def test_os5_remaining_matches_brute_force_on_a_dag():
+    rnd = random.Random(7)
+    rows = [(f"J{i:02d}", 5 if i % 4 == 0 else 1, rnd.randint(0, 300), rnd.choice([0, 30, 60])) for i in range(24)]
+    # edges only from a lower to a higher number: acyclic, with long and parallel routes
+    edges = {(f"J{a:02d}", f"J{b:02d}") for a in range(24) for b in range(a + 1, 24) if rnd.random() < 0.2}
+    jt, g = graph_of(rows, edges)
+
+    assert named(jt, g.os5_remaining) == named(jt, brute_force(jt, g))
+    for t in g.os5_jobs:
+        assert g.upstream[t] == {j for (j, tt) in g.os5_remaining if tt == t}
+
+
+def test_os5_remaining_follows_paths_through_a_cycle():
+    # U -> A -> B -> C -> A is a loop; B and C lead on to the OS5 jobs T1/T2.
+    # U sorts after the loop, and D (on no cycle) sits between it and T2.
+    rows = [
+        ("A", 1, 100, 10), ("B", 1, 200, 20), ("C", 1, 50, 0), ("D", 1, 70, 5),
+        ("T1", 5, 40, 0), ("T2", 5, 30, 0), ("U", 1, 10, 60),
+    ]
+    edges = [("U", "A"), ("A", "B"), ("B", "C"), ("C", "A"), ("B", "T1"), ("C", "D"), ("D", "T2"), ("U", "D")]
+    jt, g = graph_of(rows, edges)
+    table = named(jt, g.os5_remaining)
+
+    assert off_diagonal(table) == named(jt, brute_force(jt, g))
+    # C reaches T1 only through A and B, i.e. around the loop
+    assert table[("C", "T1")] == 0 + 100 + 10 + 200 + 20
+    assert table[("U", "T2")] == 60 + 100 + 10 + 200 + 20 + 50 + 0 + 70 + 5
+    assert {jt.ids[j] for j in g.upstream[jt.index["T1"]]} == {"U", "A", "B", "C"}
+
+
+def test_os5_job_on_a_cycle_is_its_own_predecessor():
+    rows = [("A", 1, 100, 10), ("T", 5, 40, 20)]
+    jt, g = graph_of(rows, [("A", "T"), ("T", "A")])
+    assert named(jt, g.os5_remaining) == {("A", "T"): 10, ("T", "T"): 0}
+
+
+def test_material_loop_feeding_an_os5_job_keeps_every_route():
+    # ORD0001 and ORD0002 need each other (a bad material loop); ORD0009_3 (OS5)
+    # needs ORD0001, and ORD0001_2 also needs ORD0005, which sorts after the loop.
+    def op(jid, os_, dur, buf, needs=""):
+        order, pos = jid.split("_")
+        return dict(job_id=jid, OrderNo=order, OrderPos=int(pos), RecordType=60, Orderstate=os_,
+                    duration_min=dur, buffer_min=buf, OpNeedsUpstream=bool(needs), OpUpstreamOrders=needs)
+
+    def head(order):
+        return dict(job_id=f"{order}_H", OrderNo=order, OrderPos=0, RecordType=10,
+                    LatestDateHead=pd.Timestamp("2025-03-20"))
+
+    jobs = pd.DataFrame([
+        head("ORD0000"), op("ORD0000_1", 1, 120, 30),
+        head("ORD0001"), op("ORD0001_1", 1, 60, 15), op("ORD0001_2", 1, 90, 0, "ORD0002;ORD0005"),
+        head("ORD0002"), op("ORD0002_1", 1, 45, 0), op("ORD0002_2", 1, 30, 10, "ORD0001"),
+        head("ORD0005"), op("ORD0005_1", 1, 200, 60),
+        head("ORD0009"), op("ORD0009_3", 5, 80, 0, "ORD0001"), op("ORD0009_4", 1, 50, 20, "ORD0000"),
+    ])
+    pred_sets, succ_multi = build_dependency_graph(jobs)
+    sched = jobs[jobs["RecordType"] == 60].copy()
+    sched["_wp"] = sched["_wpU"] = "M01"
+    sched["_pg"], sched["_rec"], sched["_pos"] = 1, 60, sched["OrderPos"]
+    sched["_os"], sched["_dur"], sched["_buf"] = sched["Orderstate"], sched["duration_min"], sched["buffer_min"]
+    jt = JobTable(sched)
+    g = JobGraph(jt, pred_sets, succ_multi)
+    table = named(jt, g.os5_remaining)
+
+    assert table == named(jt, brute_force(jt, g))
+    assert table[("ORD0000_1", "ORD0009_3")] == 30 + 50 + 20
+    # upstream of the loop: ORD0005_1 -> ORD0001_2 -> ORD0001_1 -> ORD0009_3
+    assert table[("ORD0005_1", "ORD0009_3")] == 60 + 90 + 0 + 60 + 15
+    # on the loop: ORD0002_1 -> ORD0001_2 -> ORD0001_1 -> ORD0009_3
+    assert table[("ORD0002_1", "ORD0009_3")] == 0 + 90 + 0 + 60 + 15
+    assert set(table) == {(j, "ORD0009_3") for j in jt.ids if j != "ORD0009_3"}
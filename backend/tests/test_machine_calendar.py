@@ -0,0 +1,131 @@
+import random
+
+import numpy as np
+import pytest
+
+from scheduler_core.machine_calendar import MachineCalendar
+
+
+def fragmented(rnd, n=40):
+    """Sorted, non-overlapping windows: shifts, 1-2 minute fragments and gaps of 0-120 minutes."""
+    start, end, t = [], [], 0
+    for _ in range(n):
+        t += rnd.choice([0, 1, rnd.randint(2, 120)]) if start else rnd.randint(0, 30)
+        length = rnd.choice([1, 2, rnd.randint(3, 480)])
+        if start and t == end[-1]:
+            t += 1  # windows never touch
+        start.append(t)
+        end.append(t + length)
+        t += length
+    return MachineCalendar(start, end)
+
+
+def naive_preview(cal, idx0, est, dur_min):
+    """The old DataFrame walk of preview_end_in_windows_pg01, on plain ints."""
+    if dur_min <= 0:
+        return est
+    n = len(cal)
+    idx = idx0
+    while idx < n and not cal.end[idx] > est:
+        idx += 1
+    remain, curr = dur_min, est
+    while idx < n and remain > 0:
+        s = max(int(cal.start[idx]), int(cal.cursor[idx]), curr)
+        if s >= cal.end[idx]:
+            idx += 1
+            continue
+        take = min(remain, int(cal.end[idx]) - s)
+        remain -= take
+        curr = s + take
+        if remain > 0:
+            idx += 1
+    return None if remain > 0 else curr
+
+
+def naive_capacity(cal, idx0, t0, t1):
+    return sum(max(0, min(int(cal.end[j]), t1) - max(int(cal.cursor[j]), t0)) for j in range(idx0, len(cal)))
+
+
+def assert_queries_match_naive(cal, rnd):
+    rebuilt = np.concatenate([[0], np.cumsum(cal.end - cal.cursor)])
+    assert cal.cap.tolist() == rebuilt.tolist()
+    horizon = int(cal.end[-1]) + 60
+    for _ in range(50):
+        idx0 = rnd.randrange(len(cal))
+        est = rnd.randint(-10, horizon)
+        dur = rnd.choice([0, 1, 2, rnd.randint(3, 2000)])
+        assert cal.preview_end_pg01(idx0, est, dur) == naive_preview(cal, idx0, est, dur)
+        t0, t1 = sorted(rnd.randint(-10, horizon) for _ in range(2))
+        assert cal.capacity_between(idx0, t0, t1) == naive_capacity(cal, idx0, t0, t1)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_prefix_sums_follow_moving_cursors(seed):
+    rnd = random.Random(seed)
+    cal = fragmented(rnd)
+    assert_queries_match_naive(cal, rnd)
+    horizon = int(cal.end[-1])
+    for _ in range(30):
+        idx0 = rnd.randrange(len(cal))
+        est = rnd.randint(0, horizon)
+        if rnd.random() < 0.3:
+            cal.place_zero_duration(idx0, est)
+        else:
+            cal.place_pg01(idx0, est, rnd.choice([1, 2, rnd.randint(3, 900)]))
+        assert_queries_match_naive(cal, rnd)
+
+
+def test_preview_spans_one_minute_fragments():
+    cal = MachineCalendar([0, 10, 12, 20], [5, 11, 13, 30])
+    cal.place_pg01(0, 0, 3)  # cursor of the first window at 3
+    assert cal.preview_end_pg01(0, 0, 2) == 5
+    assert cal.preview_end_pg01(0, 0, 3) == 11
+    assert cal.preview_end_pg01(0, 0, 4) == 13
+    assert cal.preview_end_pg01(0, 4, 5) == 22
+    assert cal.preview_end_pg01(0, 0, 15) is None
+    assert cal.capacity_between(0, 0, 30) == 14
+    assert cal.capacity_between(1, 0, 21) == 3
+
+
+def test_subtract_many_touching_and_overlapping_locks():
+    cal = MachineCalendar([0, 100, 200], [60, 160, 260])
+    # [10,20) touches [20,30); [110,150) overlaps [140,210); [60,100) lies
+    # in the gap; [230,230) is empty; [250,300) runs past the last window
+    cal.subtract_many([20, 10, 110, 140, 60, 230, 250], [30, 20, 150, 210, 100, 230, 300])
+    assert cal.start.tolist() == [0, 30, 100, 210]
+    assert cal.end.tolist() == [10, 60, 110, 250]
+    assert cal.cursor.tolist() == cal.start.tolist()
+    assert cal.cap.tolist() == [0, 10, 40, 50, 90]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_subtract_many_matches_subtract_loop(seed):
+    rnd = random.Random(seed)
+    cal = fragmented(rnd)
+    horizon = int(cal.end[-1])
+    a, b = [], []
+    for _ in range(rnd.randint(1, 60)):
+        kind = rnd.random()
+        if kind < 0.2 and a:  # touching the previous lock
+            lo = b[-1]
+        elif kind < 0.4 and a:  # overlapping or nested in the previous lock
+            lo = rnd.randint(a[-1], max(a[-1], b[-1]))
+        elif kind < 0.5:  # at a window edge
+            lo = int(rnd.choice([cal.start, cal.end])[rnd.randrange(len(cal))])
+        else:
+            lo = rnd.randint(-50, horizon + 50)
+        a.append(lo)
+        b.append(lo + rnd.choice([0, 1, rnd.randint(2, 600)]))
+
+    many = cal.copy()
+    many.subtract_many(a, b)
+    one_by_one = cal.copy()
+    for lo, hi in zip(a, b):
+        one_by_one.subtract(lo, hi)
+
+    assert many.start.tolist() == one_by_one.start.tolist()
+    assert many.end.tolist() == one_by_one.end.tolist()
+    assert many.cursor.tolist() == one_by_one.cursor.tolist()
+    assert many.cap.tolist() == one_by_one.cap.tolist()
+    if len(many):
+        assert_queries_match_naive(many, rnd)
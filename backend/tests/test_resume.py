@@ -0,0 +1,130 @@
+import json
+import random
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import scheduler_core.run as run_mod
+from app import create_app
+from scheduler_core.sa_checkpoint import BEST_PLAN_FILE, CHECKPOINT_FILE, load_checkpoint
+from scheduler_state import active_jobs, cancel_flag, progress
+
+SCENARIO = "RT"
+
+
+def write_scenario(root, now, n_orders=12, seed=3):
+    """Small real_time scenario (cleaned inputs + config) with shifts around now."""
+    rnd = random.Random(seed)
+    rows = []
+    for o in range(n_orders):
+        ono = f"ORD{o:04d}"
+        head_ddl = now + pd.Timedelta(days=rnd.randint(0, 10), hours=rnd.randint(0, 23))
+        rows.append(dict(job_id=f"{ono}_H", OrderNo=ono, OrderPos=0, WorkPlaceNo="", duration_min=0,
+                         buffer_min=0, PriorityGroup=0, Orderstate=0, RecordType=10,
+                         effective_deadline=None, LatestDateHead=head_ddl, DateStart=None,
+                         OpNeedsUpstream=False, OpUpstreamOrders="", ItemNo=f"IT{o}", SortPos=0))
+        for p in range(1, rnd.randint(2, 4)):
+            wp = rnd.choice(["M01", "M02", "U01"])
+            rows.append(dict(job_id=f"{ono}_{p}", OrderNo=ono, OrderPos=p, WorkPlaceNo=wp,
+                             duration_min=rnd.randint(30, 300), buffer_min=rnd.choice([0, 60]),
+                             PriorityGroup=2 if wp == "U01" else rnd.choice([0, 1]), Orderstate=rnd.choice([1, 2, 3]),
+                             RecordType=60, effective_deadline=head_ddl - pd.Timedelta(hours=4 * (3 - p)),
+                             LatestDateHead=None, DateStart=None, OpNeedsUpstream=False, OpUpstreamOrders="",
+                             ItemNo=f"IT{o}", SortPos=p))
+    shifts = [
+        (wp, day + pd.Timedelta(hours=6), day + pd.Timedelta(hours=22))
+        for wp in ("M01", "M02", "U01")
+        for day in pd.date_range(now.normalize() - pd.Timedelta(days=1), periods=30, freq="D")
+    ]
+    cleaned = root / "cleaned"
+    cleaned.mkdir(parents=True)
+    pd.DataFrame(rows).to_csv(cleaned / "jobs_clean.csv", index=False)
+    pd.DataFrame(shifts, columns=["WorkPlaceNo", "start", "end"]).to_csv(cleaned / "shifts_clean.csv", index=False)
+    pd.DataFrame({"WorkPlaceNo": ["U01"]}).to_csv(cleaned / "unlimited_machines.csv", index=False)
+    pd.DataFrame({"WorkPlaceNo": []}).to_csv(cleaned / "outsourcing_machines.csv", index=False)
+    (root / "config.json").write_text(json.dumps({"mode": "real_time"}), encoding="utf-8")
+    return [cleaned / f for f in
+            ("jobs_clean.csv", "shifts_clean.csv", "unlimited_machines.csv", "outsourcing_machines.csv")]
+
+
+def wait_idle(scenario, timeout=120):
+    t0 = time.time()
+    while active_jobs.get(scenario) and time.time() - t0 < timeout:
+        time.sleep(0.05)
+    assert not active_jobs.get(scenario), "scheduler did not finish"
+
+
+def test_resume_real_time_run_after_the_minute_rolls_over(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    now = pd.Timestamp.now().floor("min")
+    root = Path("scenarios") / SCENARIO
+    paths = write_scenario(root, now)
+
+    # crash the SA loop after a few candidates, leaving an unfinished checkpoint
+    jitter = run_mod.jitter_weights
+    calls = []
+
+    def crashing_jitter(*args, **kwargs):
+        calls.append(1)
+        if len(calls) > 3:
+            raise RuntimeError("simulated crash")
+        return jitter(*args, **kwargs)
+
+    monkeypatch.setattr(run_mod, "jitter_weights", crashing_jitter)
+    monkeypatch.setattr(run_mod, "scenario_now", lambda cfg: now)
+    with pytest.raises(RuntimeError):
+        run_mod.run_scheduler_with_paths(
+            *paths, root / "output", scenario_name=SCENARIO, sa_config={"enabled": True, "iterations": 8})
+    (run_dir,) = (root / "runs").iterdir()
+    ckpt = load_checkpoint(run_dir)
+    assert ckpt is not None and not ckpt.get("cancelled")
+    assert pd.Timestamp(ckpt["now_ts"]).tz_convert(None) == now
+
+    # resume a minute later: the run must keep its own now
+    monkeypatch.setattr(run_mod, "jitter_weights", jitter)
+    monkeypatch.setattr(run_mod, "scenario_now", lambda cfg: now + pd.Timedelta(minutes=1))
+    client = create_app().test_client()
+    resp = client.post(f"/api/schedule/resume/{SCENARIO}", json={})
+    assert resp.status_code == 200, resp.get_json()
+    assert resp.get_json()["run_id"] == run_dir.name
+    wait_idle(SCENARIO)
+
+    assert progress[SCENARIO] == 100
+    meta = json.loads((run_dir / "run_meta.json").read_text(encoding="utf-8"))
+    assert meta["resumed"]["evaluations_done"] == ckpt["budget"]["done"]
+    assert meta["sa_evaluations"] == 8
+    assert pd.Timestamp(meta["now_used"]).tz_convert(None) == now
+    assert not (run_dir / CHECKPOINT_FILE).exists() and not (run_dir / BEST_PLAN_FILE).exists()
+
+
+def test_cancelled_run_is_only_resumed_by_id(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = Path("scenarios") / SCENARIO
+    paths = write_scenario(root, pd.Timestamp.now().floor("min"))
+
+    jitter = run_mod.jitter_weights
+
+    def cancelling_jitter(*args, **kwargs):
+        cancel_flag[SCENARIO] = True
+        return jitter(*args, **kwargs)
+
+    monkeypatch.setattr(run_mod, "jitter_weights", cancelling_jitter)
+    res = run_mod.run_scheduler_with_paths(
+        *paths, root / "output", scenario_name=SCENARIO, sa_config={"enabled": True, "iterations": 8})
+    assert res == {"cancelled": True}
+    (run_dir,) = (root / "runs").iterdir()
+    assert load_checkpoint(run_dir)["cancelled"]
+
+    client = create_app().test_client()
+    assert client.post(f"/api/schedule/resume/{SCENARIO}", json={}).status_code == 404
+    assert client.post(f"/api/schedule/resume/{SCENARIO}", json={"run_id": "../../x"}).status_code == 400
+    assert client.post(f"/api/schedule/resume/{SCENARIO}", json={"run_id": 123}).status_code == 400
+
+    monkeypatch.setattr(run_mod, "jitter_weights", jitter)
+    resp = client.post(f"/api/schedule/resume/{SCENARIO}", json={"run_id": run_dir.name})
+    assert resp.status_code == 200, resp.get_json()
+    wait_idle(SCENARIO)
+    assert progress[SCENARIO] == 100
+    assert load_checkpoint(run_dir) is None
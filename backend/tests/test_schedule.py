@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pandas as pd
+
+from scheduler_core.run import run_scheduler_with_paths
+
+NOW = pd.Timestamp("2025-03-03 07:30")
+
+JOB_COLUMNS = [
+    "job_id", "OrderNo", "OrderPos", "WorkPlaceNo", "duration_min", "buffer_min", "PriorityGroup",
+    "Orderstate", "RecordType", "effective_deadline", "LatestDateHead", "DateStart",
+    "OpNeedsUpstream", "OpUpstreamOrders", "ItemNo", "SortPos",
+]
+
+JOBS = [
+    ("ORD0026_H", "ORD0026", 0, "", 0, 0, 0, 0, 10, None, "2025-03-16 17:30", None, False, "", "IT26", 0),
+    ("ORD0026_3", "ORD0026", 3, "M06", 106, 0, 1, 1, 60, "2025-03-13 11:30", None, None, False, "", "IT26", 3),
+    ("ORD0026_4", "ORD0026", 4, "U02", 129, 30, 2, 3, 60, None, None, None, False, "", "IT26", 4),
+    ("ORD0026_5", "ORD0026", 5, "U02", 259, 0, 2, 1, 115, "2025-03-14 19:30", None, None, False, "", "IT26", 5),
+    ("ORD0026_6", "ORD0026", 6, "U01", 98, 0, 2, 3, 60, "2025-03-16 14:30", None, None, False, "", "IT26", 6),
+    ("ORD0026_7", "ORD0026", 7, "U02", 394, 0, 2, 2, 60, "2025-03-16 10:30", None, None, False, "", "IT26", 7),
+    ("ORD0056_H", "ORD0056", 0, "", 0, 0, 0, 0, 10, None, "2025-03-18 20:30", None, False, "", "IT56", 0),
+    ("ORD0056_1", "ORD0056", 1, "M06", 0, 0, 0, 4, 60, "2025-03-18 02:30", None, None, False, "", "IT56", 1),
+    ("ORD0056_2", "ORD0056", 2, "O02", 540, 120, 1, 3, 60, "2025-03-18 14:30", None, "2025-03-06 13:30", False, "",
+     "IT56", 2),
+    ("ORD0089_H", "ORD0089", 0, "", 0, 0, 0, 0, 10, None, "2025-03-19 20:30", None, False, "", "IT89", 0),
+    ("ORD0089_1", "ORD0089", 1, "U02", 533, 0, 2, 5, 60, "2025-03-17 06:30", None, None, False, "", "IT89", 1),
+    ("ORD0089_2", "ORD0089", 2, "M06", 91, 60, 1, 3, 115, "2025-03-18 17:30", None, None, False, "", "IT89", 2),
+    ("ORD0089_3", "ORD0089", 3, "U02", 467, 30, 2, 2, 60, None, None, None, True, "ORD0091;ORD0112", "IT89", 3),
+    ("ORD0091_H", "ORD0091", 0, "", 0, 0, 0, 0, 10, None, "2025-03-12 17:30", None, False, "", "IT91", 0),
+    ("ORD0091_1", "ORD0091", 1, "M03", 357, 60, 0, 2, 60, "2025-03-11 18:30", None, None, False, "", "IT91", 1),
+]
+
+LOCKED = pd.DataFrame([
+    dict(job_id="ORD0091_1", OrderNo="ORD0091", OrderPos=1, Orderstate=2, WorkPlaceNo="M03",
+         Start=pd.Timestamp("2025-03-03 07:30"), End=pd.Timestamp("2025-03-03 13:27"),
+         Duration=595, DurationReal=357, PriorityGroup=0, RecordType=60),
+    dict(job_id="ORD0056_2", OrderNo="ORD0056", OrderPos=2, Orderstate=3, WorkPlaceNo="O02",
+         Start=pd.Timestamp("2025-03-03 14:20"), End=pd.Timestamp("2025-03-04 07:20"),
+         Duration=900, DurationReal=540, PriorityGroup=1, RecordType=60),
+])
+
+
+def write_inputs(root):
+    """Cleaned inputs of the fixture: 06:00-22:00 shifts, U0x unlimited, O0x outsourcing."""
+    machines = ["M03", "M06", "U01", "U02", "O02"]
+    shifts = [
+        (wp, day + pd.Timedelta(hours=6), day + pd.Timedelta(hours=22))
+        for wp in machines
+        for day in pd.date_range(NOW.normalize() - pd.Timedelta(days=1), periods=30, freq="D")
+    ]
+    cleaned = root / "cleaned"
+    cleaned.mkdir(parents=True)
+    pd.DataFrame(JOBS, columns=JOB_COLUMNS).to_csv(cleaned / "jobs_clean.csv", index=False)
+    pd.DataFrame(shifts, columns=["WorkPlaceNo", "start", "end"]).to_csv(cleaned / "shifts_clean.csv", index=False)
+    pd.DataFrame({"WorkPlaceNo": ["U01", "U02"]}).to_csv(cleaned / "unlimited_machines.csv", index=False)
+    pd.DataFrame({"WorkPlaceNo": ["O02"]}).to_csv(cleaned / "outsourcing_machines.csv", index=False)
+    return [cleaned / f for f in
+            ("jobs_clean.csv", "shifts_clean.csv", "unlimited_machines.csv", "outsourcing_machines.csv")]
+
+
+def test_gap_fill_sees_cursor_moved_by_zero_duration_op(tmp_path, monkeypatch):
+    # ORD0056_1 (zero duration, ready at 09:20 behind the locked ORD0056_2)
+    # moves M06's cursor to 09:20. ORD0026_3 and ORD0089_2 are then both
+    # feasible at 09:20 and the OS5 upstream op ORD0089_2 goes first; a start
+    # memoized before the zero op (07:25 / 07:29) put ORD0026_3 first.
+    monkeypatch.chdir(tmp_path)
+    root = Path("scenarios") / "LOCKED"
+    paths = write_inputs(root)
+    res = run_scheduler_with_paths(
+        *paths, root / "output", sa_enabled=False, locked_ops=LOCKED, preview_only=True, now_ts=NOW)
+
+    plan = pd.read_csv(res["plan"], parse_dates=["Start", "End"])
+    m06 = plan[plan["WorkPlaceNo"] == "M06"].sort_values(["Start", "End"])
+    assert m06["job_id"].tolist() == ["ORD0056_1", "ORD0089_2", "ORD0026_3"]
+    assert m06["Start"].tolist() == [
+        pd.Timestamp("2025-03-04 09:20"), pd.Timestamp("2025-03-04 09:20"), pd.Timestamp("2025-03-04 10:51")]